@@ -1,23 +1,39 @@
 import sys, os
+import argparse
 import signal
 import pygame
 import time
 import locale
 from datetime import datetime
-from mutagen.mp3 import MP3
 from textwrap import dedent, fill
 from os import environ
 
 # Módulos propios
-from src.func.tts import tts
+from src.func.tts import create_tts_service
+from src.func.messages import build_messages, fill_template, section_announcements, station_id_clip
+from src.func.tones import cue_bytes
+from src.func.busy import start_cat_busy_detector
 from src.func.functions import (
     convert_seconds_to_hhmmss, convert_hhmmss_to_seconds, clear_screen,
     ptt, progress_bar, load_config, file_duration, resume,
-    resume_menu, get_fileNameMP3, convert_to_valid_mp3
+    resume_menu, convert_to_valid_mp3, get_ptt_driver,
+    get_media_index
 )
+from src.func.pcm_cache import PcmCache, PcmMusic
+from src.func.timeline import build_timeline, section_events, alert_files, timeline_duration, plan_pauses, print_plan
+from src.func.render import export_bulletin
+from src.func.mixer import create_mixer
+from src.func.formats import output_format, describe
+from src.func.journal import journal, start_journal, stop_journal
+from src.func.profiling import phase, timed, enable as enable_profiling
+from src.func.checkpoint import save_checkpoint, load_checkpoint, clear_checkpoint, sections_hash
+from src.func.control import start_control
+from src.func.dashboard import start_dashboard, snapshot
+from src.func.allstar import AmiClient, AllStarPlayer, parse_ami_events
 
 # Para el monitoreo de COS en segundo plano
 import socket
+import threading
 from multiprocessing import Manager, Process, freeze_support
 
 ############################################
@@ -39,14 +55,17 @@ def connect_ami(host, port, user, password):
     s.sendall(login_cmd.encode())
     return s
 
-def cos_monitor(shared_dict, host, port, user, password):
+def cos_monitor(shared_dict, host, port, user, password, cambios=None):
     """
     Proceso que se mantiene leyendo AMI y 
     actualiza shared_dict["COS"] = True/False
     si detecta actividad en el HUB (RPT_RXKEYED).
+    shared_dict["nodos"] guarda el último estado de cada nodo (para el panel).
+    Cada cambio se encola en 'cambios' para la bitácora del proceso principal.
     """
     ami_socket = connect_ami(host, port, user, password)
     buffer = ""
+    nodos = {}
     shared_dict["COS"] = False  # Arrancamos asumiendo inactivo
 
     try:
@@ -59,29 +78,35 @@ def cos_monitor(shared_dict, host, port, user, password):
             buffer += chunk
 
             # Separar por eventos completos
-            while "\r\n\r\n" in buffer:
-                raw_event, buffer = buffer.split("\r\n\r\n", 1)
-
-                if "Event: RPT_RXKEYED" in raw_event:
-                    lines = raw_event.split("\r\n")
-                    event_data = {}
-                    for line in lines:
-                        if ": " in line:
-                            k, v = line.split(": ", 1)
-                            event_data[k.strip()] = v.strip()
-
-                    # Detectar COS (EventValue=1)
-                    if event_data.get("EventValue") == "1":
-                        shared_dict["COS"] = True
-                    else:
-                        # Suponemos que EventValue=0 => COS liberado
-                        shared_dict["COS"] = False
+            eventos, buffer = parse_ami_events(buffer)
+            for event_data in eventos:
+                if event_data.get("Event") == "RPT_RXKEYED":
+                    # Detectar COS (EventValue=1); EventValue=0 => COS liberado
+                    shared_dict["COS"] = event_data.get("EventValue") == "1"
+                    if event_data.get("Node"):
+                        nodos[event_data["Node"]] = shared_dict["COS"]
+                        shared_dict["nodos"] = dict(nodos)
+                    if cambios is not None:
+                        cambios.put({"ocupado": shared_dict["COS"], "nodo": event_data.get("Node"),
+                                     "detectado": round(time.time(), 3)})
 
     except Exception as e:
         print(f"[cos_monitor] Error en el monitor de COS: {e}")
     finally:
         ami_socket.close()
 
+def registrar_cos(cambios):
+    """
+    Pasa a la bitácora los cambios de COS que encola el monitor (la bitácora
+    vive en este proceso, no en el del monitor).
+    """
+    while True:
+        try:
+            cambio = cambios.get()
+        except (EOFError, OSError):
+            return  # El Manager ya se cerró
+        journal().log("cos", fuente="ami", **cambio)
+
 def start_cos_monitor(host, port, user, password):
     """
     Arranca el proceso monitor que actualizará shared_dict["COS"].
@@ -90,35 +115,210 @@ def start_cos_monitor(host, port, user, password):
     manager = Manager()
     shared_dict = manager.dict()
     shared_dict["COS"] = False
+    cambios = manager.Queue()
 
     p = Process(
         target=cos_monitor,
-        args=(shared_dict, host, port, user, password),
+        args=(shared_dict, host, port, user, password, cambios),
         daemon=True
     )
     p.start()
+    threading.Thread(target=registrar_cos, args=(cambios,), daemon=True).start()
     return shared_dict, p
 
 
+@timed("mensajes de entrada/salida")
+def generar_mensajes(config):
+    """
+    Genera por TTS los audios de entrada y salida. Retorna sus rutas.
+    """
+    media_path = config["general"]["media_path"]
+
+    # Obtener fecha actual para los mensajes
+    fecha = datetime.now().strftime("%A, %d de %B de %Y")
+    mensaje_entrada = fill_template(config["mensajes"]["entrada"], {"fecha": fecha})
+    print(mensaje_entrada)
+    mensaje_salida = fill_template(config["mensajes"]["salida"], {"fecha": fecha})
+    print(mensaje_salida)
+
+    # Generar audios de entrada y salida en el formato de 'formatos.mensajes'.
+    # Las plantillas se sintetizan por segmentos: las frases fijas salen de la
+    # caché y solo se genera lo que cambió (la fecha).
+    fmt = output_format(config, "mensajes")
+    entrada = media_path + f"audio_entrada.{fmt['ext']}"
+    salida = media_path + f"audio_salida.{fmt['ext']}"
+    servicio = create_tts_service(config)
+    try:
+        build_messages(servicio, {entrada: config["mensajes"]["entrada"], salida: config["mensajes"]["salida"]},
+                       fmt, {"fecha": fecha})
+    finally:
+        servicio.close()
+    return entrada, salida
+
+
+@timed("anuncios de sección")
+def generar_anuncios(config):
+    """
+    Anuncios de sección por TTS si 'anuncios.habilitado'. Retorna {nombre: ruta}.
+    """
+    if not (config.get("anuncios") or {}).get("habilitado", False):
+        return {}
+    servicio = create_tts_service(config)
+    try:
+        return section_announcements(servicio, config, output_format(config, "mensajes"))
+    finally:
+        servicio.close()
+
+
+@timed("identificacion")
+def generar_identificacion(config):
+    """
+    Clip de identificación de la estación si 'identificacion.habilitado'
+    (en caché; el TTS solo se levanta para voz). Retorna su ruta o None.
+    """
+    cfg = config.get("identificacion") or {}
+    if not cfg.get("habilitado", False):
+        return None
+    fmt = output_format(config, "mensajes")
+    if cfg.get("modo", "cw") == "cw":
+        return station_id_clip(config, fmt)
+    servicio = create_tts_service(config)
+    try:
+        return station_id_clip(config, fmt, servicio)
+    finally:
+        servicio.close()
+
+
+def iniciar_cos(config):
+    """
+    Arranca el monitor de COS: AMI del hub o S-meter/BY del radio por CAT.
+    Retorna (shared_dict, proceso).
+    """
+    cos_cfg = config.get("cos", {})
+    if cos_cfg.get("fuente", "ami") == "cat":
+        # Si el PTT usa el mismo puerto se comparte: con PTT por CAT, la misma
+        # sesión (un solo dueño; TX;/RX; y SM0;/BY; nunca se intercalan); con
+        # PTT por RTS/DTR solo el serial, que no escribe en la línea de datos
+        driver = get_ptt_driver()
+        ser = driver.ser if getattr(driver, "ser", None) and driver.ser.port == cos_cfg.get("puerto") else None
+        return start_cat_busy_detector(cos_cfg, ser, getattr(driver, "cat", None) if ser else None)
+
+    # Datos de AMI (para el monitor de COS)
+    user = config["ami"]["username"]
+    password = config["ami"]["password"]
+    host = config["ami"]["host"]
+    port = config["ami"]["port"]
+    print("Usuario AMI:", user)
+    print("Password AMI:", password)
+    print("Host AMI:", host)
+    print("Port AMI:", port)
+    return start_cos_monitor(host, port, user, password)
+
+
+def transmitir_allstar(config, entrada, salida, anuncios=None, plan=None):
+    """
+    Transmite el boletín directo en el nodo AllStar: pre-renderiza cada
+    transmisión a 8 kHz y la reproduce con 'rpt localplay' por AMI. El nodo
+    levanta su propio transmisor; no se usa la tarjeta de sonido ni el PTT.
+    """
+    media_path = config["general"]["media_path"]
+    ami_cfg = config["ami"]
+    as_cfg = config.get("allstar", {})
+    fmt = output_format(config, "allstar")
+
+    ami = AmiClient(ami_cfg["host"], ami_cfg["port"], ami_cfg["username"], ami_cfg["password"]).connect()
+    player = AllStarPlayer(
+        ami, as_cfg["nodo"],
+        directorio=as_cfg.get("directorio", os.path.join(media_path, ".allstar")),
+        directorio_nodo=as_cfg.get("directorio_nodo"),
+        comando=as_cfg.get("comando", "localplay"),
+        lead=float(as_cfg.get("inicio", 0.5)),
+    )
+
+    # Solo marca la parada: el comando AMI de parada se manda desde el flujo
+    # principal, nunca con una acción AMI a medias (el candado no es reentrante)
+    def handle_exit_signal(signal_number, frame):
+        print("\nInterrupción detectada. Deteniendo la reproducción en el nodo...")
+        player.detener()
+    signal.signal(signal.SIGINT, handle_exit_signal)
+
+    print(f"Renderizando transmisiones ({describe(fmt)})...")
+    cache = PcmCache(media_path, get_media_index(),
+                     max_bytes=int(config["general"].get("pcm_cache_mb", 2048)) << 20,
+                     sample_rate=fmt["sample_rate"], channels=fmt["channels"])
+    plan = plan or plan_pauses(config, entrada, salida, anuncios)
+    transmisiones = player.render(build_timeline(config, entrada, salida, anuncios, plan), cache, fmt,
+                                  create_mixer(config, fmt["sample_rate"]))
+
+    shared_dict, cos_process = iniciar_cos(config)
+
+    resume_menu("cfg.yml")
+    print_plan(plan)
+    try:
+        if not player.run(transmisiones, cos=shared_dict):
+            player.stop()
+            print("Transmisión en el nodo AllStar detenida.")
+            return
+    finally:
+        ami.close()
+        cos_process.terminate()
+    print("Transmisión en el nodo AllStar finalizada.")
+
+
+def exportar(archivo_salida, pausa=None):
+    """
+    Renderiza el boletín completo (entrada, secciones con sus pausas y
+    salida) a un solo archivo WAV/MP3/Opus con su hoja de cues de PTT.
+    """
+    config = load_config()
+    locale.setlocale(locale.LC_TIME, 'es_ES')
+    media_path = config["general"]["media_path"]
+    entrada, salida = generar_mensajes(config)
+    anuncios = generar_anuncios(config)
+    identificacion = generar_identificacion(config)
+
+    # El PCM se decodifica directo a la frecuencia y canales de salida
+    fmt = output_format(config, "exportacion")
+    print(f"Formato de exportación: {describe(fmt)}")
+    plan = plan_pauses(config, entrada, salida, anuncios, identificacion=identificacion)
+    print_plan(plan)
+    eventos = build_timeline(config, entrada, salida, anuncios, plan)
+    cache = PcmCache(media_path, get_media_index(),
+                     max_bytes=int(config["general"].get("pcm_cache_mb", 2048)) << 20,
+                     sample_rate=fmt["sample_rate"], channels=fmt["channels"])
+    export_bulletin(eventos, archivo_salida, cache, pause_gap=pausa, fmt=fmt,
+                    mixer=create_mixer(config, fmt["sample_rate"]))
+
+
 ############################################
 #                 MAIN SCRIPT             #
 ############################################
-def main():
+def main(resume=False):
     clear_screen()
 
-    # Función para manejar CTRL+C
-    def handle_exit_signal(signal_number, frame):
-        print("\nInterrupción detectada. Deteniendo audio y desactivando PTT...")
+    # Detiene audio y PTT y sale (CTRL+C u orden 'abortar' del canal de control)
+    def detener(motivo):
         pygame.mixer.music.stop()  # Detener música
+        pygame.mixer.stop()  # Detener canales (caché de PCM y alertas)
         ptt('off')  # Apagar PTT
+        journal().log(motivo)
+        stop_journal()
         sys.exit(0)  # Salir del programa
 
+    # Función para manejar CTRL+C
+    def handle_exit_signal(signal_number, frame):
+        print("\nInterrupción detectada. Deteniendo audio y desactivando PTT...")
+        detener("interrupcion")
+
     # Asignar el manejador de señal para SIGINT
     signal.signal(signal.SIGINT, handle_exit_signal)
 
     # Cargar configuración desde cfg.yml
     global config
-    config = load_config()
+    with phase("cargar configuracion"):
+        config = load_config()
+    bitacora = start_journal(config["general"].get("bitacora", "logs"))
+    journal().log("boletin_inicio", secciones=[s["nombre"] for s in config["secciones"]])
 
     total_secciones = len(config["secciones"])  # Contar el número total de secciones
     # Configuración general
@@ -128,67 +328,145 @@ def main():
     # Nuevo parámetro: nivel de volumen para TTS
     tts_volume = config["general"].get("tts_volume", 1.0)
 
-    # Obtener fecha actual para los mensajes
-    fecha = datetime.now().strftime("%A, %d de %B de %Y")
-    mensaje_entrada = config["mensajes"]["entrada"]
-    print(mensaje_entrada)
-    mensaje_salida = config["mensajes"]["salida"].format(fecha=fecha)
-    print(mensaje_salida)
-
-    # Generar audios de entrada y salida
-    raw_entrada = media_path + "raw_audio_entrada.mp3"
-    raw_salida = media_path + "raw_audio_salida.mp3"
-    tts(mensaje_entrada, raw_entrada, 120)
-    time.sleep(5)
-    convert_to_valid_mp3(raw_entrada, "audio_entrada.mp3", media_path)
-    tts(mensaje_salida, raw_salida, 120)
-    time.sleep(5)
-    convert_to_valid_mp3(raw_salida, "audio_salida.mp3", media_path)
-    entrada = media_path + "audio_entrada.mp3"
-    salida = media_path + "audio_salida.mp3"
-
-    # Inicializar Pygame y el mixer
-    pygame.init()
-    pygame.mixer.init()
+    # Con --resume se retoma del último punto de control, sin volver a
+    # generar mensajes, anuncios ni identificación
+    checkpoint = load_checkpoint(config) if resume else None
+    if checkpoint and all(os.path.exists(r) for r in [checkpoint["entrada"], checkpoint["salida"], *checkpoint["anuncios"].values(),
+                                                      *filter(None, [checkpoint.get("identificacion")])]):
+        entrada, salida, anuncios = checkpoint["entrada"], checkpoint["salida"], checkpoint["anuncios"]
+        identificacion = checkpoint.get("identificacion")
+        print(f"Reanudando: {checkpoint['fase']} (sección {checkpoint['seccion'] + 1}, segundo {checkpoint['posicion']})")
+        journal().log("reanudar", **{k: checkpoint[k] for k in ("fase", "seccion", "posicion")})
+    else:
+        if resume:
+            print("No hay punto de control utilizable; se inicia desde el principio.")
+        checkpoint = None
+        entrada, salida = generar_mensajes(config)
+        anuncios = generar_anuncios(config)
+        identificacion = generar_identificacion(config)
+
+    huella = sections_hash(config)
+
+    # Plan de pausas de todo el boletín: dónde pausar y entre qué bloques
+    # seguir al aire sin soltar el PTT, y dónde identificar la estación
+    plan = plan_pauses(config, entrada, salida, anuncios, identificacion=identificacion)
+
+    def guardar(fase, seccion=0, posicion=None):
+        save_checkpoint({"fase": fase, "seccion": seccion, "posicion": posicion, "huella": huella,
+                         "entrada": entrada, "salida": salida, "anuncios": anuncios, "identificacion": identificacion})
+
+    if config["general"].get("salida", "tarjeta") == "allstar":
+        transmitir_allstar(config, entrada, salida, anuncios, plan)
+        journal().log("boletin_fin")
+        stop_journal()
+        return
+
+    # Inicializar Pygame y el mixer en el formato de reproducción, así la
+    # caché de PCM ya está a esa frecuencia y no se remuestrea al reproducir
+    with phase("pygame init"):
+        pygame.init()
+        repro = output_format(config, "reproduccion")
+        pygame.mixer.init(frequency=repro["sample_rate"], channels=repro["channels"])
     
     # Volumen global
     global_volume = float(config["general"].get("volume", 1.0))  # default 1.0
 
+    # Caché de PCM: decodifica solo los tramos que falten, en paralelo
+    pcm_cache = None
+    if config["general"].get("pcm_cache", False):
+        freq, _, channels = pygame.mixer.get_init()
+        pcm_cache = PcmCache(
+            media_path, get_media_index(),
+            max_bytes=int(config["general"].get("pcm_cache_mb", 2048)) << 20,
+            sample_rate=freq, channels=channels
+        )
+        pcm_cache.prepare([
+            (s["archivo"], convert_hhmmss_to_seconds(s["inicio"]), convert_hhmmss_to_seconds(s["fin"]))
+            for s in config["secciones"]
+        ])
+
     # Cargar audios de entrada y salida
-    entry_message = pygame.mixer.Sound(entrada)
-    entry_message.set_volume(global_volume)
-    end_message = pygame.mixer.Sound(salida)
-    end_message.set_volume(global_volume)
+    with phase("cargar mensajes"):
+        entry_message = pygame.mixer.Sound(entrada)
+        entry_message.set_volume(global_volume)
+        end_message = pygame.mixer.Sound(salida)
+        end_message.set_volume(global_volume)
+        if identificacion:
+            id_message = pygame.mixer.Sound(identificacion)
+            id_message.set_volume(global_volume)
+
+    # Alertas, una sola vez para todo el boletín. Las de 'tono' se sintetizan
+    # directo al formato del mixer, sin archivo ni decodificación.
+    with phase("cargar alertas"):
+        freq, _, channels = pygame.mixer.get_init()
+        alertas = {}
+        for a in config.get("alertas", []):
+            if "tono" in a:
+                alertas[a["nombre"]] = pygame.mixer.Sound(buffer=cue_bytes(a["tono"], freq, channels))
+            else:
+                alertas[a["nombre"]] = pygame.mixer.Sound(os.path.join(media_path, a["archivo"]))
+        # Con la caché de PCM la alerta de pausa se mezcla en el programa
+        # (atenuándolo alrededor de ella); sin caché suena encima a 'nivel_alerta'
+        mezclador = create_mixer(config, freq)
+        if "pause_alert" in alertas:
+            alertas["pause_alert"].set_volume(mezclador.nivel_alerta)
 
     # Duraciones y tiempos
-    play_duration = config["duraciones"]["reproduccion"]
     pause_duration = config["duraciones"]["pausa"]
     alert_time = config["duraciones"]["alerta"]
     rewind_time = config["duraciones"]["retroceso"]
 
-    # Datos de AMI (para el monitor de COS)
-    user = config["ami"]["username"]
-    password = config["ami"]["password"]
-    host = config["ami"]["host"]
-    port = config["ami"]["port"]
-    print("Usuario AMI:", user)
-    print("Password AMI:", password)
-    print("Host AMI:", host)
-    print("Port AMI:", port)
-
-    # Iniciar el proceso que monitoriza COS
-    shared_dict, cos_process = start_cos_monitor(host, port, user, password)
-
-    def play_section(section):
+    # Iniciar el monitor de COS
+    cos_cfg = config.get("cos", {})
+    with phase("monitor COS"):
+        shared_dict, cos_process = iniciar_cos(config)
+
+    # Canal de control (pausar, saltar, extender, ir a, abortar). Las esperas
+    # del boletín pasan por control.sleep para atender órdenes en cada tic.
+    def abortar():
+        print("\nOrden de abortar recibida. Deteniendo audio y desactivando PTT...")
+        detener("abortado")
+    control = start_control(config, abortar)
+    # Si el servidor de PTT lo suelta por su cuenta (concesión vencida o
+    # tiempo máximo de transmisión), el boletín hace una pausa y al reanudar
+    # vuelve a activar el PTT, en lugar de seguir reproduciendo al aire vacío
+    if hasattr(get_ptt_driver(), "on_released"):
+        get_ptt_driver().on_released = lambda: control.request("pausa")
+    # Panel de estado (solo lectura) para quien quiera seguir el boletín
+    panel = start_dashboard(config, lambda: snapshot(control, shared_dict, get_ptt_driver()))
+    journal().log("listo_para_transmitir")
+
+    def esperar_cos(mensaje="COS activo, esperando..."):
+        if not shared_dict["COS"]:
+            return
+        journal().log("cos_espera_inicio")
+        while shared_dict["COS"]:
+            print(mensaje)
+            control.sleep(2)
+        journal().log("cos_espera_fin")
+
+    def reproducir(sonido, nombre, espera):
+        journal().log("audio_inicio", clip=nombre, duracion=round(sonido.get_length(), 3))
+        sonido.play()
+        control.sleep(espera)
+        journal().log("audio_fin", clip=nombre)
+
+    def identificar(punto):
+        # Identificación de la estación en los puntos que eligió el plan (si
+        # una orden de control ya soltó el PTT, no tiene caso)
+        if punto in plan["identificaciones"] and get_ptt_driver().state:
+            print("Identificación de la estación...")
+            reproducir(id_message, "identificacion", id_message.get_length() + 1.5)
+
+    def play_section(section, indice=0, desde=None, pausas=()):
         global config
 
         archivo = section["archivo"]
         start_time = convert_hhmmss_to_seconds(section["inicio"])
         end_time = convert_hhmmss_to_seconds(section["fin"])
 
-        # Validar límites
-        audio_info = MP3(archivo)
-        total_duration = audio_info.info.length
+        # Validar límites (duración desde el índice de medios)
+        total_duration = file_duration(archivo)
 
         if start_time >= total_duration or end_time > total_duration:
             ptt('off')
@@ -199,31 +477,124 @@ def main():
 
         custom_duration = end_time - start_time
         media_path = config["general"]["media_path"]
-
-        pygame.mixer.music.load(archivo)
-        pygame.mixer.music.play(start=0)
-        pygame.mixer.music.set_pos(start_time)
-
-        alerta = get_fileNameMP3('cfg.yml','alertas','nombre','pause_alert')
-        alert_sound = pygame.mixer.Sound(media_path + alerta)
-        alert_sound.set_volume(0.8)
-
-        pausa = get_fileNameMP3('cfg.yml','alertas','nombre','pause')
-        pausa_message = pygame.mixer.Sound(media_path + pausa)
-        pausa_message_idle = file_duration(media_path+pausa) + 1.5
-
-        continua = get_fileNameMP3('cfg.yml','alertas','nombre','continuamos')
-        continue_message = pygame.mixer.Sound(media_path + continua)
-        continue_message_idle = file_duration(media_path+continua) + 1.5
-
-        total_elapsed_time = start_time
-
-        if custom_duration <= play_duration:
-            # Reproducción continua sin pausas
-            print("Duración menor a play_duration, reproduciendo sin pausas...")
-            while pygame.mixer.music.get_busy() and total_elapsed_time < end_time:
-                time.sleep(1)
+        # Al reanudar se empieza en el segundo del punto de control
+        posicion = start_time if desde is None else min(max(desde, start_time), end_time - 1)
+
+        if pcm_cache is not None:
+            # Tramo ya decodificado y mapeado en memoria, con las alertas del
+            # plan ya mezcladas en los bloques que se encolan
+            overlays = [(e["inicio"] + offset, pcm_cache.samples(ruta))
+                        for e in section_events(section, config["duraciones"], alert_files(config), pausas)
+                        for offset, ruta in e.get("alertas", [])]
+            music = PcmMusic(pcm_cache.open(archivo, start_time, end_time), base=start_time, volume=global_volume,
+                             mixer=mezclador, overlays=overlays)
+            music.play(posicion)
+        else:
+            music = pygame.mixer.music
+            music.load(archivo)
+            music.play(start=0)
+            music.set_pos(posicion)
+        journal().log("audio_inicio", clip=section["nombre"], posicion=posicion)
+        control.update(inicio=start_time, fin=end_time, posicion=posicion, proxima_pausa=None)
+        inicio_tramo = time.monotonic()
+
+        # La alerta de pausa es opcional: sin ella solo se anuncia la pausa
+        alert_sound = alertas.get("pause_alert")
+
+        pausa_message = alertas["pause"]
+        pausa_message_idle = pausa_message.get_length() + 1.5
+
+        continue_message = alertas["continuamos"]
+        continue_message_idle = continue_message.get_length() + 1.5
+
+        total_elapsed_time = posicion
+        # Pausas del plan que faltan y duración planeada del tramo en curso
+        cortes = [c for c in pausas if c > posicion]
+        tramo = 0
+
+        def terminar(orden):
+            # Orden de control que corta la sección ('saltar' o 'ir')
+            music.stop()
+            journal().log("audio_fin", clip=section["nombre"])
+            if orden == "saltar":
+                control.take("saltar")
+            journal().log("control", orden=orden, seccion=section["nombre"], posicion=total_elapsed_time)
+            print(f"Sección '{section['nombre']}' interrumpida por el canal de control ({orden}).")
+            return orden
+
+        def pausar(total_elapsed_time, manual=False, punto=None):
+            """
+            Pausa con PTT apagado y reanuda retrocediendo (identificando antes
+            de soltar el PTT si 'punto' está en el plan). Retorna la nueva
+            posición y la orden de control que cortó la pausa (o None).
+            """
+            nonlocal inicio_tramo
+            music.pause()
+            journal().log("audio_fin", clip=section["nombre"])
+            if manual:
+                journal().log("pausa_inicio", seccion=section["nombre"], posicion=total_elapsed_time, origen="control")
+            else:
+                # Retraso: cuánto se pasó el tramo planeado
+                retraso = round(time.monotonic() - inicio_tramo - tramo, 3)
+                journal().log("pausa_inicio", seccion=section["nombre"], posicion=total_elapsed_time, retraso=retraso)
+                control.update(retraso_pausa=retraso)
+            control.sleep(1)
+            clear_screen()
+            print(f"Sección '{section['nombre']}': Pausa de {pause_duration} segundos.")
+            reproducir(pausa_message, "pausa", pausa_message_idle)
+            identificar(punto)
+            ptt('off')
+            control.update(fase="pausa", proxima_pausa=None)
+
+            # La pausa se alarga con 'extender' (también si llegó antes de ella)
+            fin_pausa = time.monotonic() + pause_duration + control.take("extender")
+
+            while time.monotonic() < fin_pausa:
+                orden = control.sleep(fin_pausa - time.monotonic(), ("extender", "saltar", "ir"))
+                if orden == "extender":
+                    extra = control.take("extender")
+                    fin_pausa += extra
+                    journal().log("pausa_extendida", seccion=section["nombre"], segundos=extra)
+                    print(f"Pausa extendida {extra:g} s; faltan {round(fin_pausa - time.monotonic())} s.")
+                elif orden:
+                    return total_elapsed_time, orden
+
+            # Retrocede
+            total_elapsed_time = max(total_elapsed_time - rewind_time, start_time)
+            music.set_pos(total_elapsed_time)
+            guardar("seccion", indice, total_elapsed_time)
+
+            # *** Aquí verificamos COS antes de reanudar ***
+            print("Verificando si el HUB está ocupado (COS activo) antes de reanudar...")
+            esperar_cos()
+
+            # HUB libre => Reanudamos. Una 'pausa' pedida durante la pausa ya
+            # se cumplió: se descarta para no pausar otra vez al reanudar
+            if control.take("pausa"):
+                journal().log("control_descartada", orden="pausa", seccion=section["nombre"])
+            ptt('on')
+            control.sleep(1)
+            reproducir(continue_message, "continuamos", continue_message_idle)
+            music.unpause()
+            control.update(fase="seccion", posicion=total_elapsed_time)
+            journal().log("pausa_fin", seccion=section["nombre"])
+            journal().log("audio_inicio", clip=section["nombre"], posicion=total_elapsed_time)
+            inicio_tramo = time.monotonic()
+            print(f"Boletín reanudado, retrocedido {rewind_time} segundos")
+            return total_elapsed_time, None
+
+        if not cortes:
+            # Reproducción continua sin pausas (salvo una pedida por control)
+            print("Sin pausas en el plan, reproduciendo de corrido...")
+            while music.get_busy() and total_elapsed_time < end_time:
+                orden = control.sleep(1, ("pausa", "saltar", "ir"))
+                if orden == "pausa":
+                    control.take("pausa")
+                    total_elapsed_time, orden = pausar(total_elapsed_time, manual=True)
+                if orden:
+                    return terminar(orden)
                 total_elapsed_time += 1
+                control.update(posicion=total_elapsed_time)
                 remaining_time = end_time - total_elapsed_time
                 if total_elapsed_time >= end_time:
                     break
@@ -233,31 +604,47 @@ def main():
                 ################################### HAMNA - Amateur Radio Net Automation ###################################
                 
                    Sección '{section['nombre']}': Tiempo de Reproducción: {custom_duration} s.
-                   La sección es menor a {play_duration} s, será reproducida sin pausas.
+                   La sección será reproducida sin pausas.
                    Tiempo restante de la sección: {convert_seconds_to_hhmmss(remaining_time)}
                    {bar.strip()}
                 """)
-            pygame.mixer.music.stop()
-            return
+            music.stop()
+            journal().log("audio_fin", clip=section["nombre"])
+            return None
 
         # Reproducción con pausas
-        while pygame.mixer.music.get_busy() and total_elapsed_time < end_time:
+        while music.get_busy() and total_elapsed_time < end_time:
             elapsed_time = 0
-            time_to_pause = play_duration
+            # Hasta la siguiente pausa del plan (o el fin de la sección)
+            siguiente = cortes[0] if cortes else end_time
+            time_to_pause = tramo = siguiente - total_elapsed_time
+            manual = False
 
             while time_to_pause > 0 and total_elapsed_time < end_time:
-                time.sleep(1)
+                # Un tic por segundo; una orden de control lo despierta antes
+                orden = control.sleep(1, ("pausa", "saltar", "ir"))
+                if orden == "pausa":
+                    control.take("pausa")
+                    manual = True
+                    break
+                if orden:
+                    return terminar(orden)
                 elapsed_time += 1
                 total_elapsed_time += 1
+                control.update(posicion=total_elapsed_time,
+                               proxima_pausa=siguiente - total_elapsed_time if siguiente < end_time else None)
                 remaining_time = end_time - total_elapsed_time
 
                 if total_elapsed_time >= end_time:
-                    pygame.mixer.music.stop()
-                    return
+                    music.stop()
+                    journal().log("audio_fin", clip=section["nombre"])
+                    return None
 
-                if time_to_pause == alert_time:
+                if siguiente < end_time and time_to_pause == alert_time:
                     print(f"Sección '{section['nombre']}': Alerta de pausa...")
-                    alert_sound.play()
+                    if pcm_cache is None and alert_sound is not None:
+                        alert_sound.play()
+                    journal().log("alerta", seccion=section["nombre"], posicion=total_elapsed_time)
 
                 clear_screen()
                 bar = progress_bar(total_elapsed_time - start_time, custom_duration)
@@ -265,7 +652,7 @@ def main():
                 ################################### HAMNA - Amateur Radio Net Automation ###################################
                 
                    Sección '{section['nombre']}': Tiempo de Reproducción: {custom_duration} s.
-                   La sección será reproducida con pausas cada {play_duration} s.
+                   {f"Próxima pausa en {siguiente - total_elapsed_time} s." if siguiente < end_time else "Sin más pausas en esta sección."}
                    Tiempo restante de la sección: {convert_seconds_to_hhmmss(remaining_time)}
                    {bar.strip()}
                 """)
@@ -273,34 +660,18 @@ def main():
                 time_to_pause -= 1
 
             if total_elapsed_time < end_time:
-                # Pausa
-                pygame.mixer.music.pause()
-                time.sleep(1)
-                clear_screen()
-                print(f"Sección '{section['nombre']}': Pausa de {pause_duration} segundos.")
-                pausa_message.play()
-                time.sleep(pausa_message_idle)
-                ptt('off')
-
-                time.sleep(pause_duration)
-
-                # Retrocede
-                total_elapsed_time -= rewind_time
-                pygame.mixer.music.set_pos(total_elapsed_time)
-
-                # *** Aquí verificamos COS antes de reanudar ***
-                print("Verificando si el HUB está ocupado (COS activo) antes de reanudar...")
-                while shared_dict["COS"]:
-                    print("COS activo, esperando...")
-                    time.sleep(2)
-
-                # HUB libre => Reanudamos
-                ptt('on')
-                time.sleep(1)
-                continue_message.play()
-                time.sleep(continue_message_idle)
-                pygame.mixer.music.unpause()
-                print(f"Boletín reanudado, retrocedido {rewind_time} segundos")
+                punto = None
+                if not manual:
+                    cortes = [c for c in cortes if c > total_elapsed_time]
+                    if pcm_cache is not None:
+                        music.drop_overlays(total_elapsed_time)
+                    punto = f"pausa:{indice}:{list(pausas).index(siguiente)}"
+                total_elapsed_time, orden = pausar(total_elapsed_time, manual, punto)
+                if orden:
+                    return terminar(orden)
+        music.stop()
+        journal().log("audio_fin", clip=section["nombre"])
+        return None
 
     # Reproducción principal
     clear_screen()
@@ -313,61 +684,164 @@ def main():
       
            El boletin consta de las siguientes {total_secciones} secciones:
     """)
-    resume_menu("cfg.yml")
+    if checkpoint is None:
+        resume_menu("cfg.yml")
+    print_plan(plan, plan_pauses(config, entrada, salida, anuncios, modo="seccion") if plan["modo"] != "seccion" else None)
     print(f"""         
            Un proyecto del Radio Club Guadiana A.C.
            Visita https://rcg.org.mx
     """)
 
-    while shared_dict["COS"]:
-        print("COS activo antes de iniciar sección, esperando...")
-        time.sleep(2)
-    ptt("on")
-    time.sleep(2)
-    entry_message_idle = file_duration(entrada) + 1.5
-    print(entry_message_idle)
-    entry_message.play()
-    time.sleep(entry_message_idle)
-    ptt("off")
-    time.sleep(6)
-    clear_screen()
+    # Desde dónde se reanuda (sin punto de control: desde la entrada)
+    al_aire = None
+    fase = checkpoint["fase"] if checkpoint else "entrada"
+    primera = checkpoint["seccion"] if fase == "seccion" else (total_secciones if fase == "salida" else 0)
+    desde = checkpoint["posicion"] if fase == "seccion" else None
 
-    for section in config["secciones"]:
-        # Verifica COS antes de iniciar la sección
-        while shared_dict["COS"]:
-            print("COS activo antes de iniciar sección, esperando...")
-            time.sleep(2)
+    if fase == "entrada":
+        guardar("entrada")
+        control.update(fase="entrada")
+        esperar_cos("COS activo antes de iniciar sección, esperando...")
         ptt("on")
-        print(f"Reproduciendo sección: {section['nombre']}...")
-        time.sleep(2)
-        play_section(section)
+        control.sleep(2)
+        entry_message_idle = file_duration(entrada) + 1.5
+        print(entry_message_idle)
+        reproducir(entry_message, "entrada", entry_message_idle)
+        identificar("entrada")
+        if plan["entrada_continua"]:
+            al_aire = 0
+        else:
+            ptt("off")
+            control.sleep(6)
         clear_screen()
-        print(f"Sección '{section['nombre']}' finalizada.")
-        time.sleep(2)
-        ptt("off")
-        time.sleep(8)
 
-
-    while shared_dict["COS"]:
-            print("COS activo antes de iniciar sección, esperando...")
-            time.sleep(2)
-    ptt("on")
-    print("Reproducción finalizada. Reproduciendo mensaje de salida...")
-    time.sleep(2)
+    def soltar_ptt(espera):
+        # Suelta el PTT que quedó encendido para un bloque que ya no sigue
+        nonlocal al_aire
+        ptt("off")
+        control.sleep(espera)
+        al_aire = None
+
+    # Las órdenes 'ir' y 'saltar' del canal de control mueven el índice; entre
+    # secciones, 'saltar' se aplica a la siguiente. 'al_aire' es el bloque
+    # para el que el plan dejó el PTT encendido (None: está apagado).
+    indice = primera
+    while indice < total_secciones:
+        # Una pausa pedida fuera de una sección no aplica (el PTT ya está apagado)
+        control.take("pausa")
+        destino = control.take("ir")
+        if destino is not None:
+            indice, desde = destino, None
+        if control.take("saltar"):
+            journal().log("control", orden="saltar", seccion=config["secciones"][indice]["nombre"])
+            print(f"Sección '{config['secciones'][indice]['nombre']}' omitida por el canal de control.")
+            indice += 1
+            continue
+        section = config["secciones"][indice]
+        planeada = plan["secciones"][indice]
+        if al_aire is not None and al_aire != indice:
+            soltar_ptt(8)
+        reanudada = indice == primera and desde is not None
+        if not reanudada:
+            guardar("seccion", indice, None)
+        control.update(fase="seccion", seccion=indice + 1, nombre=section["nombre"], posicion=None,
+                       proxima_pausa=None, planeado=None, seccion_t0=None)
+        if al_aire == indice and get_ptt_driver().state:
+            # El plan encadena esta sección con la anterior sin soltar el PTT
+            # (salvo que el servidor lo haya soltado: entonces se vuelve a activar)
+            print(f"Reproduciendo sección: {section['nombre']} (sin soltar PTT)...")
+        else:
+            # Verifica COS antes de iniciar la sección
+            esperar_cos("COS activo antes de iniciar sección, esperando...")
+            ptt("on")
+            print(f"Reproduciendo sección: {section['nombre']}...")
+            control.sleep(2)
+        if reanudada:
+            # Aviso corto de que se retoma donde se quedó
+            reproducir(alertas["continuamos"], "continuamos", alertas["continuamos"].get_length() + 1.5)
+        elif section["nombre"] in anuncios:
+            anuncio = pygame.mixer.Sound(anuncios[section["nombre"]])
+            anuncio.set_volume(global_volume)
+            reproducir(anuncio, f"anuncio {section['nombre']}",
+                       file_duration(anuncios[section["nombre"]]) + 1.5)
+        planeado = timeline_duration(section_events(section, config["duraciones"], alert_files(config), planeada["pausas"]))
+        journal().log("seccion_inicio", nombre=section["nombre"], planeado=round(planeado, 2))
+        control.update(planeado=round(planeado), seccion_t0=time.time())
+        inicio_seccion = time.monotonic()
+        play_section(section, indice, desde if reanudada else None, planeada["pausas"])
+        desde = None
+        journal().log("seccion_fin", nombre=section["nombre"])
+        control.update(error_anterior=round(time.monotonic() - inicio_seccion - planeado, 1))
+        clear_screen()
+        print(f"Sección '{section['nombre']}' finalizada.")
+        control.sleep(2)
+        identificar(f"seccion:{indice}")
+        if planeada["continua"] and not control.pending("ir") and not control.pending("saltar"):
+            al_aire = indice + 1
+        else:
+            ptt("off")
+            control.sleep(8)
+            al_aire = None
+        indice += 1
+
+
+    guardar("salida", total_secciones)
+    control.update(fase="salida", seccion=None, nombre=None, posicion=None, proxima_pausa=None)
+    if al_aire is not None and al_aire != total_secciones:
+        soltar_ptt(8)
+    if al_aire == total_secciones:
+        print("Reproducción finalizada. Reproduciendo mensaje de salida (sin soltar PTT)...")
+    else:
+        esperar_cos("COS activo antes de iniciar sección, esperando...")
+        ptt("on")
+        print("Reproducción finalizada. Reproduciendo mensaje de salida...")
+        control.sleep(2)
     end_message_idle = file_duration(salida) + 1.5
-    end_message.play()
-    time.sleep(end_message_idle)
+    reproducir(end_message, "salida", end_message_idle)
+    identificar("salida")
     ptt("off")
+    clear_checkpoint()
+    control.update(fase="fin")
+    control.close()
+    driver = get_ptt_driver()
+    print(f"Latencia de PTT ({driver.name}): {driver.latency}")
+    journal().log("boletin_fin")
+    stop_journal()
+    print(f"Bitácora: {bitacora.path} (resumen: python -m src.func.journal {bitacora.path})")
 
     # Finalizar el proceso monitor si deseas
+    if cos_cfg.get("fuente", "ami") == "cat":
+        print(cos_process.report())
     cos_process.terminate()
     print("Monitor de COS finalizado.")
 
     input("Presiona Enter para salir...")
+    if panel is not None:
+        panel.close()
 
 ############################################
 #    Protección de bloque principal        #
 ############################################
 if __name__ == "__main__":
     freeze_support()  # Recomendado en Windows para PyInstaller, etc.
-    main()
+    parser = argparse.ArgumentParser(description="HAMNA - Amateur Radio Net Automation")
+    parser.add_argument("--export", metavar="ARCHIVO",
+                        help="Exporta el boletín a un archivo .wav/.mp3/.opus (con hoja .cue) en lugar de transmitir")
+    parser.add_argument("--pausa", type=float, metavar="S",
+                        help="Al exportar, acorta los silencios con PTT apagado a S segundos")
+    parser.add_argument("--perfil", nargs="?", const="fases", choices=["fases", "cprofile", "pyinstrument"],
+                        help="Mide el tiempo de cada fase (y opcionalmente captura con cProfile/pyinstrument)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma un boletín interrumpido desde su último punto de control")
+    args = parser.parse_args()
+    if args.perfil:
+        enable_profiling(None if args.perfil == "fases" else args.perfil)
+    if args.export:
+        exportar(args.export, args.pausa)
+    else:
+        try:
+            main(resume=args.resume)
+        except Exception as e:
+            journal().log("error", tipo=type(e).__name__, mensaje=str(e))
+            stop_journal()
+            raise
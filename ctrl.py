@@ -1,18 +1,15 @@
 import serial
-import time
+from src.func.cat import CatSession
 
 SERIAL_PORT = 'COM13'
 BAUDRATE = 9600
 
-def send_command(ser, command):
-    ser.write((command + '\r').encode())
-    time.sleep(0.3)
-    response = ser.read_all().decode().strip()
-    return response or "[Sin respuesta]"
+def send_command(cat, command):
+    return cat.transact(command) or "[Sin respuesta]"
 
-def read_menu_61(ser):
+def read_menu_61(cat):
     print("🔎 Leyendo valor actual del menú 61A (crossband repeater)...")
-    response = send_command(ser, "EX06101001;")
+    response = send_command(cat, "EX06101001;")
     print(f"Respuesta: {response}")
 
 
@@ -30,7 +27,7 @@ def main():
         ser.dtr = False
         ser.rts = False
 
-        read_menu_61(ser)
+        read_menu_61(CatSession(ser))
 
         ser.close()
         print("Conexión cerrada.")
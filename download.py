@@ -1,8 +1,14 @@
-import os
-from yt_dlp import YoutubeDL
-from imageio_ffmpeg import get_ffmpeg_exe
+import argparse
+import sys
+from src.func.ingest import ingest, read_sources_file, parse_source
+from src.func.functions import load_config, convert_seconds_to_hhmmss
+from src.func.formats import PRESETS, output_format, resolve_format, describe
 
+# yt-dlp e imageio-ffmpeg se importan al usarse: la ingesta de archivos
+# locales funciona sin ellos y sin red.
 def descargar_audio(url, nombre_archivo="audio.mp3"):
+    from yt_dlp import YoutubeDL
+    from imageio_ffmpeg import get_ffmpeg_exe
     opciones = {
         'format': 'bestaudio/best',
         'postprocessors': [{
@@ -19,6 +25,7 @@ def descargar_audio(url, nombre_archivo="audio.mp3"):
         ydl.download([url])
 
 def get_metadata(url):
+    from yt_dlp import YoutubeDL
     # Configuración de yt-dlp
     ydl_opts = {
         'quiet': True,  # Silencia los mensajes innecesarios
@@ -39,13 +46,42 @@ def get_metadata(url):
     print(f"Canal o autor: {channel}")
 
 
-# URL del video de Facebook
-url_video = "https://www.youtube.com/watch?v=WuY86jOIzfk"
-#media_path = '\\src\\media\\'
-nombre_archivo = "lora"
-#archivo = media_path + nombre_archivo
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de audios para el boletín HAMNA")
+    parser.add_argument("fuentes", nargs="*", help="URLs o archivos locales")
+    parser.add_argument("-l", "--lista", help="Archivo con una fuente por línea ('fuente | nombre')")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Trabajadores en paralelo")
+    parser.add_argument("-m", "--media-path", help="Destino (por defecto general.media_path de cfg.yml)")
+    parser.add_argument("--sin-normalizar", action="store_true", help="No normalizar el volumen")
+    parser.add_argument("-f", "--formato", choices=sorted(PRESETS),
+                        help="Formato de salida (por defecto formatos.ingesta de cfg.yml)")
+    args = parser.parse_args()
 
-# Descargar el audio
-descargar_audio(url_video, nombre_archivo)
-#get_metadata(url_video)
-print(f"Audio descargado como {nombre_archivo}")
+    fuentes = [parse_source(f) for f in args.fuentes]
+    if args.lista:
+        fuentes += read_sources_file(args.lista)
+    if not fuentes:
+        parser.error("Indica al menos una fuente o una lista con --lista")
+
+    config = load_config()
+    media_path = args.media_path or config["general"]["media_path"]
+    fmt = resolve_format(args.formato) if args.formato else output_format(config, "ingesta")
+    print(f"Formato: {describe(fmt)}")
+    manifest, errores = ingest(fuentes, media_path, args.workers, fmt, normalize=not args.sin_normalizar)
+
+    # Secciones listas para copiar a cfg.yml
+    procesadas = {f[0] if isinstance(f, tuple) else f for f in fuentes} - set(errores)
+    print("\nsecciones:")
+    for entrada in manifest.values():
+        if entrada["fuente"] not in procesadas:
+            continue
+        print(f"""  - nombre: "{entrada['titulo']}"
+    archivo: "{entrada['archivo']}"
+    inicio: "00:00:00"
+    fin: "{convert_seconds_to_hhmmss(entrada['duracion'])}"
+""")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
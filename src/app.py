@@ -1,22 +1,276 @@
-from fastapi import FastAPI
-import RPi.GPIO as GPIO
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 
-app = FastAPI()
+
+class FakeGPIO:
+    """
+    Backend de GPIO en memoria con la misma interfaz que RPi.GPIO.
+    Permite correr y probar el servidor en un Linux sin Raspberry Pi.
+    """
+    BCM = 11
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+
+    def __init__(self):
+        self.pins = {}
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, mode):
+        self.pins[pin] = self.LOW
+
+    def output(self, pin, value):
+        self.pins[pin] = value
+
+    def input(self, pin):
+        return self.pins.get(pin, self.LOW)
+
+    def cleanup(self):
+        self.pins.clear()
+
+
+# HAMNA_GPIO=fake fuerza el backend en memoria; si RPi.GPIO no está
+# disponible (o no corre en una Pi) también se usa el falso.
+if os.environ.get("HAMNA_GPIO", "rpi") == "fake":
+    GPIO = FakeGPIO()
+else:
+    try:
+        import RPi.GPIO as GPIO
+    except (ImportError, RuntimeError) as e:
+        print(f"RPi.GPIO no disponible ({e}), usando GPIO falso.")
+        GPIO = FakeGPIO()
+GPIO_BACKEND = "fake" if isinstance(GPIO, FakeGPIO) else "rpi"
 
 # Configuración del GPIO
+PTT_PIN = 17
 GPIO.setmode(GPIO.BCM)
-GPIO.setup(17, GPIO.OUT)
+GPIO.setup(PTT_PIN, GPIO.OUT)
+
+# Parámetros del watchdog de PTT (en segundos)
+# LEASE_TTL: vida por defecto de la concesión si el cliente no envía ttl
+# MAX_TX_TIME: tiempo máximo de transmisión continua (time-out timer)
+LEASE_TTL = float(os.environ.get("HAMNA_PTT_TTL", 5))
+MAX_TX_TIME = float(os.environ.get("HAMNA_PTT_MAX_TX", 600))
+
+# Límites (s) del histograma de latencia de los handlers
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Estado de la concesión de PTT. Todo el estado vive en el event loop,
+# así que handlers y watchdog lo comparten sin candados.
+lease = {
+    "activo": False,
+    "ttl": None,       # vida de la concesión; sin ttl del cliente, LEASE_TTL
+    "expira": 0.0,     # time.monotonic() en que vence la concesión
+    "inicio": 0.0,     # time.monotonic() del flanco de subida
+}
+lease_changed = asyncio.Event()
+
+# Métricas acumuladas desde el arranque del servidor
+metrics = {
+    "edges": {"up": 0, "down": 0},
+    "keydown_seconds": 0.0,
+    "watchdog_releases": {"ttl": 0, "max_tx": 0},
+    "latency": {},     # ruta -> [conteos por bucket..., +Inf], suma, total
+    "last_client": None,
+}
+
+
+def _deadline():
+    """
+    Momento (monotónico) en que el watchdog debe soltar el PTT.
+    """
+    return min(lease["expira"], lease["inicio"] + MAX_TX_TIME)
+
+
+def _key_up(ttl):
+    ahora = time.monotonic()
+    if not lease["activo"]:
+        lease["inicio"] = ahora
+        metrics["edges"]["up"] += 1
+    # Toda concesión vence: sin ttl del cliente se usa LEASE_TTL
+    lease["activo"] = True
+    lease["ttl"] = ttl if ttl is not None else LEASE_TTL
+    lease["expira"] = ahora + lease["ttl"]
+    GPIO.output(PTT_PIN, GPIO.HIGH)
+    lease_changed.set()
+
+
+def _key_down():
+    GPIO.output(PTT_PIN, GPIO.LOW)
+    if lease["activo"]:
+        metrics["edges"]["down"] += 1
+        metrics["keydown_seconds"] += time.monotonic() - lease["inicio"]
+    lease["activo"] = False
+    lease["ttl"] = None
+    lease_changed.set()
+
+
+async def ptt_watchdog():
+    """
+    Tarea que duerme hasta el vencimiento de la concesión y suelta el PTT
+    si el cliente dejó de renovarla o se excedió el tiempo máximo.
+    Los heartbeats solo mueven 'expira'; la tarea no despierta por ellos.
+    """
+    while True:
+        lease_changed.clear()
+        if not lease["activo"]:
+            await lease_changed.wait()
+            continue
+        restante = _deadline() - time.monotonic()
+        if restante > 0:
+            try:
+                await asyncio.wait_for(lease_changed.wait(), restante)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        if time.monotonic() - lease["inicio"] >= MAX_TX_TIME:
+            motivo = "max_tx"
+            print(f"[watchdog] PTT liberado: tiempo máximo de transmisión ({MAX_TX_TIME:.0f} s)")
+        else:
+            motivo = "ttl"
+            print("[watchdog] PTT liberado: concesión vencida sin heartbeat")
+        metrics["watchdog_releases"][motivo] += 1
+        _key_down()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    watchdog = asyncio.create_task(ptt_watchdog())
+    yield
+    watchdog.cancel()
+    _key_down()
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    inicio = time.perf_counter()
+    response = await call_next(request)
+    duracion = time.perf_counter() - inicio
+
+    # Las rutas inexistentes no generan series nuevas
+    ruta = request.url.path
+    if response.status_code == 404:
+        return response
+    hist = metrics["latency"].get(ruta)
+    if hist is None:
+        hist = metrics["latency"][ruta] = {"buckets": [0] * (len(LATENCY_BUCKETS) + 1), "sum": 0.0, "count": 0}
+    for i, limite in enumerate(LATENCY_BUCKETS):
+        if duracion <= limite:
+            hist["buckets"][i] += 1
+            break
+    else:
+        hist["buckets"][-1] += 1
+    hist["sum"] += duracion
+    hist["count"] += 1
+
+    if ruta.startswith("/ptt"):
+        metrics["last_client"] = {
+            "ip": request.client.host if request.client else None,
+            "path": ruta,
+            "time": time.time(),
+        }
+    return response
+
 
 @app.get("/ptt_on")
-def encender_gpio():
-    GPIO.output(17, GPIO.HIGH)
-    return {"message": "GPIO 17 ON"}
+async def encender_gpio(ttl: float = None):
+    if ttl is not None and not (math.isfinite(ttl) and ttl > 0):
+        raise HTTPException(status_code=422, detail="ttl debe ser un número positivo de segundos")
+    _key_up(ttl)
+    return {"message": f"GPIO {PTT_PIN} ON", "ttl": lease["ttl"], "max_tx": MAX_TX_TIME}
+
+@app.get("/ptt_heartbeat")
+async def renovar_ptt():
+    # Sin acceso al GPIO: solo extiende el vencimiento de la concesión
+    if lease["activo"]:
+        lease["expira"] = time.monotonic() + lease["ttl"]
+    return {"ptt": lease["activo"]}
 
 @app.get("/ptt_off")
-def apagar_gpio():
-    GPIO.output(17, GPIO.LOW)
-    return {"message": "GPIO 17 OFF"}
+async def apagar_gpio():
+    _key_down()
+    return {"message": f"GPIO {PTT_PIN} OFF"}
+
+
+def _keydown_total():
+    """
+    Segundos acumulados con PTT activo, incluyendo la transmisión en curso.
+    """
+    total = metrics["keydown_seconds"]
+    if lease["activo"]:
+        total += time.monotonic() - lease["inicio"]
+    return total
+
+@app.get("/status")
+async def estado():
+    ahora = time.monotonic()
+    return {
+        "ptt": lease["activo"],
+        "line": GPIO.input(PTT_PIN) == GPIO.HIGH,
+        "pin": PTT_PIN,
+        "backend": GPIO_BACKEND,
+        "ttl": lease["ttl"],
+        "lease_remaining": max(0.0, _deadline() - ahora) if lease["activo"] else None,
+        "tx_seconds": ahora - lease["inicio"] if lease["activo"] else 0.0,
+        "max_tx": MAX_TX_TIME,
+        "edges": metrics["edges"],
+        "keydown_seconds_total": _keydown_total(),
+        "watchdog_releases": metrics["watchdog_releases"],
+        "last_client": metrics["last_client"],
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metricas():
+    """
+    Métricas en formato de exposición de texto de Prometheus.
+    """
+    lineas = [
+        "# HELP hamna_ptt_state Estado actual de la línea de PTT (1 = TX).",
+        "# TYPE hamna_ptt_state gauge",
+        f'hamna_ptt_state{{pin="{PTT_PIN}",backend="{GPIO_BACKEND}"}} {int(GPIO.input(PTT_PIN) == GPIO.HIGH)}',
+        "# HELP hamna_ptt_edges_total Flancos de PTT desde el arranque.",
+        "# TYPE hamna_ptt_edges_total counter",
+    ]
+    for edge, valor in metrics["edges"].items():
+        lineas.append(f'hamna_ptt_edges_total{{edge="{edge}"}} {valor}')
+    lineas += [
+        "# HELP hamna_ptt_keydown_seconds_total Segundos acumulados con PTT activo.",
+        "# TYPE hamna_ptt_keydown_seconds_total counter",
+        f"hamna_ptt_keydown_seconds_total {_keydown_total():.3f}",
+        "# HELP hamna_ptt_watchdog_releases_total PTT liberado por el watchdog.",
+        "# TYPE hamna_ptt_watchdog_releases_total counter",
+    ]
+    for motivo, valor in metrics["watchdog_releases"].items():
+        lineas.append(f'hamna_ptt_watchdog_releases_total{{reason="{motivo}"}} {valor}')
+    lineas += [
+        "# HELP hamna_request_duration_seconds Latencia de los handlers HTTP.",
+        "# TYPE hamna_request_duration_seconds histogram",
+    ]
+    for ruta, hist in metrics["latency"].items():
+        acumulado = 0
+        for limite, conteo in zip(LATENCY_BUCKETS + ("+Inf",), hist["buckets"]):
+            acumulado += conteo
+            lineas.append(f'hamna_request_duration_seconds_bucket{{path="{ruta}",le="{limite}"}} {acumulado}')
+        lineas.append(f'hamna_request_duration_seconds_sum{{path="{ruta}"}} {hist["sum"]:.6f}')
+        lineas.append(f'hamna_request_duration_seconds_count{{path="{ruta}"}} {hist["count"]}')
+    cliente = metrics["last_client"]
+    if cliente:
+        lineas += [
+            "# HELP hamna_last_client_timestamp_seconds Última petición de PTT recibida.",
+            "# TYPE hamna_last_client_timestamp_seconds gauge",
+            f'hamna_last_client_timestamp_seconds{{ip="{cliente["ip"]}",path="{cliente["path"]}"}} {cliente["time"]:.3f}',
+        ]
+    return "\n".join(lineas) + "\n"
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,199 @@
+import itertools
+import os
+import socket
+import threading
+import time
+from src.func.render import render_timeline
+from src.func.timeline import transmissions
+
+# Salida directa a un nodo AllStar (app_rpt) sin tarjeta de sonido: cada
+# transmisión del plan se pre-renderiza a un archivo de 8 kHz (ulaw por
+# defecto) y se manda reproducir por AMI con 'rpt localplay' (o 'rpt
+# playback'). El nodo se encarga de levantar y soltar su transmisor, así que
+# no hay cadena analógica ni llamadas de PTT en cada pausa.
+
+
+class AmiError(Exception):
+    pass
+
+
+def parse_ami_events(buffer):
+    """
+    Separa los mensajes completos (terminados en línea vacía) del buffer.
+    Devuelve ([dict de campos, ...], resto sin terminar).
+    """
+    bloques = buffer.split("\r\n\r\n")
+    resto = bloques.pop()
+    mensajes = []
+    for bloque in bloques:
+        campos = {}
+        for linea in bloque.split("\r\n"):
+            k, sep, v = linea.partition(": ")
+            if sep:
+                campos[k.strip()] = v.strip()
+        mensajes.append(campos)
+    return mensajes, resto
+
+
+class AmiClient:
+    """
+    Cliente mínimo de Asterisk Manager Interface para acciones síncronas.
+    Cada acción lleva su ActionID; los eventos que lleguen entre medio se
+    descartan.
+    """
+    def __init__(self, host, port, username, password, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._buffer = ""
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._buffer = ""
+        # Saludo: 'Asterisk Call Manager/x.y'
+        while "\r\n" not in self._buffer:
+            self._recv()
+        _, self._buffer = self._buffer.split("\r\n", 1)
+        respuesta = self.action("Login", Username=self.username, Secret=self.password, Events="off")
+        if respuesta.get("Response") != "Success":
+            raise AmiError(f"Login AMI rechazado: {respuesta.get('Message', respuesta)}")
+        return self
+
+    def _recv(self):
+        datos = self._sock.recv(4096)
+        if not datos:
+            raise AmiError("Conexión AMI cerrada por el servidor")
+        self._buffer += datos.decode(errors="ignore")
+
+    def _read_message(self):
+        while "\r\n\r\n" not in self._buffer:
+            self._recv()
+        bloque, self._buffer = self._buffer.split("\r\n\r\n", 1)
+        mensaje, salida = {}, []
+        for linea in bloque.replace("\r\n", "\n").split("\n"):
+            if linea.startswith("Output: "):
+                salida.append(linea[len("Output: "):])
+            elif ": " in linea and not salida:
+                k, v = linea.split(": ", 1)
+                mensaje[k.strip()] = v.strip()
+            elif linea and linea != "--END COMMAND--":
+                salida.append(linea)
+        if salida:
+            mensaje["Output"] = "\n".join(salida)
+        return mensaje
+
+    def action(self, name, **campos):
+        """
+        Envía una acción y espera su respuesta (dict de campos).
+        """
+        with self._lock:
+            action_id = f"hamna-{next(self._ids)}"
+            lineas = [f"Action: {name}", f"ActionID: {action_id}"]
+            lineas += [f"{k}: {v}" for k, v in campos.items()]
+            self._sock.sendall(("\r\n".join(lineas) + "\r\n\r\n").encode())
+            while True:
+                mensaje = self._read_message()
+                if mensaje.get("ActionID") == action_id:
+                    return mensaje
+
+    def command(self, comando):
+        """
+        Comando de la consola de Asterisk ('rpt localplay 1999 archivo').
+        """
+        respuesta = self.action("Command", Command=comando)
+        if respuesta.get("Response") == "Error":
+            raise AmiError(f"{comando}: {respuesta.get('Message', 'error')}")
+        return respuesta.get("Output", "")
+
+    def close(self):
+        if self._sock is None:
+            return
+        try:
+            self.action("Logoff")
+        except (OSError, AmiError):
+            pass
+        self._sock.close()
+        self._sock = None
+
+
+class AllStarPlayer:
+    """
+    Reproduce el plan del boletín en un nodo AllStar. 'directorio' es donde
+    HAMNA escribe los audios y 'directorio_nodo' cómo los ve Asterisk (el
+    mismo si HAMNA corre en el nodo, o la ruta de un directorio compartido).
+    """
+    def __init__(self, ami, nodo, directorio, directorio_nodo=None, comando="localplay", lead=0.5, margen=1.0):
+        self.ami = ami
+        self.nodo = nodo
+        self.directorio = directorio
+        self.directorio_nodo = directorio_nodo or directorio
+        self.comando = comando
+        self.lead = lead          # silencio inicial de cada transmisión (s)
+        self.margen = margen      # espera extra tras cada reproducción (s)
+        self._detener = threading.Event()
+        os.makedirs(directorio, exist_ok=True)
+
+    def render(self, eventos, cache, fmt, mixer=None):
+        """
+        Pre-renderiza cada transmisión a un archivo. El silencio inicial
+        (antes era la espera tras levantar el PTT) se recorta a 'lead'.
+        """
+        salida = []
+        for i, tx in enumerate(transmissions(eventos), start=1):
+            cuerpo = list(tx["eventos"])
+            while cuerpo and cuerpo[0]["tipo"] == "silencio":
+                cuerpo.pop(0)
+            if self.lead:
+                cuerpo.insert(0, {"tipo": "silencio", "duracion": self.lead})
+            nombre = f"hamna_{i:03d}"
+            ruta = os.path.join(self.directorio, f"{nombre}.{fmt['ext']}")
+            _, duracion = render_timeline(cuerpo, ruta, cache, fmt=fmt, mixer=mixer)
+            salida.append({"nombre": tx["nombre"] or nombre, "archivo": nombre,
+                           "duracion": duracion, "espera": tx["espera"]})
+        return salida
+
+    def play(self, archivo):
+        # Asterisk recibe la ruta sin extensión y elige el formato
+        ruta = os.path.join(self.directorio_nodo, archivo).replace("\\", "/")
+        return self.ami.command(f"rpt {self.comando} {self.nodo} {ruta}")
+
+    def stop(self):
+        """
+        Vacía la cola de telemetría/reproducción del nodo (COP 24).
+        """
+        return self.ami.command(f"rpt cmd {self.nodo} cop 24")
+
+    def detener(self):
+        """
+        Pide que run() termine en la próxima espera. No usa AMI: se puede
+        llamar desde un manejador de señal aunque haya una acción en curso.
+        """
+        self._detener.set()
+
+    @property
+    def detenido(self):
+        return self._detener.is_set()
+
+    def run(self, transmisiones, cos=None, cos_poll=2):
+        """
+        Reproduce las transmisiones en orden. Antes de cada una espera a que
+        el canal esté libre si se da 'cos' (dict con la clave 'COS').
+        Devuelve False si se interrumpió con detener().
+        """
+        total = len(transmisiones)
+        for i, tx in enumerate(transmisiones, start=1):
+            while cos is not None and cos["COS"] and not self.detenido:
+                print("COS activo, esperando...")
+                self._detener.wait(cos_poll)
+            if self.detenido:
+                return False
+            print(f"Transmisión {i}/{total}: '{tx['nombre']}' ({tx['duracion']:.1f} s) en el nodo {self.nodo}")
+            self.play(tx["archivo"])
+            if self._detener.wait(tx["duracion"] + self.margen + (tx["espera"] or 0)):
+                return False
+        return True
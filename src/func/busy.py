@@ -0,0 +1,123 @@
+import threading
+import time
+from src.func.cat import CatSession, CatError
+from src.func.journal import journal
+from src.func.ptt import LatencyStats, open_serial
+
+# Detector de canal ocupado por CAT (S-meter SM0; y BY;) para estaciones con
+# radio propio, alternativo al COS por AMI (RPT_RXKEYED) del hub AllStar.
+# Expone la misma interfaz que el monitor de COS de cor.py: un dict con la
+# llave "COS" que el reproductor consulta.
+
+
+class CatBusyDetector:
+    """
+    Consulta SM0;/BY; cada 'interval' segundos, suaviza el S-meter con una
+    media exponencial y aplica histéresis:
+      - ocupado cuando BY=1 o la lectura suavizada >= umbral_on
+      - libre cuando BY=0 y la lectura suavizada < umbral_off durante 'hold' s
+    """
+    def __init__(self, cat, interval=0.2, threshold_on=5, threshold_off=3, alpha=0.5, hold=1.0):
+        self.cat = cat
+        self.interval = interval
+        self.threshold_on = threshold_on
+        self.threshold_off = threshold_off
+        self.alpha = alpha
+        self.hold = hold
+        self.commands = ["SM0;", "BY;"]
+
+        self.shared_dict = {"COS": False}
+        self.level = 0.0
+        self.poll_cost = LatencyStats()         # costo de cada consulta SM0;/BY;
+        self.detect_latency = LatencyStats()    # primera señal cruda -> COS activo
+        self.errors = 0
+
+        self._stop = threading.Event()
+        self._raw_since = None
+        self._quiet_since = None
+        self._thread = threading.Thread(target=self._run, name="CatBusyDetector", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    # Para detenerlo igual que el Process del monitor AMI en cor.py
+    terminate = stop
+
+    def is_busy(self):
+        return self.shared_dict["COS"]
+
+    def _set(self, busy):
+        self.shared_dict["COS"] = busy
+        journal().log("cos", fuente="cat", ocupado=busy, nivel=round(self.level, 1))
+
+    def update(self, smeter, by, now):
+        """
+        Aplica una lectura al estado del detector. Separado de _run para poder
+        alimentarlo con lecturas de otra fuente (p. ej. RadioPoller).
+        """
+        self.level = self.alpha * smeter + (1 - self.alpha) * self.level
+        raw_busy = by or smeter >= self.threshold_on
+        if raw_busy and self._raw_since is None:
+            self._raw_since = now
+
+        if not self.shared_dict["COS"]:
+            if by or self.level >= self.threshold_on:
+                self.detect_latency.add(now - (self._raw_since or now))
+                self._quiet_since = None
+                self._set(True)
+        elif not by and self.level < self.threshold_off:
+            if self._quiet_since is None:
+                self._quiet_since = now
+            if now - self._quiet_since >= self.hold:
+                self._raw_since = None
+                self._set(False)
+        else:
+            self._quiet_since = None
+
+        if not raw_busy and not self.shared_dict["COS"]:
+            self._raw_since = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            inicio = time.monotonic()
+            try:
+                r = self.cat.query(*self.commands)
+                self.poll_cost.add(time.monotonic() - inicio)
+                self.update(r["SM"], r.get("BY", False), time.monotonic())
+            except CatError as e:
+                # Sin BY; (radio que no lo reconoce) se decide solo por el S-meter
+                self.commands = [c for c in self.commands if c not in e.unsupported]
+                self.errors += 1
+            except ValueError:
+                self.errors += 1
+            self._stop.wait(max(self.interval - (time.monotonic() - inicio), 0))
+
+    def report(self):
+        return (f"Detector CAT: sondeo cada {self.interval * 1000:.0f} ms, "
+                f"costo {self.poll_cost}; latencia de detección {self.detect_latency}; "
+                f"errores {self.errors}")
+
+
+def start_cat_busy_detector(cfg, ser=None, cat=None):
+    """
+    Arranca el detector con la sección 'cos' de cfg.yml. Devuelve
+    (shared_dict, detector) igual que start_cos_monitor en cor.py. Si el
+    PTT ya usa el puerto por CAT, se pasa su sesión en 'cat': las consultas
+    y el TX;/RX; se serializan con su candado en un solo dueño del puerto.
+    """
+    if cat is None:
+        cat = CatSession(ser or open_serial(cfg["puerto"], cfg.get("baudrate", 9600)))
+    detector = CatBusyDetector(
+        cat,
+        interval=cfg.get("intervalo", 0.2),
+        threshold_on=cfg.get("umbral_on", 5),
+        threshold_off=cfg.get("umbral_off", 3),
+        alpha=cfg.get("suavizado", 0.5),
+        hold=cfg.get("retencion", 1.0),
+    ).start()
+    return detector.shared_dict, detector
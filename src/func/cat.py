@@ -0,0 +1,324 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+# Protocolo CAT de Kenwood (TS-2000): comandos ASCII terminados en ';'.
+# Los comandos de consulta (FA;, MD;, SM0;) responden con el mismo prefijo;
+# los de ajuste (FA00014520000;) no responden salvo error ('?;', 'E;', 'O;').
+
+MODES = {
+    '1': 'LSB',
+    '2': 'USB',
+    '3': 'CW',
+    '4': 'FM',
+    '5': 'AM',
+    '6': 'FSK',
+    '7': 'CW-R',
+    '8': 'FSK-R'
+}
+
+# Respuestas de error del radio
+CAT_ERRORS = {"?": "comando no reconocido", "E": "error de comunicación", "O": "desbordamiento de buffer"}
+
+# Escala del S-meter del TS-2000 (SM0): 0-30, S9 en 15 y S9+60 dB en 30
+SMETER_S9 = 15
+SMETER_MAX = 30
+
+
+class CatError(Exception):
+    """
+    Error o falta de respuesta del radio a un comando CAT. 'unsupported'
+    lista las consultas que el radio respondió con '?;'.
+    """
+    def __init__(self, message, unsupported=()):
+        super().__init__(message)
+        self.unsupported = list(unsupported)
+
+
+@dataclass
+class RadioStatus:
+    freq_hz: int
+    mode: str
+    smeter: int
+    busy: bool = None
+    timestamp: float = 0.0
+
+    @property
+    def freq_mhz(self):
+        return self.freq_hz / 1_000_000
+
+    @property
+    def s_units(self):
+        return smeter_to_s_units(self.smeter)
+
+
+def smeter_to_s_units(value):
+    """
+    Convierte la lectura 0-30 del S-meter a unidades S (0-9) y dB sobre S9.
+    """
+    if value <= SMETER_S9:
+        return round(value * 9 / SMETER_S9), 0
+    return 9, round((value - SMETER_S9) * 60 / (SMETER_MAX - SMETER_S9))
+
+
+def smeter_display(value):
+    s_units, over = smeter_to_s_units(value)
+    sm_str = f"S9+{over}dB" if over else f"S{s_units}"
+    bar = f"[{'#' * s_units}{'-' * (9 - s_units)}]"
+    return f"{sm_str}  {bar} (SM={value})"
+
+
+def parse_response(raw):
+    """
+    Convierte una respuesta CAT (sin ';') en (prefijo, valor tipado).
+    """
+    prefix, body = raw[:2], raw[2:]
+    if raw in CAT_ERRORS:
+        raise CatError(f"Respuesta '{raw};': {CAT_ERRORS[raw]}")
+    if prefix in ("FA", "FB"):
+        return prefix, int(body)
+    if prefix == "MD":
+        return prefix, MODES.get(body, "Desconocido")
+    if prefix == "SM":
+        # SM P1 P2P2P2P2: P1 = receptor (0 principal), P2 = lectura 0-30
+        return prefix, int(body[1:])
+    if prefix == "RM":
+        # RM P1 P2P2P2P2: P1 = medidor (1 SWR, 2 COMP, 3 ALC), P2 = lectura
+        return prefix, (int(body[:1] or 0), int(body[1:] or 0))
+    if prefix == "BY":
+        # BY P1 [P2]: ocupado en receptor principal [y secundario]
+        return prefix, body[:1] == "1"
+    return prefix, body
+
+
+class CatSession:
+    """
+    Sesión CAT sobre un puerto serie ya abierto. Lee hasta el terminador ';'
+    con timeout en lugar de dormir un tiempo fijo, y permite enviar varias
+    consultas en una sola escritura. Cada comando con su respuesta se hace
+    bajo un candado: varios hilos pueden usar la misma sesión (PTT y
+    detector de ocupado) sin intercalar escrituras ni robarse respuestas.
+    """
+    def __init__(self, ser, timeout=0.5):
+        self.ser = ser
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        # Respuestas no solicitadas (modo AI) recibidas mientras se esperaba otra
+        self.unsolicited = deque(maxlen=100)
+
+    def send(self, command):
+        """
+        Escribe un comando sin esperar respuesta (comandos de ajuste).
+        """
+        if not command.endswith(';'):
+            command += ';'
+        with self._lock:
+            self.ser.write(command.encode())
+            self.ser.flush()
+
+    def read_response(self, timeout=None):
+        """
+        Lee una respuesta completa (hasta ';'). Devuelve la respuesta sin el
+        terminador, o None si se agotó el tiempo.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        # Cambiar el timeout reconfigura el puerto; solo si es distinto
+        if self.ser.timeout != timeout:
+            self.ser.timeout = timeout
+        data = self.ser.read_until(b";")
+        if not data.endswith(b";"):
+            return None
+        return data[:-1].decode(errors="ignore").strip()
+
+    def transact(self, command, timeout=None):
+        """
+        Envía un comando y devuelve su respuesta cruda (con ';'), o cadena
+        vacía si el radio no respondió. Útil para comandos manuales.
+        """
+        with self._lock:
+            self.send(command)
+            prefix = command[:2]
+            # Timeout fijo por lectura (el puerto se reconfigura a lo sumo una
+            # vez) y un plazo total para la transacción
+            espera = self.timeout if timeout is None else timeout
+            limite = time.monotonic() + espera
+            while True:
+                raw = self.read_response(espera) if time.monotonic() < limite else None
+                if raw is None:
+                    return ""
+                if raw.startswith(prefix) or raw in CAT_ERRORS:
+                    return f"{raw};"
+                # Auto-información que llegó antes de la respuesta
+                try:
+                    self.unsolicited.append(parse_response(raw))
+                except (CatError, ValueError):
+                    pass
+
+    def query(self, *commands):
+        """
+        Envía varias consultas en una sola escritura ('FA;MD;SM0;') y devuelve
+        un dict prefijo -> valor tipado. Las respuestas de otros prefijos
+        (auto-información) se guardan en self.unsolicited. Si el radio no
+        reconoce alguna, se leen las demás y se lanza CatError con ellas en
+        'unsupported'.
+        """
+        commands = [c if c.endswith(';') else c + ';' for c in commands]
+        pendientes = [c[:2] for c in commands]
+        por_prefijo = {c[:2]: c for c in commands}
+        resultados, no_soportados = {}, []
+        with self._lock:
+            self.ser.write("".join(commands).encode())
+            self.ser.flush()
+            limite = time.monotonic() + self.timeout * len(commands)
+            while pendientes:
+                raw = self.read_response() if time.monotonic() < limite else None
+                if raw is None:
+                    raise CatError(f"Sin respuesta del radio a {', '.join(p + ';' for p in pendientes)}")
+                if raw == "?":
+                    # '?;' no trae prefijo; el radio responde en orden, así que
+                    # corresponde a la primera consulta pendiente
+                    no_soportados.append(por_prefijo[pendientes.pop(0)])
+                    continue
+                prefix, valor = parse_response(raw)
+                if prefix in pendientes:
+                    pendientes.remove(prefix)
+                    resultados[prefix] = valor
+                else:
+                    self.unsolicited.append((prefix, valor))
+        if no_soportados:
+            raise CatError(f"El radio no reconoce {', '.join(no_soportados)}", unsupported=no_soportados)
+        return resultados
+
+    def read_status(self):
+        """
+        Frecuencia, modo y S-meter en una sola transacción.
+        """
+        r = self.query("FA;", "MD;", "SM0;")
+        return RadioStatus(freq_hz=r["FA"], mode=r["MD"], smeter=r["SM"], timestamp=time.time())
+
+    def set_frequency(self, freq_hz):
+        self.send(f"FA{int(freq_hz):011d};")
+
+    def set_mode(self, mode_code):
+        self.send(f"MD{mode_code};")
+
+
+class RadioPoller:
+    """
+    Hilo dueño del puerto CAT. Consulta frecuencia, modo, S-meter y ocupado
+    cada 'interval' segundos y publica una instantánea protegida por candado
+    más un historial circular. Los comandos de otros hilos (la UI) se encolan
+    con submit() y los ejecuta este mismo hilo, así nunca chocan en el puerto.
+    Las consultas que el radio no reconoce ('?;') se dejan de enviar.
+    """
+    POLL_COMMANDS = ("FA;", "MD;", "SM0;", "BY;")
+
+    def __init__(self, cat, interval=0.5, history=600, auto_info=True):
+        self.cat = cat
+        self.interval = interval
+        self.auto_info = auto_info
+        self.ai_active = False
+        self.history = deque(maxlen=history)
+        self.errors = 0
+        self.last_error = None
+        self.unsupported = set()
+        self._status = None
+        self._lock = threading.Lock()
+        self._commands = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="RadioPoller", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._commands.put(None)  # Despierta al hilo si está esperando
+        self._thread.join(timeout=2)
+
+    def snapshot(self):
+        """
+        Última lectura del radio (RadioStatus) o None si aún no hay ninguna.
+        """
+        with self._lock:
+            return self._status
+
+    def get_history(self):
+        with self._lock:
+            return list(self.history)
+
+    def submit(self, command, response=False):
+        """
+        Encola un comando CAT para el hilo dueño del puerto. Devuelve un
+        Future con la respuesta cruda (o None si response=False).
+        """
+        future = Future()
+        self._commands.put((command, response, future))
+        return future
+
+    def _enable_auto_info(self):
+        """
+        Activa AI2 (el radio informa cambios de FA/MD sin consultarlo).
+        Si el radio no lo soporta se sigue consultando todo.
+        """
+        try:
+            self.cat.send("AI2;")
+            self.ai_active = self.cat.query("AI;").get("AI") == "2"
+        except CatError:
+            self.ai_active = False
+
+    def _run_commands(self, deadline):
+        while True:
+            restante = deadline - time.monotonic()
+            try:
+                item = self._commands.get(timeout=max(restante, 0)) if restante > 0 else self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                return
+            command, response, future = item
+            try:
+                future.set_result(self.cat.transact(command) if response else self.cat.send(command))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _poll(self, previous):
+        comandos = self.POLL_COMMANDS
+        if self.ai_active and previous is not None:
+            # FA/MD llegan por auto-información; solo se consultan S-meter y ocupado
+            comandos = ("SM0;", "BY;")
+        comandos = [c for c in comandos if c not in self.unsupported]
+        try:
+            r = self.cat.query(*comandos)
+        except CatError as e:
+            self.unsupported.update(e.unsupported)
+            raise
+        freq, mode, smeter = (previous.freq_hz, previous.mode, previous.smeter) if previous else (None, None, 0)
+        freq = r.get("FA", freq)
+        mode = r.get("MD", mode)
+        while self.cat.unsolicited:
+            prefix, valor = self.cat.unsolicited.popleft()
+            if prefix == "FA":
+                freq = valor
+            elif prefix == "MD":
+                mode = valor
+        return RadioStatus(freq_hz=freq, mode=mode, smeter=r.get("SM", smeter), busy=r.get("BY"), timestamp=time.time())
+
+    def _run(self):
+        if self.auto_info:
+            self._enable_auto_info()
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.interval
+            try:
+                status = self._poll(self._status)
+                with self._lock:
+                    self._status = status
+                    self.history.append(status)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            self._run_commands(deadline)
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+import time
+
+# Punto de control del boletín en curso: qué fase (entrada, sección o salida),
+# qué sección y en qué segundo del archivo retomar, más las rutas de los
+# mensajes ya generados. Se escribe en cada frontera de pausa a un temporal
+# que se renombra, así un corte de luz deja el archivo anterior o el nuevo,
+# nunca uno a medias. cor.py --resume lo usa para continuar sin repetir TTS.
+
+CHECKPOINT_FILE = ".hamna_checkpoint.json"
+
+
+def sections_hash(config):
+    """
+    Huella de las secciones y duraciones: si cambian, el punto de control ya
+    no corresponde al boletín configurado.
+    """
+    datos = json.dumps([config["secciones"], config["duraciones"]], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(datos.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def save_checkpoint(estado, path=CHECKPOINT_FILE):
+    estado = dict(estado, actualizado=time.time())
+    temporal = f"{path}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, path)
+
+
+def load_checkpoint(config, path=CHECKPOINT_FILE):
+    """
+    Punto de control válido para esta configuración, o None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Punto de control ilegible ({e}); se inicia desde el principio.")
+        return None
+    if estado.get("huella") != sections_hash(config):
+        print("Las secciones cambiaron desde el punto de control; se inicia desde el principio.")
+        return None
+    return estado
+
+
+def clear_checkpoint(path=CHECKPOINT_FILE):
+    if os.path.exists(path):
+        os.remove(path)
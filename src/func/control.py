@@ -0,0 +1,227 @@
+import argparse
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from src.func.journal import journal
+
+# Canal de control del boletín en curso: una API HTTP local (por defecto en
+# 127.0.0.1:8765) para pausar ya, saltar la sección, alargar la pausa, ir a
+# otra sección o terminar el boletín con el PTT apagado. Los handlers solo
+# anotan la orden bajo un candado y despiertan al reproductor; quien la
+# aplica es el propio bucle de cor.py en su siguiente tic (a lo más 1 s), así
+# nada bloquea el audio y varias órdenes iguales de distintos operadores se
+# combinan en una sola.
+#   curl -X POST localhost:8765/saltar
+#   python -m src.func.control extender 30
+
+COMMANDS = ("pausa", "saltar", "extender", "ir", "abortar")
+DEFAULT_PORT = 8765
+# Tope de 'extender' pendiente (s): la pausa no se alarga más de esto por orden
+MAX_EXTENSION = 600
+
+# Valor de cada orden cuando no hay nada pendiente
+_VACIO = {"pausa": False, "saltar": False, "extender": 0.0, "ir": None, "abortar": False}
+
+
+class Control:
+    def __init__(self, secciones=(), abortar=None, max_extension=MAX_EXTENSION):
+        self.secciones = list(secciones)
+        self.abortar = abortar
+        self.max_extension = max_extension
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+        self._pendientes = dict(_VACIO)
+        # Estado que publica el reproductor (lo leen /estado y el panel)
+        self._estado = {"fase": "inicio", "seccion": None, "total": len(self.secciones), "nombre": None,
+                        "posicion": None}
+
+    def request(self, orden, valor=None):
+        """
+        Anota una orden (la aplica el reproductor en su siguiente tic).
+        'extender' acumula segundos (hasta max_extension); 'ir' recibe el número (desde 1) o el
+        nombre de la sección. Retorna lo que quedó pendiente.
+        """
+        if orden not in COMMANDS:
+            raise ValueError(f"Orden desconocida: {orden}")
+        with self._lock:
+            if orden == "extender":
+                if valor is None:
+                    raise ValueError("'extender' requiere los segundos")
+                segundos = float(valor)
+                if not math.isfinite(segundos) or segundos <= 0:
+                    raise ValueError("'extender' requiere segundos positivos")
+                self._pendientes["extender"] = min(self._pendientes["extender"] + segundos, self.max_extension)
+            elif orden == "ir":
+                self._pendientes["ir"] = self.section_index(valor)
+            else:
+                self._pendientes[orden] = True
+            pendientes = self._pending_view()
+        self._aviso.set()
+        return pendientes
+
+    def _pending_view(self):
+        return {k: v for k, v in self._pendientes.items() if v != _VACIO[k]}
+
+    def section_index(self, valor):
+        if valor is None:
+            raise ValueError("'ir' requiere la sección (número o nombre)")
+        valor = str(valor)
+        if valor in self.secciones:
+            return self.secciones.index(valor)
+        if valor.isdigit() and 1 <= int(valor) <= len(self.secciones):
+            return int(valor) - 1
+        raise ValueError(f"Sección no encontrada: {valor}")
+
+    def pending(self, orden):
+        with self._lock:
+            return self._pendientes[orden] != _VACIO[orden]
+
+    def take(self, orden):
+        """
+        Retorna el valor pendiente de la orden y la limpia.
+        """
+        with self._lock:
+            valor = self._pendientes[orden]
+            self._pendientes[orden] = _VACIO[orden]
+            return valor
+
+    def sleep(self, segundos, interrumpir=()):
+        """
+        Espera como time.sleep pero despierta en cuanto llega una de las
+        órdenes de 'interrumpir' (retorna su nombre; None si se cumplió el
+        tiempo). 'abortar' se atiende en cualquier espera.
+        """
+        fin = time.monotonic() + segundos
+        while True:
+            if self.pending("abortar"):
+                self.take("abortar")
+                if self.abortar is not None:
+                    self.abortar()
+            for orden in interrumpir:
+                if self.pending(orden):
+                    return orden
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                return None
+            self._aviso.wait(restante)
+            self._aviso.clear()
+
+    def update(self, **campos):
+        with self._lock:
+            self._estado.update(campos)
+
+    def status(self):
+        with self._lock:
+            return {**self._estado, "pendientes": self._pending_view()}
+
+    def close(self):
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path.strip("/") == "estado":
+            self.reply(200, self.server.control.status())
+        else:
+            self.reply(404, {"error": "Ruta no encontrada"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        orden = url.path.strip("/")
+        parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo:
+            try:
+                cuerpo = json.loads(self.rfile.read(largo))
+            except ValueError:
+                return self.reply(400, {"error": "Cuerpo JSON inválido"})
+            if not isinstance(cuerpo, dict):
+                return self.reply(400, {"error": "El cuerpo JSON debe ser un objeto"})
+            parametros.update(cuerpo)
+        if orden not in COMMANDS:
+            return self.reply(404, {"error": f"Orden desconocida: {orden}"})
+        valor = parametros.get("segundos") if orden == "extender" else parametros.get("seccion")
+        try:
+            pendientes = self.server.control.request(orden, valor)
+        except (TypeError, ValueError) as e:
+            return self.reply(400, {"error": str(e)})
+        journal().log("control_orden", orden=orden, valor=valor, origen=self.client_address[0])
+        self.reply(202, {"aceptada": orden, "pendientes": pendientes})
+
+    def reply(self, codigo, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ControlServer(Control):
+    """
+    Control con su API HTTP en un hilo aparte.
+    """
+    def __init__(self, secciones=(), abortar=None, host="127.0.0.1", port=DEFAULT_PORT,
+                 max_extension=MAX_EXTENSION):
+        super().__init__(secciones, abortar, max_extension)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.control = self
+        self.host, self.port = self.httpd.server_address[:2]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_control(config, abortar=None):
+    """
+    Canal de control según la sección 'control' de cfg.yml. Sin API (no
+    habilitado o puerto ocupado) es un Control local: las esperas se
+    comportan como time.sleep y el estado sigue disponible para el panel.
+    """
+    cfg = config.get("control") or {}
+    secciones = [s["nombre"] for s in config["secciones"]]
+    maximo = float(cfg.get("extension_maxima", MAX_EXTENSION))
+    if not cfg.get("habilitado", False):
+        return Control(secciones, abortar, maximo)
+    try:
+        control = ControlServer(secciones, abortar, cfg.get("host", "127.0.0.1"), int(cfg.get("puerto", DEFAULT_PORT)),
+                                maximo)
+    except OSError as e:
+        print(f"No se pudo abrir el canal de control ({e}); se continúa sin él.")
+        return Control(secciones, abortar, maximo)
+    print(f"Canal de control en http://{control.host}:{control.port}/ ({', '.join(COMMANDS)})")
+    return control
+
+
+if __name__ == "__main__":
+    # Cliente: python -m src.func.control {pausa|saltar|abortar|estado}
+    #          python -m src.func.control extender 30 / ir 3 / ir Editorial
+    parser = argparse.ArgumentParser(description="Control del boletín en curso")
+    parser.add_argument("orden", choices=[*COMMANDS, "estado"])
+    parser.add_argument("valor", nargs="?", help="Segundos para 'extender', sección para 'ir'")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    args = parser.parse_args()
+    if args.orden == "estado":
+        peticion = urllib.request.Request(f"{args.url}/estado")
+    else:
+        clave = "segundos" if args.orden == "extender" else "seccion"
+        cuerpo = json.dumps({clave: args.valor} if args.valor is not None else {}).encode("utf-8")
+        peticion = urllib.request.Request(f"{args.url}/{args.orden}", data=cuerpo, method="POST",
+                                          headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(peticion, timeout=5) as r:
+            print(r.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        raise SystemExit(e.read().decode("utf-8"))
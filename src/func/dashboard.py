@@ -0,0 +1,237 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Panel de estado del boletín servido por el propio cor.py (solo lectura):
+# sección actual, posición, próxima pausa, PTT, COS por nodo y desfase contra
+# lo planeado. Un solo hilo arma el estado a una frecuencia fija, lo
+# serializa una vez y el mismo frame de Server-Sent Events se envía a todos
+# los que estén viendo, así diez o cincuenta espectadores cuestan lo mismo
+# que uno. Sin espectadores no se arma nada.
+#   http://<equipo>:8080/          panel
+#   http://<equipo>:8080/eventos   flujo SSE (un JSON por cambio)
+#   http://<equipo>:8080/estado    JSON puntual
+
+DEFAULT_HOST = "127.0.0.1"   # solo este equipo; "0.0.0.0" para la red local
+DEFAULT_PORT = 8080
+KEEPALIVE = 15          # comentario SSE si no hay cambios en este tiempo (s)
+MAX_VIEWERS = 200
+
+
+def snapshot(control, cos=None, driver=None):
+    """
+    Estado para el panel a partir del canal de control, el dict de COS y el
+    controlador de PTT. Solo valores enteros o redondeados, para que un
+    estado sin cambios produzca el mismo JSON.
+    """
+    estado = control.status()
+    inicio = estado.pop("seccion_t0", None)
+    estado["transcurrido"] = round(time.time() - inicio) if inicio and estado["fase"] in ("seccion", "pausa") else None
+    estado["ptt"] = bool(driver.state) if driver is not None else None
+    if cos is not None:
+        estado["cos"] = bool(cos.get("COS", False))
+        estado["nodos"] = dict(cos.get("nodos", {}))
+    return estado
+
+
+class Dashboard:
+    def __init__(self, fuente, host=DEFAULT_HOST, port=DEFAULT_PORT, frecuencia=2.0):
+        self.fuente = fuente
+        self.intervalo = 1.0 / frecuencia
+        self.viewers = 0
+        self._cond = threading.Condition()
+        self._frame = b""
+        self._seq = 0
+        self._stop = threading.Event()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.dashboard = self
+        self.host, self.port = self.httpd.server_address[:2]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        threading.Thread(target=self._producer, daemon=True).start()
+
+    def _producer(self):
+        anterior = None
+        while not self._stop.wait(self.intervalo):
+            if not self.viewers:
+                anterior = None
+                continue
+            try:
+                datos = json.dumps(self.fuente(), ensure_ascii=False, separators=(",", ":"))
+            except Exception as e:
+                # El monitor de COS pudo terminar; se reintenta en el siguiente tic
+                print(f"[panel] No se pudo leer el estado: {e}")
+                continue
+            if datos == anterior:
+                continue
+            anterior = datos
+            frame = f"data: {datos}\n\n".encode("utf-8")
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._cond.notify_all()
+
+    def next_frame(self, visto, timeout=KEEPALIVE):
+        """
+        Espera un frame más nuevo que 'visto'. Retorna (seq, frame); frame
+        es None si venció el tiempo sin cambios.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != visto or self._stop.is_set(), timeout)
+            if self._seq == visto:
+                return visto, None
+            return self._seq, self._frame
+
+    def _join(self):
+        with self._cond:
+            if self.viewers >= MAX_VIEWERS:
+                return False
+            self.viewers += 1
+            return True
+
+    def _leave(self):
+        with self._cond:
+            self.viewers -= 1
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        ruta = urlparse(self.path).path.rstrip("/")
+        panel = self.server.dashboard
+        if ruta == "":
+            self.send_body(200, PAGE.encode("utf-8"), "text/html; charset=utf-8")
+        elif ruta == "/estado":
+            self.send_body(200, json.dumps(panel.fuente(), ensure_ascii=False).encode("utf-8"),
+                           "application/json; charset=utf-8")
+        elif ruta == "/eventos":
+            self.stream(panel)
+        else:
+            self.send_body(404, b"No encontrado", "text/plain; charset=utf-8")
+
+    def stream(self, panel):
+        if not panel._join():
+            return self.send_body(503, b"Demasiados espectadores", "text/plain; charset=utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            # Se empieza con el último frame (si hay otros viendo, ya está al día)
+            visto = None if panel._frame else 0
+            while not panel._stop.is_set():
+                visto, frame = panel.next_frame(visto)
+                self.wfile.write(frame if frame is not None else b": \n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass
+        finally:
+            panel._leave()
+
+    def send_body(self, codigo, cuerpo, tipo):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def start_dashboard(config, fuente):
+    """
+    Panel según la sección 'panel' de cfg.yml (None si está desactivado o
+    el puerto está ocupado).
+    """
+    cfg = config.get("panel") or {}
+    if not cfg.get("habilitado", False):
+        return None
+    try:
+        panel = Dashboard(fuente, cfg.get("host", DEFAULT_HOST), int(cfg.get("puerto", DEFAULT_PORT)),
+                          float(cfg.get("frecuencia", 2.0)))
+    except OSError as e:
+        print(f"No se pudo abrir el panel ({e}); se continúa sin él.")
+        return None
+    print(f"Panel de estado en http://{panel.host}:{panel.port}/")
+    return panel
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>HAMNA - Boletín en curso</title>
+<style>
+  body { font-family: system-ui, sans-serif; background: #111; color: #eee; margin: 0; padding: 1.5em; }
+  h1 { font-size: 1.2em; margin: 0 0 1em; color: #9cf; }
+  .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(14em, 1fr)); gap: 1em; }
+  .card { background: #1c1c1c; border-radius: 8px; padding: 1em; }
+  .label { font-size: .8em; color: #999; text-transform: uppercase; }
+  .value { font-size: 1.6em; margin-top: .2em; }
+  .bar { height: 8px; background: #333; border-radius: 4px; margin-top: .6em; }
+  .bar div { height: 100%; background: #4a9; border-radius: 4px; width: 0; }
+  .on { color: #f55; } .off { color: #5c5; } .na { color: #777; }
+  #conexion { font-size: .8em; color: #777; margin-top: 1.5em; }
+  ul { list-style: none; padding: 0; margin: .3em 0 0; }
+</style>
+</head>
+<body>
+<h1>HAMNA &middot; Amateur Radio Net Automation</h1>
+<div class="grid">
+  <div class="card"><div class="label">Sección</div><div class="value" id="seccion">-</div>
+    <div class="bar"><div id="progreso"></div></div></div>
+  <div class="card"><div class="label">Posición</div><div class="value" id="posicion">-</div></div>
+  <div class="card"><div class="label">Próxima pausa</div><div class="value" id="pausa">-</div></div>
+  <div class="card"><div class="label">PTT</div><div class="value" id="ptt">-</div></div>
+  <div class="card"><div class="label">COS</div><div class="value" id="cos">-</div><ul id="nodos"></ul></div>
+  <div class="card"><div class="label">Tiempo (real / plan)</div><div class="value" id="tiempo">-</div>
+    <div class="label" id="desfase"></div></div>
+</div>
+<div id="conexion">Conectando...</div>
+<script>
+const $ = id => document.getElementById(id);
+const hms = s => s == null ? "-" : new Date(s * 1000).toISOString().substr(11, 8);
+const estado = (el, v, si, no) => { el.textContent = v == null ? "-" : (v ? si : no);
+  el.className = "value " + (v == null ? "na" : (v ? "on" : "off")); };
+function pintar(e) {
+  const fases = {inicio: "Preparando", entrada: "Mensaje de entrada", salida: "Mensaje de salida", fin: "Boletín terminado"};
+  $("seccion").textContent = e.nombre ? `${e.seccion}/${e.total} ${e.nombre}` + (e.fase === "pausa" ? " (pausa)" : "")
+                                      : (fases[e.fase] || e.fase);
+  const avance = e.posicion != null && e.fin > e.inicio ? (e.posicion - e.inicio) / (e.fin - e.inicio) : 0;
+  $("progreso").style.width = (100 * avance).toFixed(1) + "%";
+  $("posicion").textContent = e.posicion != null ? `${hms(e.posicion)} / ${hms(e.fin)}` : "-";
+  $("pausa").textContent = e.fase === "pausa" ? "en pausa" : (e.proxima_pausa != null ? `en ${e.proxima_pausa} s` : "-");
+  estado($("ptt"), e.ptt, "AL AIRE", "libre");
+  estado($("cos"), e.cos, "OCUPADO", "libre");
+  // Los nombres de nodo vienen del AMI: como texto, nunca como HTML
+  $("nodos").replaceChildren(...Object.entries(e.nodos || {}).map(([n, v]) => {
+    const li = document.createElement("li");
+    li.className = v ? "on" : "off";
+    li.textContent = `Nodo ${n}: ${v ? "ocupado" : "libre"}`;
+    return li;
+  }));
+  $("tiempo").textContent = e.transcurrido != null ? `${hms(e.transcurrido)} / ${hms(e.planeado)}` : "-";
+  const partes = [];
+  if (e.retraso_pausa != null) partes.push(`retraso de la última pausa ${e.retraso_pausa.toFixed(1)} s`);
+  if (e.error_anterior != null) partes.push(`sección anterior ${e.error_anterior > 0 ? "+" : ""}${e.error_anterior.toFixed(1)} s`);
+  $("desfase").textContent = partes.join(" · ");
+}
+const fuente = new EventSource("eventos");
+fuente.onmessage = m => { pintar(JSON.parse(m.data)); $("conexion").textContent = "Actualizado " + new Date().toLocaleTimeString(); };
+fuente.onerror = () => { $("conexion").textContent = "Sin conexión con el reproductor, reintentando..."; };
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,162 @@
+import argparse
+import os
+import socketserver
+import threading
+import time
+
+# Servidor AMI falso para probar sin nodo AllStar: acepta Login/Logoff y
+# Command, guarda los comandos recibidos y, con 'rpt localplay/playback',
+# simula el transmisor del nodo enviando RPT_TXKEYED 1 y 0 a los clientes con
+# eventos activos durante lo que dura el archivo. key_rx() genera
+# RPT_RXKEYED para el monitor de COS de cor.py.
+#   python -m src.func.fake_ami --port 5038
+
+BANNER = "Asterisk Call Manager/5.0.1\r\n"
+# Bytes por segundo de los formatos de 8 kHz que reproduce app_rpt
+BYTES_PER_SECOND = {".ul": 8000, ".ulaw": 8000, ".wav": 16000}
+
+
+def parse_message(bloque):
+    mensaje = {}
+    for linea in bloque.split("\r\n"):
+        if ": " in linea:
+            k, v = linea.split(": ", 1)
+            mensaje[k.strip()] = v.strip()
+    return mensaje
+
+
+def sound_duration(ruta):
+    """
+    Duración del archivo que pidió el comando (la ruta llega sin extensión).
+    """
+    for ext, bps in BYTES_PER_SECOND.items():
+        if os.path.exists(ruta + ext):
+            return os.path.getsize(ruta + ext) / bps
+    return 0.0
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server.ami
+        self.events = False
+        self.lock = threading.Lock()
+        self.send_raw(BANNER)
+        buffer = ""
+        autenticado = False
+        while True:
+            datos = self.request.recv(4096)
+            if not datos:
+                break
+            buffer += datos.decode(errors="ignore")
+            while "\r\n\r\n" in buffer:
+                bloque, buffer = buffer.split("\r\n\r\n", 1)
+                msg = parse_message(bloque)
+                accion = msg.get("Action", "").lower()
+                aid = msg.get("ActionID", "")
+                if accion == "login":
+                    autenticado = (msg.get("Username"), msg.get("Secret")) == (server.username, server.password)
+                    if autenticado:
+                        self.events = msg.get("Events", "on").lower() != "off"
+                        server.clients.append(self)
+                        self.send(Response="Success", ActionID=aid, Message="Authentication accepted")
+                    else:
+                        self.send(Response="Error", ActionID=aid, Message="Authentication failed")
+                elif not autenticado:
+                    self.send(Response="Error", ActionID=aid, Message="Permission denied")
+                elif accion == "logoff":
+                    self.send(Response="Goodbye", ActionID=aid, Message="Thanks for all the fish.")
+                    return
+                elif accion == "command":
+                    salida = server.command(msg.get("Command", ""))
+                    self.send_raw(f"Response: Success\r\nActionID: {aid}\r\n"
+                                  + "".join(f"Output: {l}\r\n" for l in salida) + "\r\n")
+                else:
+                    self.send(Response="Error", ActionID=aid, Message="Invalid/unknown command")
+
+    def finish(self):
+        if self in self.server.ami.clients:
+            self.server.ami.clients.remove(self)
+
+    def send_raw(self, texto):
+        with self.lock:
+            try:
+                self.request.sendall(texto.encode())
+            except OSError:
+                pass
+
+    def send(self, **campos):
+        self.send_raw("".join(f"{k}: {v}\r\n" for k, v in campos.items()) + "\r\n")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeAmi:
+    def __init__(self, host="127.0.0.1", port=0, username="admin", password="secret", speed=1.0):
+        self.username = username
+        self.password = password
+        self.speed = speed          # >1 acelera la simulación del transmisor
+        self.clients = []
+        self.comandos = []
+        self.tx = False
+        self._server = _Server((host, port), _Handler)
+        self._server.ami = self
+        self.host, self.port = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def event(self, nombre, valor, nodo="1999"):
+        for c in list(self.clients):
+            if c.events:
+                c.send(Event=nombre, Node=nodo, EventValue=valor)
+
+    def key_rx(self, activo):
+        self.event("RPT_RXKEYED", "1" if activo else "0")
+
+    def command(self, comando):
+        self.comandos.append((time.time(), comando))
+        partes = comando.split()
+        if len(partes) >= 4 and partes[0] == "rpt" and partes[1] in ("localplay", "playback"):
+            duracion = sound_duration(partes[3]) / self.speed
+            threading.Thread(target=self._transmit, args=(partes[2], duracion), daemon=True).start()
+            return []
+        if partes[:2] == ["rpt", "cmd"]:
+            return []
+        return [f"No such command '{comando}'"]
+
+    def _transmit(self, nodo, duracion):
+        self.tx = True
+        self.event("RPT_TXKEYED", "1", nodo)
+        time.sleep(duracion)
+        self.tx = False
+        self.event("RPT_TXKEYED", "0", nodo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor AMI falso para pruebas de HAMNA")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5038)
+    parser.add_argument("--usuario", default="admin")
+    parser.add_argument("--password", default="secret")
+    args = parser.parse_args()
+    ami = FakeAmi(args.host, args.port, args.usuario, args.password).start()
+    print(f"AMI falso escuchando en {ami.host}:{ami.port}")
+    try:
+        while True:
+            linea = input("rx on | rx off | salir > ").strip()
+            if linea == "salir":
+                break
+            if linea in ("rx on", "rx off"):
+                ami.key_rx(linea == "rx on")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    ami.stop()
@@ -0,0 +1,88 @@
+# Formatos de audio por salida. Cada formato es un dict con la extensión,
+# frecuencia de muestreo, canales, códec de FFmpeg y bitrate (opcional):
+#   {"ext": "mp3", "sample_rate": 44100, "channels": 2, "codec": "libmp3lame", "bitrate": "192k"}
+# El remuestreo se hace una sola vez al generar el archivo (ingesta, TTS,
+# caché de PCM o exportación) y no en cada reproducción.
+
+PRESETS = {
+    # El de siempre: música y voz a calidad de CD
+    "mp3": {"ext": "mp3", "sample_rate": 44100, "channels": 2, "codec": "libmp3lame", "bitrate": "192k"},
+    # Voz para el enlace de radio (AllStar/IRLP van a 8 kHz mono)
+    "mp3_voz": {"ext": "mp3", "sample_rate": 16000, "channels": 1, "codec": "libmp3lame", "bitrate": "32k"},
+    "pcm8k": {"ext": "wav", "sample_rate": 8000, "channels": 1, "codec": "pcm_s16le", "bitrate": None},
+    "pcm16k": {"ext": "wav", "sample_rate": 16000, "channels": 1, "codec": "pcm_s16le", "bitrate": None},
+    "ulaw": {"ext": "ul", "sample_rate": 8000, "channels": 1, "codec": "pcm_mulaw", "bitrate": None},
+    "opus": {"ext": "opus", "sample_rate": 48000, "channels": 1, "codec": "libopus", "bitrate": "24k"},
+    "opus16k": {"ext": "opus", "sample_rate": 16000, "channels": 1, "codec": "libopus", "bitrate": "16k"},
+}
+
+# Formato de cada salida si cfg.yml no dice otra cosa (el comportamiento previo)
+DEFAULTS = {
+    "ingesta": "mp3",        # audios que deja download.py en media_path
+    "mensajes": "mp3",       # entrada/salida generadas por TTS
+    "reproduccion": "mp3",   # PCM de la caché (solo importan sample_rate y channels)
+    "exportacion": "mp3",    # cor.py --export
+    "allstar": "ulaw",       # audios que reproduce el nodo AllStar
+}
+
+# Opciones de FFmpeg por códec además del bitrate
+CODEC_OPTIONS = {
+    "libopus": ["-application", "voip"],
+}
+
+# Formatos crudos: FFmpeg necesita el muxer explícito
+RAW_MUXERS = {"ul": "mulaw", "pcm": "s16le"}
+
+
+def muxer(fmt):
+    """
+    Muxer de FFmpeg del formato, para escribir a una ruta cuya extensión no
+    lo indica (p. ej. un temporal '.part').
+    """
+    return RAW_MUXERS.get(fmt["ext"], fmt["ext"])
+
+
+def resolve_format(spec):
+    """
+    Formato a partir de un nombre de PRESETS o de un dict, que puede partir de
+    un preset ('base') y cambiar campos: {"base": "opus", "bitrate": "16k"}.
+    Acepta también las claves en español de cfg.yml ('canales', 'codec', ...).
+    """
+    if isinstance(spec, str):
+        if spec not in PRESETS:
+            raise ValueError(f"Formato desconocido: {spec} (usa {', '.join(PRESETS)})")
+        return dict(PRESETS[spec])
+    spec = dict(spec)
+    fmt = resolve_format(spec.pop("base", "mp3"))
+    alias = {"extension": "ext", "frecuencia": "sample_rate", "canales": "channels"}
+    for clave, valor in spec.items():
+        fmt[alias.get(clave, clave)] = valor
+    return fmt
+
+
+def output_format(config, salida):
+    """
+    Formato configurado para una salida ('ingesta', 'mensajes',
+    'reproduccion', 'exportacion', 'allstar') en la sección 'formatos' de cfg.yml.
+    """
+    formatos = (config or {}).get("formatos") or {}
+    return resolve_format(formatos.get(salida, DEFAULTS[salida]))
+
+
+def ffmpeg_args(fmt):
+    """
+    Opciones de salida de FFmpeg para el formato (remuestreo y códec).
+    """
+    args = ["-ar", str(fmt["sample_rate"]), "-ac", str(fmt["channels"]), "-c:a", fmt["codec"]]
+    if fmt.get("bitrate"):
+        args += ["-b:a", str(fmt["bitrate"])]
+    args += CODEC_OPTIONS.get(fmt["codec"], [])
+    if fmt["ext"] in RAW_MUXERS:
+        args += ["-f", RAW_MUXERS[fmt["ext"]]]
+    return args
+
+
+def describe(fmt):
+    bitrate = f" {fmt['bitrate']}" if fmt.get("bitrate") else ""
+    canales = "mono" if fmt["channels"] == 1 else f"{fmt['channels']} canales"
+    return f"{fmt['ext']} {fmt['sample_rate'] / 1000:g} kHz {canales}{bitrate}"
@@ -7,11 +7,21 @@ from mutagen import MutagenError
 import subprocess
 import os
 import socket
+from src.func.ptt import create_ptt_driver
+from src.func.media_index import MediaIndex
+from src.func.formats import PRESETS, ffmpeg_args
+from src.func.journal import journal
+from src.func.profiling import timed
 os.environ["PATH"] = r"C:\ffmpeg\bin;" + os.environ["PATH"]
 
 BASE_URL = "http://stn8422.ip.irlp.net"
 BASE_URL = "http://192.168.1.37"
 
+# Controlador de PTT activo (ver src/func/ptt.py y la sección 'ptt' de cfg.yml)
+_ptt_driver = None
+# Índice de medios de general.media_path (ver src/func/media_index.py)
+_media_index = None
+
 # Función para convertir segundos a formato hh:mm:ss
 def convert_seconds_to_hhmmss(seconds):
     return time.strftime('%H:%M:%S', time.gmtime(seconds))
@@ -35,29 +45,48 @@ def clear_screen():
     else:  # Para macOS y Linux
         _ = system('clear')
 
-# Función para consumir la API de PTT
+def get_ptt_driver(file_path="cfg.yml"):
+    """
+    Devuelve el controlador de PTT configurado, creándolo la primera vez.
+    Sin sección 'ptt' en cfg.yml se usa la API HTTP en BASE_URL.
+    """
+    global _ptt_driver
+    if _ptt_driver is None:
+        cfg = load_config(file_path).get("ptt") if os.path.exists(file_path) else None
+        _ptt_driver = create_ptt_driver(cfg, BASE_URL)
+    return _ptt_driver
+
+# Función para activar o soltar el PTT con el controlador configurado
+@timed("ptt")
 def ptt(action):
     if action not in ["on", "off"]:
         raise ValueError("La acción debe ser 'on' o 'off'.")
 
-    url = f"{BASE_URL}/ptt_{action}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        print(response.json())  # Muestra el mensaje de respuesta
-    else:
-        print(f"Error: {response.status_code}")
+    driver = get_ptt_driver()
+    respuesta = driver.on() if action == "on" else driver.off()
+    journal().log("ptt", estado=action, latencia=round(driver.latency.last, 4))
+    print(f"{respuesta} [{driver.name}: {driver.latency.last * 1000:.1f} ms]")
         
 #def file_duration(file):
 #    audio_info = MP3(file)
 #    total_duration = audio_info.info.length
 #    return total_duration
 
+def get_media_index(file_path="cfg.yml"):
+    """
+    Devuelve el índice de medios de general.media_path, abriéndolo la primera vez.
+    """
+    global _media_index
+    if _media_index is None:
+        media_path = load_config(file_path)["general"]["media_path"] if os.path.exists(file_path) else "./src/media/"
+        _media_index = MediaIndex(media_path)
+    return _media_index
+
+@timed("duracion (indice)")
 def file_duration(file):
     try:
-        # Asegúrate de que sea un archivo MP3 válido
-        audio_info = MP3(file)
-        total_duration = audio_info.info.length
-        return total_duration
+        # Del índice de medios: solo se lee el audio si el archivo cambió
+        return get_media_index().duration(file)
     except MutagenError as e:
         print(f"Error al procesar el archivo: {file}. Detalles: {e}")
         return 0  # Retorna 0 o lanza una excepción personalizada
@@ -65,8 +94,10 @@ def file_duration(file):
         print(f"Ocurrió un error inesperado: {e}")
         return 0
 
-def convert_to_valid_mp3(raw_file, mp3name, path):
-    # Ruta completa del archivo de salida
+@timed("conversion ffmpeg")
+def convert_to_valid_mp3(raw_file, mp3name, path, fmt=None):
+    # Ruta completa del archivo de salida. Con 'fmt' (ver formats.py) se
+    # codifica a ese formato; por defecto MP3 44.1 kHz estéreo a 192k.
     output_file = os.path.join(path, mp3name)
     
     # Verificar si el archivo ya existe y eliminarlo
@@ -77,7 +108,7 @@ def convert_to_valid_mp3(raw_file, mp3name, path):
     try:
         # Ejecutar FFmpeg para convertir el archivo
         subprocess.run(
-            ["ffmpeg", "-i", raw_file, "-vn", "-ar", "44100", "-ac", "2", "-b:a", "192k", output_file],
+            ["ffmpeg", "-i", raw_file, "-vn", *ffmpeg_args(fmt or PRESETS["mp3"]), output_file],
             check=True
         )
         print(f"Archivo convertido y guardado como: {output_file}")
@@ -120,6 +151,7 @@ def resume(file_yaml):
         )
     return "\n".join(resumen)
 
+@timed("resume_menu")
 def resume_menu(file_yaml):
 
     # Leer el archivo
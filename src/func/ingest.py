@@ -0,0 +1,197 @@
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.func.media_index import MediaIndex
+from src.func.formats import PRESETS, ffmpeg_args, muxer
+from src.func.profiling import timed
+
+# Ingesta de medios para el boletín: cada fuente (URL o archivo local) pasa por
+#   fetch -> decodificación -> normalización de volumen -> codificación
+# en un pool acotado de trabajadores, y el resultado queda en media_path junto
+# con un manifiesto (manifest.json) con la duración de cada archivo.
+
+MANIFEST_NAME = "manifest.json"
+
+# Formato de salida por defecto: el mismo que convert_to_valid_mp3
+DEFAULT_FORMAT = PRESETS["mp3"]
+
+# Normalización de sonoridad en una pasada (EBU R128)
+LOUDNORM = "loudnorm=I=-16:TP=-1.5:LRA=11"
+
+
+def ffmpeg_exe():
+    """
+    Ruta de FFmpeg: la empaquetada por imageio-ffmpeg si está instalada,
+    si no la del PATH.
+    """
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except ImportError:
+        return "ffmpeg"
+
+
+def is_url(source):
+    return re.match(r"^https?://", source) is not None
+
+
+def slugify(text):
+    """
+    Nombre de archivo seguro a partir de un título: sin acentos ni símbolos.
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^\w\s.-]", "", text).strip()
+    return re.sub(r"\s+", "_", text) or "audio"
+
+
+@timed("ingesta: descarga")
+def fetch(source, workdir):
+    """
+    Obtiene la fuente como archivo local. Los archivos locales se usan tal cual
+    (funciona sin red); las URLs se descargan con yt-dlp sin post-procesar.
+    Devuelve (ruta, título).
+    """
+    if not is_url(source):
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"No existe el archivo de origen: {source}")
+        return source, os.path.splitext(os.path.basename(source))[0]
+
+    from yt_dlp import YoutubeDL
+    opciones = {
+        "format": "bestaudio/best",
+        "outtmpl": os.path.join(workdir, "%(id)s.%(ext)s"),
+        "quiet": True,
+        "noprogress": True,
+    }
+    with YoutubeDL(opciones) as ydl:
+        info = ydl.extract_info(source, download=True)
+        return ydl.prepare_filename(info), info.get("title") or info.get("id")
+
+
+@timed("ingesta: transcodificacion")
+def transcode(input_file, output_file, fmt=None, normalize=True, formato=None):
+    """
+    Decodifica, normaliza y codifica en una sola invocación de FFmpeg.
+    'formato' fuerza el muxer cuando la extensión de la salida no lo indica.
+    """
+    fmt = fmt or DEFAULT_FORMAT
+    cmd = [ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error", "-i", input_file, "-vn"]
+    if normalize:
+        cmd += ["-af", LOUDNORM]
+    cmd += ffmpeg_args(fmt)
+    if formato:
+        cmd += ["-f", formato]
+    cmd.append(output_file)
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def ingest_one(source, media_path, fmt=None, name=None, normalize=True, index=None):
+    """
+    Procesa una fuente completa y devuelve su entrada de manifiesto.
+    """
+    fmt = fmt or DEFAULT_FORMAT
+    inicio = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix="hamna_ingest_") as workdir:
+        local, titulo = fetch(source, workdir)
+        archivo = f"{slugify(name or titulo)}.{fmt['ext']}"
+        destino = os.path.join(media_path, archivo)
+        # Se escribe a un temporal junto al destino (mismo sistema de archivos)
+        # y se renombra de forma atómica: nunca queda un archivo a medias. El
+        # temporal es propio de cada trabajador: dos fuentes con el mismo slug
+        # no se pisan
+        parcial = f"{destino}.{threading.get_ident()}.part"
+        try:
+            transcode(local, parcial, fmt, normalize, muxer(fmt))
+            os.replace(parcial, destino)
+        finally:
+            if os.path.exists(parcial):
+                os.remove(parcial)
+    # Se registra en el índice con su análisis (sonoridad y silencios)
+    datos = (index or MediaIndex(media_path)).lookup(destino, analyze_audio=True)
+    return {
+        "archivo": archivo,
+        "fuente": source,
+        "titulo": name or titulo,
+        "duracion": round(datos["duration"], 3),
+        "loudness": datos["loudness"],
+        "sample_rate": fmt["sample_rate"],
+        "canales": fmt["channels"],
+        "formato": fmt["ext"],
+        "bytes": os.path.getsize(destino),
+        "tiempo_proceso": round(time.monotonic() - inicio, 3),
+    }
+
+
+def load_manifest(media_path):
+    ruta = os.path.join(media_path, MANIFEST_NAME)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(media_path, manifest):
+    ruta = os.path.join(media_path, MANIFEST_NAME)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def ingest(sources, media_path, workers=2, fmt=None, normalize=True):
+    """
+    Procesa todas las fuentes en un pool de 'workers' hilos (el trabajo pesado
+    lo hacen los procesos de FFmpeg/yt-dlp). 'sources' es una lista de
+    cadenas o de tuplas (fuente, nombre). Devuelve (manifiesto, errores).
+    """
+    os.makedirs(media_path, exist_ok=True)
+    manifest = load_manifest(media_path)
+    index = MediaIndex(media_path)
+    errores = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futuros = {}
+        for item in sources:
+            source, name = item if isinstance(item, tuple) else (item, None)
+            futuros[pool.submit(ingest_one, source, media_path, fmt, name, normalize, index)] = source
+        for futuro in as_completed(futuros):
+            source = futuros[futuro]
+            try:
+                entrada = futuro.result()
+                manifest[entrada["archivo"]] = entrada
+                print(f"✅ {source} -> {entrada['archivo']} ({entrada['duracion']:.1f} s)")
+            except Exception as e:
+                errores[source] = str(e)
+                print(f"❌ {source}: {e}")
+    save_manifest(media_path, manifest)
+    return manifest, errores
+
+
+def parse_source(text):
+    """
+    'fuente' -> 'fuente';  'fuente | nombre' -> ('fuente', 'nombre')
+    """
+    if "|" in text:
+        fuente, nombre = (p.strip() for p in text.split("|", 1))
+        return fuente, nombre
+    return text.strip()
+
+
+def read_sources_file(path):
+    """
+    Lista de fuentes: una por línea, 'fuente' o 'fuente | nombre'.
+    Las líneas vacías se ignoran ('#' no es comentario: los archivos del
+    boletín suelen empezar con '#').
+    """
+    fuentes = []
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea:
+                fuentes.append(parse_source(linea))
+    return fuentes
@@ -0,0 +1,198 @@
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Bitácora de cada boletín: un archivo JSONL de solo anexado con una línea por
+# evento (PTT, inicio/fin de audio, alertas, pausas, esperas de COS, errores).
+# Cada línea lleva "t" (time.monotonic, para medir intervalos) y "ts" (hora
+# de pared). log() solo encola: la escritura la hace un hilo aparte en
+# bloques, así registrar nunca frena la reproducción.
+#   python -m src.func.journal logs/boletin_20261019_1000.jsonl
+
+JOURNAL_DIR = "logs"
+
+
+class Journal:
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def log(self, evento, **campos):
+        self._queue.put({"t": round(time.monotonic(), 4), "ts": round(time.time(), 3), "evento": evento, **campos})
+
+    def _writer(self):
+        abierto = True
+        while abierto:
+            lote = []
+            try:
+                lote.append(self._queue.get(timeout=self.flush_interval))
+                while True:
+                    lote.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            for registro in lote:
+                if registro is None:
+                    abierto = False
+                    break
+                self._file.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+            if lote:
+                self._file.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._file.close()
+
+
+class NullJournal:
+    """
+    Bitácora desactivada: misma API, no hace nada.
+    """
+    path = None
+
+    def log(self, evento, **campos):
+        pass
+
+    def close(self):
+        pass
+
+
+_current = NullJournal()
+
+
+def journal():
+    """
+    Bitácora activa (una NullJournal si no se abrió ninguna).
+    """
+    return _current
+
+
+def start_journal(directorio=JOURNAL_DIR, prefijo="boletin"):
+    global _current
+    _current.close()
+    nombre = f"{prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    _current = Journal(os.path.join(directorio, nombre))
+    return _current
+
+
+def stop_journal():
+    global _current
+    _current.close()
+    _current = NullJournal()
+
+
+def read_journal(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _intervals(eventos, inicio, fin, clave=None):
+    """
+    Intervalos [(t0, t1, evento_de_inicio)] entre pares de eventos.
+    """
+    abiertos, salida = {}, []
+    for e in eventos:
+        k = e.get(clave) if clave else None
+        if e["evento"] == inicio:
+            abiertos[k] = e
+        elif e["evento"] == fin and k in abiertos:
+            salida.append((abiertos[k]["t"], e["t"], abiertos.pop(k)))
+    return salida
+
+
+def _overlap(a, b):
+    """
+    Tiempo total de los intervalos de 'a' que cae dentro de los de 'b'.
+    """
+    total = 0.0
+    for a0, a1, _ in a:
+        for b0, b1, _ in b:
+            total += max(0.0, min(a1, b1) - max(a0, b0))
+    return total
+
+
+def summarize(eventos):
+    """
+    Totales del boletín: tiempo al aire (PTT on), aire muerto (PTT on sin
+    audio), esperas de COS y, por sección, duración real contra planeada.
+    Las transmisiones son los flancos de PTT on; si la bitácora termina con
+    el PTT encendido, la última cuenta hasta el último evento.
+    """
+    ptt = []
+    encendido = None
+    for e in eventos:
+        if e["evento"] == "ptt" and e.get("estado") == "on" and encendido is None:
+            encendido = e
+        elif e["evento"] == "ptt" and e.get("estado") == "off" and encendido is not None:
+            ptt.append((encendido["t"], e["t"], encendido))
+            encendido = None
+    if encendido is not None:
+        ptt.append((encendido["t"], eventos[-1]["t"], encendido))
+    # Los mensajes traen su duración: lo que sigue hasta audio_fin es margen
+    audio = [(t0, min(t1, t0 + e["duracion"]) if "duracion" in e else t1, e)
+             for t0, t1, e in _intervals(eventos, "audio_inicio", "audio_fin", "clip")]
+    cos = _intervals(eventos, "cos_espera_inicio", "cos_espera_fin")
+    al_aire = sum(t1 - t0 for t0, t1, _ in ptt)
+
+    secciones = []
+    for t0, t1, e in _intervals(eventos, "seccion_inicio", "seccion_fin", "nombre"):
+        real = t1 - t0
+        planeado = e.get("planeado")
+        pausas = [p for p in eventos if p["evento"] == "pausa_inicio" and t0 <= p["t"] <= t1]
+        secciones.append({
+            "nombre": e["nombre"],
+            "real": round(real, 2),
+            "planeado": planeado,
+            "error": round(real - planeado, 2) if planeado is not None else None,
+            "pausas": len(pausas),
+            "retraso_pausas_max": max((p.get("retraso", 0.0) for p in pausas), default=0.0),
+        })
+
+    return {
+        "duracion": round(eventos[-1]["t"] - eventos[0]["t"], 2) if eventos else 0.0,
+        "al_aire": round(al_aire, 2),
+        "aire_muerto": round(al_aire - _overlap(audio, ptt), 2),
+        "cambios_ptt": sum(1 for e in eventos if e["evento"] == "ptt"),
+        "transmisiones": len(ptt),
+        "esperas_cos": len(cos),
+        "cambios_cos": sum(1 for e in eventos if e["evento"] == "cos"),
+        "espera_cos_total": round(sum(t1 - t0 for t0, t1, _ in cos), 2),
+        "errores": sum(1 for e in eventos if e["evento"] == "error"),
+        "secciones": secciones,
+    }
+
+
+def print_summary(resumen):
+    print(f"Duración total:      {resumen['duracion']:.1f} s")
+    print(f"Al aire (PTT on):    {resumen['al_aire']:.1f} s en {resumen['transmisiones']} transmisiones")
+    print(f"Aire muerto:         {resumen['aire_muerto']:.1f} s")
+    print(f"Esperas de COS:      {resumen['esperas_cos']} ({resumen['espera_cos_total']:.1f} s), "
+          f"{resumen['cambios_cos']} cambios de COS")
+    print(f"Errores:             {resumen['errores']}")
+    print(f"\n{'Sección':<24}{'Real':>9}{'Plan':>9}{'Error':>8}{'Pausas':>8}{'Retraso':>9}")
+    for s in resumen["secciones"]:
+        plan = f"{s['planeado']:.1f}" if s["planeado"] is not None else "-"
+        error = f"{s['error']:+.1f}" if s["error"] is not None else "-"
+        print(f"{s['nombre'][:23]:<24}{s['real']:>9.1f}{plan:>9}{error:>8}{s['pausas']:>8}{s['retraso_pausas_max']:>9.2f}")
+
+
+if __name__ == "__main__":
+    # python -m src.func.journal [archivo.jsonl]  (sin argumento: el más reciente de logs/)
+    if len(sys.argv) > 1:
+        ruta = sys.argv[1]
+    else:
+        archivos = sorted(f for f in os.listdir(JOURNAL_DIR) if f.endswith(".jsonl")) if os.path.isdir(JOURNAL_DIR) else []
+        if not archivos:
+            sys.exit(f"No hay bitácoras en {JOURNAL_DIR}/")
+        ruta = os.path.join(JOURNAL_DIR, archivos[-1])
+    print(f"Bitácora: {ruta}\n")
+    print_summary(summarize(read_journal(ruta)))
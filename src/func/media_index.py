@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from mutagen import File as MutagenFile, MutagenError
+from src.func.profiling import timed
+
+# Índice persistente de medios (SQLite en media_path). Cada archivo se
+# identifica por ruta + tamaño + mtime; si no cambiaron, los datos se leen del
+# índice sin tocar el audio. Si cambiaron, se recalcula el hash del contenido
+# y, si coincide con uno ya analizado, se reutiliza ese análisis.
+
+INDEX_NAME = ".hamna_index.sqlite"
+
+# Detección de silencios: umbral y duración mínima
+SILENCE_DB = -50
+SILENCE_MIN = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    hash        TEXT NOT NULL,
+    duration    REAL,
+    sample_rate INTEGER,
+    channels    INTEGER,
+    bitrate     INTEGER,
+    loudness    REAL,
+    silences    TEXT,
+    pcm_cache   TEXT,
+    indexed_at  REAL
+);
+CREATE INDEX IF NOT EXISTS media_hash ON media(hash);
+"""
+
+ANALYSIS_FIELDS = ("duration", "sample_rate", "channels", "bitrate", "loudness", "silences", "pcm_cache")
+
+
+@timed("indice: hash")
+def content_hash(path, chunk=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(chunk), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+@timed("indice: mutagen")
+def probe(path):
+    """
+    Datos del encabezado con mutagen (no decodifica el audio). Un archivo
+    que mutagen no reconoce no se indexa con duración 0: lanza MutagenError.
+    """
+    audio = MutagenFile(path)
+    if audio is None:
+        raise MutagenError(f"Formato de audio no reconocido: {path}")
+    info = audio.info
+    return {
+        "duration": info.length,
+        "sample_rate": getattr(info, "sample_rate", None),
+        "channels": getattr(info, "channels", None),
+        "bitrate": getattr(info, "bitrate", None),
+    }
+
+
+@timed("indice: analisis ffmpeg")
+def analyze(path):
+    """
+    Sonoridad integrada (LUFS) y mapa de silencios en una sola pasada de FFmpeg.
+    """
+    from src.func.ingest import ffmpeg_exe
+    cmd = [ffmpeg_exe(), "-hide_banner", "-nostats", "-i", path, "-vn",
+           "-af", f"silencedetect=n={SILENCE_DB}dB:d={SILENCE_MIN},ebur128", "-f", "null", "-"]
+    salida = subprocess.run(cmd, capture_output=True, text=True, errors="ignore").stderr
+
+    silencios, inicio = [], None
+    for linea in salida.splitlines():
+        m = re.search(r"silence_start: (-?[\d.]+)", linea)
+        if m:
+            inicio = max(float(m.group(1)), 0.0)
+            continue
+        m = re.search(r"silence_end: ([\d.]+)", linea)
+        if m and inicio is not None:
+            silencios.append([round(inicio, 3), round(float(m.group(1)), 3)])
+            inicio = None
+    loud = re.findall(r"I:\s+(-?[\d.]+) LUFS", salida)
+    return {"loudness": float(loud[-1]) if loud else None, "silences": silencios}
+
+
+class MediaIndex:
+    def __init__(self, media_path):
+        self.path = os.path.join(media_path, INDEX_NAME)
+        os.makedirs(media_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _row(self, key):
+        return self._db.execute("SELECT * FROM media WHERE path = ?", (key,)).fetchone()
+
+    def _as_dict(self, row):
+        d = dict(row)
+        d["silences"] = json.loads(d["silences"]) if d["silences"] else None
+        return d
+
+    def lookup(self, path, analyze_audio=False):
+        """
+        Datos del archivo desde el índice; solo toca el audio si el archivo
+        es nuevo o cambió (o si se pide análisis y aún no lo tiene).
+        """
+        key = self.key(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._row(key)
+        if row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns:
+            if not analyze_audio or row["loudness"] is not None:
+                return self._as_dict(row)
+            return self._store(key, path, st, row["hash"], dict(self._as_dict(row), **analyze(path)))
+
+        digest = content_hash(path)
+        with self._lock:
+            previo = self._db.execute(
+                "SELECT * FROM media WHERE hash = ? AND duration IS NOT NULL LIMIT 1", (digest,)
+            ).fetchone()
+        if previo:
+            # Mismo contenido (copiado, renombrado o solo cambió el mtime)
+            datos = self._as_dict(previo)
+        else:
+            datos = probe(path)
+        if analyze_audio and datos.get("loudness") is None:
+            datos.update(analyze(path))
+        return self._store(key, path, st, digest, datos)
+
+    def _store(self, key, path, st, digest, datos):
+        fila = {f: datos.get(f) for f in ANALYSIS_FIELDS}
+        fila["silences"] = json.dumps(fila["silences"]) if fila["silences"] is not None else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime_ns, hash, duration, sample_rate, channels, "
+                "bitrate, loudness, silences, pcm_cache, indexed_at) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                (key, st.st_size, st.st_mtime_ns, digest, fila["duration"], fila["sample_rate"],
+                 fila["channels"], fila["bitrate"], fila["loudness"], fila["silences"],
+                 fila["pcm_cache"], time.time()),
+            )
+            self._db.commit()
+            return self._as_dict(self._row(key))
+
+    def duration(self, path):
+        return self.lookup(path)["duration"]
+
+    def set_pcm_cache(self, path, cache_path):
+        with self._lock:
+            self._db.execute("UPDATE media SET pcm_cache = ? WHERE path = ?", (cache_path, self.key(path)))
+            self._db.commit()
+
+    def hashes(self):
+        """
+        Hashes de contenido de todos los archivos del índice.
+        """
+        with self._lock:
+            return {r["hash"] for r in self._db.execute("SELECT hash FROM media")}
+
+    def forget_missing(self):
+        """
+        Elimina del índice los archivos que ya no existen. Devuelve cuántos.
+        """
+        with self._lock:
+            rutas = [r["path"] for r in self._db.execute("SELECT path FROM media")]
+            faltantes = [p for p in rutas if not os.path.exists(p)]
+            self._db.executemany("DELETE FROM media WHERE path = ?", [(p,) for p in faltantes])
+            self._db.commit()
+        return len(faltantes)
+
+    def scan(self, paths, analyze_audio=True):
+        """
+        Actualiza el índice de forma incremental. Devuelve conteos por estado.
+        """
+        conteo = {"sin_cambios": 0, "actualizados": 0, "errores": 0}
+        for path in paths:
+            key = self.key(path)
+            with self._lock:
+                antes = self._row(key)
+            try:
+                despues = self.lookup(path, analyze_audio)
+            except (OSError, subprocess.SubprocessError, MutagenError) as e:
+                print(f"❌ {path}: {e}")
+                conteo["errores"] += 1
+                continue
+            if antes and dict(antes)["indexed_at"] == despues["indexed_at"]:
+                conteo["sin_cambios"] += 1
+            else:
+                conteo["actualizados"] += 1
+        conteo["eliminados"] = self.forget_missing()
+        return conteo
+
+    def close(self):
+        self._db.close()
+
+
+def config_media_files(config):
+    """
+    Archivos que usa el boletín según cfg.yml: secciones y alertas (las de
+    'tono' se sintetizan, no son archivos).
+    """
+    media_path = config["general"]["media_path"]
+    archivos = [s["archivo"] for s in config.get("secciones", [])]
+    archivos += [os.path.join(media_path, a["archivo"]) for a in config.get("alertas", []) if "archivo" in a]
+    return archivos
+
+
+if __name__ == "__main__":
+    # python -m src.func.media_index [archivos...]  (sin argumentos: los de cfg.yml)
+    from src.func.functions import load_config
+    config = load_config()
+    archivos = sys.argv[1:] or [a for a in config_media_files(config) if os.path.exists(a)]
+    inicio = time.monotonic()
+    index = MediaIndex(config["general"]["media_path"])
+    conteo = index.scan(archivos)
+    print(f"Índice {index.path}: {conteo} en {time.monotonic() - inicio:.2f} s")
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import re
+import subprocess
+import numpy as np
+from src.func.ingest import ffmpeg_exe
+from src.func.formats import ffmpeg_args
+from src.func.functions import convert_hhmmss_to_seconds
+from src.func.profiling import timed
+from src.func.tones import cw
+
+# Mensajes de TTS por segmentos. Una plantilla como
+#   "Hemos terminado con nuestra emisión de este día {fecha}. Les recordamos..."
+# se divide en segmentos estáticos (cada frase del texto fijo) y dinámicos
+# (los campos). Todos pasan por la caché del servicio de TTS: las frases fijas
+# se sintetizan una sola vez y cada semana solo se genera lo que cambió. El
+# mensaje final se arma concatenando el PCM de los segmentos con fundidos
+# cortos.
+
+CROSSFADE = 0.03        # fundido entre segmentos (s)
+SENTENCE_PAUSE = 0.3    # silencio tras un segmento que cierra frase (s)
+TRIM_MARGIN = 0.02      # margen que se deja al recortar silencios (s)
+SILENCE_LEVEL = 160     # amplitud (int16) bajo la cual se considera silencio
+
+_CAMPO = re.compile(r"\{(\w+)\}")
+_FRASE = re.compile(r"(?<=[.;:!?])\s+")
+
+
+def fill_template(plantilla, valores=None):
+    """
+    Sustituye en la plantilla solo los campos de 'valores'; cualquier otro
+    texto entre llaves queda literal (str.format lanzaría KeyError).
+    """
+    valores = valores or {}
+    return _CAMPO.sub(lambda m: str(valores[m.group(1)]) if m.group(1) in valores else m.group(0), plantilla)
+
+
+def split_template(plantilla, valores=None):
+    """
+    Segmentos [{"texto", "estatico", "pausa"}] de la plantilla. Los trozos
+    sin letras ni números (puntuación suelta) no se sintetizan. Los campos
+    que no están en 'valores' quedan como texto fijo.
+    """
+    valores = valores or {}
+    segmentos = []
+    campos = _CAMPO.split(" ".join(plantilla.split()))
+    partes = campos[:1]
+    for campo, resto in zip(campos[1::2], campos[2::2]):
+        if campo in valores:
+            partes += [campo, resto]
+        else:
+            partes[-1] += f"{{{campo}}}{resto}"
+    for i, parte in enumerate(partes):
+        if i % 2:
+            # Campo dinámico
+            textos = [str(valores[parte])]
+            estatico = False
+        else:
+            textos = _FRASE.split(parte)
+            estatico = True
+        for texto in textos:
+            texto = texto.strip()
+            if not re.search(r"\w", texto):
+                # Puntuación tras un campo: cierra la frase del segmento anterior
+                if segmentos and re.search(r"[.;:!?]", texto):
+                    segmentos[-1]["pausa"] = SENTENCE_PAUSE
+                continue
+            pausa = SENTENCE_PAUSE if re.search(r"[.;:!?]$", texto) else 0.0
+            segmentos.append({"texto": texto, "estatico": estatico, "pausa": pausa})
+    return segmentos
+
+
+@timed("tts: decodificacion")
+def load_pcm(archivo, sample_rate, channels):
+    """
+    WAV del TTS como float32 (muestras, canales) a la frecuencia indicada.
+    """
+    cmd = [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", archivo,
+           "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-ac", str(channels), "-"]
+    datos = subprocess.run(cmd, check=True, capture_output=True).stdout
+    return np.frombuffer(datos, dtype=np.int16).reshape(-1, channels).astype(np.float32)
+
+
+def trim_silence(pcm, sample_rate):
+    """
+    Recorta el silencio que los motores dejan al inicio y al final.
+    """
+    activo = np.flatnonzero(np.abs(pcm).max(axis=1) > SILENCE_LEVEL)
+    if not len(activo):
+        return pcm[:0]
+    margen = int(TRIM_MARGIN * sample_rate)
+    return pcm[max(activo[0] - margen, 0):activo[-1] + margen + 1]
+
+
+def concat_crossfade(partes, sample_rate, fundido=CROSSFADE):
+    """
+    Une los tramos con un fundido lineal de 'fundido' segundos entre cada par.
+    """
+    partes = [p for p in partes if len(p)]
+    if not partes:
+        return np.zeros((0, 1), dtype=np.float32)
+    n_fade = int(fundido * sample_rate)
+    piezas = [partes[0]]
+    for p in partes[1:]:
+        previo = piezas.pop()
+        n = min(n_fade, len(previo), len(p))
+        if n:
+            rampa = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+            mezcla = previo[-n:] * (1.0 - rampa) + p[:n] * rampa
+            piezas += [previo[:-n], mezcla, p[n:]]
+        else:
+            piezas += [previo, p]
+    return np.concatenate(piezas)
+
+
+@timed("tts: codificacion")
+def write_audio(pcm, output, sample_rate, fmt):
+    cmd = [ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "s16le", "-ar", str(sample_rate), "-ac", str(pcm.shape[1]), "-i", "-",
+           *ffmpeg_args(fmt), output]
+    datos = np.clip(pcm, -32768, 32767).astype(np.int16).tobytes()
+    subprocess.run(cmd, input=datos, check=True, capture_output=True)
+    return output
+
+
+@timed("tts: mensajes")
+def build_messages(servicio, mensajes, fmt, valores=None):
+    """
+    Arma varios mensajes {salida: plantilla}. Los segmentos de todos se
+    sintetizan juntos (en paralelo y solo los que no estén en caché) y cada
+    mensaje se escribe en el formato 'fmt'. Retorna las rutas en orden.
+    """
+    planes = {salida: split_template(plantilla, valores) for salida, plantilla in mensajes.items()}
+    textos = list(dict.fromkeys(s["texto"] for plan in planes.values() for s in plan))
+    pendientes = sum(1 for t in textos if not servicio.is_cached(t))
+    print(f"TTS: {len(textos)} segmentos, {pendientes} por sintetizar")
+    wavs = dict(zip(textos, servicio.synthesize_many(textos)))
+
+    sample_rate, channels = fmt["sample_rate"], fmt["channels"]
+    for salida, plan in planes.items():
+        partes = []
+        for segmento in plan:
+            partes.append(trim_silence(load_pcm(wavs[segmento["texto"]], sample_rate, channels), sample_rate))
+            if segmento["pausa"]:
+                partes.append(np.zeros((int(segmento["pausa"] * sample_rate), channels), dtype=np.float32))
+        write_audio(concat_crossfade(partes, sample_rate), salida, sample_rate, fmt)
+    return list(planes)
+
+
+ANNOUNCE_DIR = ".anuncios"
+ANNOUNCE_TEMPLATE = "A continuación: {nombre}."
+
+
+def announcement_texts(config):
+    """
+    Texto del anuncio de cada sección: su clave 'anuncio' o la plantilla de
+    'anuncios.plantilla' con {nombre}, {numero} y {minutos}.
+    """
+    plantilla = (config.get("anuncios") or {}).get("plantilla", ANNOUNCE_TEMPLATE)
+    textos = {}
+    for numero, s in enumerate(config["secciones"], start=1):
+        minutos = round((convert_hhmmss_to_seconds(s["fin"]) - convert_hhmmss_to_seconds(s["inicio"])) / 60)
+        textos[s["nombre"]] = s.get("anuncio") or fill_template(
+            plantilla, {"nombre": s["nombre"], "numero": numero, "minutos": minutos})
+    return textos
+
+
+@timed("tts: anuncios")
+def section_announcements(servicio, config, fmt):
+    """
+    Clips de anuncio por sección {nombre: ruta}, en media_path/.anuncios con
+    nombre por hash del texto y formato. Los que falten se generan en un solo
+    lote, así el tiempo no crece con el número de secciones.
+    """
+    directorio = os.path.join(config["general"]["media_path"], ANNOUNCE_DIR)
+    os.makedirs(directorio, exist_ok=True)
+    rutas, faltantes = {}, {}
+    for nombre, texto in announcement_texts(config).items():
+        clave = f"{servicio.engine.key()}|{fmt}|{texto}".encode("utf-8")
+        ruta = os.path.join(directorio, f"{hashlib.blake2b(clave, digest_size=16).hexdigest()}.{fmt['ext']}")
+        rutas[nombre] = ruta
+        if not os.path.exists(ruta):
+            faltantes[ruta] = texto
+    if faltantes:
+        build_messages(servicio, faltantes, fmt)
+    print(f"Anuncios de sección: {len(rutas)} ({len(faltantes)} nuevos)")
+    return rutas
+
+
+STATION_ID_DIR = ".identificacion"
+STATION_ID_TEXT = "Esta es la estación {indicativo}."
+STATION_ID_GAP = 0.5    # silencio entre la voz y el CW (s)
+
+
+@timed("identificacion")
+def station_id_clip(config, fmt, servicio=None):
+    """
+    Clip de identificación según la sección 'identificacion' de cfg.yml: voz
+    (TTS), CW o ambos. Va en media_path/.identificacion con nombre por hash
+    de sus parámetros y solo se genera si no existe. Retorna su ruta.
+    """
+    cfg = config["identificacion"]
+    modo = cfg.get("modo", "cw")
+    if modo not in ("voz", "cw", "ambos"):
+        raise ValueError(f"identificacion.modo desconocido: {modo} (voz | cw | ambos)")
+    indicativo = cfg["indicativo"]
+    texto = fill_template(cfg.get("texto", STATION_ID_TEXT), {"indicativo": indicativo})
+    opciones_cw = {"wpm": cfg.get("cw_wpm", 20), "tono": cfg.get("cw_tono", 700),
+                   "amplitud": cfg.get("cw_volumen", 0.5)}
+    voz = servicio.engine.key() if modo != "cw" else None
+    clave = f"{modo}|{fmt}|{indicativo}|{opciones_cw}|{voz}|{texto if voz else ''}".encode("utf-8")
+
+    directorio = os.path.join(config["general"]["media_path"], STATION_ID_DIR)
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{hashlib.blake2b(clave, digest_size=16).hexdigest()}.{fmt['ext']}")
+    if os.path.exists(ruta):
+        return ruta
+
+    sample_rate, channels = fmt["sample_rate"], fmt["channels"]
+    partes = []
+    if modo != "cw":
+        partes.append(trim_silence(load_pcm(servicio.synthesize(texto), sample_rate, channels), sample_rate))
+    if modo != "voz":
+        if partes:
+            partes.append(np.zeros((int(STATION_ID_GAP * sample_rate), channels), dtype=np.float32))
+        tono = cw(indicativo, sample_rate, **opciones_cw)
+        partes.append(np.repeat(tono[:, None], channels, axis=1))
+    write_audio(concat_crossfade(partes, sample_rate), ruta, sample_rate, fmt)
+    print(f"Identificación generada ({modo}): {ruta}")
+    return ruta
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Mezcla de alertas sobre el programa. En lugar de sumar la alerta encima
+# del audio a nivel completo (que satura o la tapa según la sección), el
+# programa se atenúa 'atenuacion' dB alrededor de cada alerta con rampas de
+# coseno alzado, y un limitador de picos deja la suma bajo 'techo' dBFS.
+# Todo se calcula por bloques con operaciones vectorizadas sobre el PCM
+# int16 (muestras, canales); las posiciones son absolutas en muestras y el
+# limitador lee su contexto del programa completo, así un bloque da lo mismo
+# sin importar cómo se partió el audio.
+
+DEFAULTS = {
+    "atenuacion": 10.0,     # dB que baja el programa bajo una alerta
+    "ataque": 0.05,         # rampa de bajada antes de la alerta (s)
+    "liberacion": 0.25,     # rampa de subida después de la alerta (s)
+    "nivel_alerta": 0.8,    # ganancia de la alerta
+    "techo": -1.0,          # pico máximo de la mezcla (dBFS)
+    "ventana": 0.005,       # resolución del limitador (s)
+}
+
+
+def db_to_gain(db):
+    return 10.0 ** (db / 20.0)
+
+
+class Mixer:
+    def __init__(self, sample_rate, atenuacion=10.0, ataque=0.05, liberacion=0.25, nivel_alerta=0.8,
+                 techo=-1.0, ventana=0.005):
+        self.sample_rate = sample_rate
+        self.fondo = db_to_gain(-abs(atenuacion))
+        self.ataque = int(ataque * sample_rate)
+        self.liberacion = int(liberacion * sample_rate)
+        self.nivel_alerta = nivel_alerta
+        self.techo = db_to_gain(techo) * 32767
+        self.ventana = max(int(ventana * sample_rate), 1)
+
+    def span(self, offset, largo):
+        """
+        Tramo [a, b) que afecta una alerta: la alerta más sus rampas.
+        """
+        return offset - self.ataque, offset + largo + self.liberacion
+
+    def touches(self, inicio, n, offset, largo):
+        """
+        Si la alerta (o sus rampas) cae en el bloque [inicio, inicio + n).
+        """
+        a, b = self.span(offset, largo)
+        return a < inicio + n and b > inicio
+
+    def duck_gain(self, inicio, n, overlays):
+        """
+        Ganancia del programa por muestra en el bloque: 1 lejos de las
+        alertas, 'fondo' bajo ellas y rampas de coseno alzado entre ambos.
+        """
+        x = np.arange(inicio, inicio + n, dtype=np.float64)
+        profundidad = np.zeros(n, dtype=np.float64)
+        for offset, datos in overlays:
+            fin = offset + len(datos)
+            xp = [offset - self.ataque - 1, offset, fin, fin + self.liberacion + 1]
+            profundidad = np.maximum(profundidad, np.interp(x, xp, [0.0, 1.0, 1.0, 0.0]))
+        curva = 0.5 - 0.5 * np.cos(np.pi * profundidad)
+        return (1.0 - (1.0 - self.fondo) * curva).astype(np.float32)
+
+    def limit(self, mezcla, inicio=0, afectado=None):
+        """
+        Limitador de picos: ganancia por ventana (alineadas a la muestra
+        absoluta) para que ninguna muestra pase del techo, tomando la menor
+        de cada ventana y sus vecinas (anticipación) e interpolada entre
+        ventanas, sin escalones. Con 'afectado' solo cuentan esas muestras.
+        """
+        pico = np.abs(mezcla).max(axis=1)
+        if afectado is not None:
+            pico = np.where(afectado, pico, 0)
+        if not len(pico) or pico.max() <= self.techo:
+            return mezcla
+        n, v = len(pico), self.ventana
+        antes = inicio % v
+        m = -(-(antes + n) // v)
+        picos = np.pad(pico, (antes, m * v - n - antes)).reshape(m, v).max(axis=1)
+        g = np.minimum(1.0, self.techo / np.maximum(picos, 1e-9))
+        g = np.minimum(g, np.minimum(np.r_[g[1:], 1.0], np.r_[1.0, g[:-1]]))
+        ganancia = np.interp(np.arange(antes, antes + n), np.arange(m) * v + v / 2, g).astype(np.float32)
+        return mezcla * ganancia[:, None]
+
+    def mix(self, programa, inicio, n, overlays):
+        """
+        Bloque [inicio, inicio + n) de 'programa' (int16 (muestras, canales):
+        el clip completo) con las alertas [(muestra de inicio, datos int16)]
+        mezcladas. El limitador mira dos ventanas a cada lado leyendo del
+        programa completo, así el resultado no depende de cómo se parte el
+        audio en bloques.
+        """
+        bloque = programa[inicio:inicio + n]
+        n = len(bloque)
+        tramos = [self.span(o, len(d)) for o, d in overlays if self.touches(inicio, n, o, len(d))]
+        if not tramos:
+            return bloque
+        # Solo se procesa lo que tocan las alertas, con contexto alineado a ventanas
+        v = self.ventana
+        a = max(min(t[0] for t in tramos), inicio)
+        b = min(max(t[1] for t in tramos), inicio + n)
+        lo = max((a // v - 2) * v, 0)
+        hi = min((-(-b // v) + 2) * v, len(programa))
+        activos = [(o, d) for o, d in overlays if self.touches(lo, hi - lo, o, len(d))]
+
+        mezcla = programa[lo:hi].astype(np.float32) * self.duck_gain(lo, hi - lo, activos)[:, None]
+        afectado = np.zeros(hi - lo, dtype=bool)
+        for offset, datos in activos:
+            t0, t1 = self.span(offset, len(datos))
+            afectado[max(t0, lo) - lo:max(min(t1, hi), lo) - lo] = True
+            x0, x1 = max(lo, offset), min(hi, offset + len(datos))
+            if x0 < x1:
+                mezcla[x0 - lo:x1 - lo] += datos[x0 - offset:x1 - offset] * self.nivel_alerta
+        mezcla = np.clip(np.round(self.limit(mezcla, lo, afectado)), -32768, 32767).astype(np.int16)
+
+        salida = bloque.copy()
+        tramo = slice(a - lo, b - lo)
+        salida[a - inicio:b - inicio] = np.where(afectado[tramo, None], mezcla[tramo], bloque[a - inicio:b - inicio])
+        return salida
+
+
+def create_mixer(config, sample_rate):
+    """
+    Mezclador según la sección 'mezcla' de cfg.yml (valores de DEFAULTS si falta).
+    """
+    cfg = (config or {}).get("mezcla") or {}
+    return Mixer(sample_rate, **{k: float(cfg.get(k, v)) for k, v in DEFAULTS.items()})
@@ -0,0 +1,307 @@
+import mmap
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.func.ingest import ffmpeg_exe
+from src.func.profiling import timed
+
+# Caché de audio decodificado: cada sección recortada (inicio-fin) se guarda
+# como PCM crudo (s16le) en media_path/.pcm_cache y en reproducción se mapea
+# en memoria, así el arranque no decodifica MP3 y solo se leen las páginas
+# que se van reproduciendo. El nombre del archivo incluye el hash del
+# contenido del MP3 (del índice de medios): si el MP3 cambia, el PCM viejo
+# ya no se usa y sale por LRU o con purge_stale().
+
+CACHE_DIR = ".pcm_cache"
+SAMPLE_WIDTH = 2   # bytes por muestra (s16le)
+
+
+class PcmCache:
+    def __init__(self, media_path, index, max_bytes=2 << 30, sample_rate=44100, channels=2):
+        self.dir = os.path.join(media_path, CACHE_DIR)
+        os.makedirs(self.dir, exist_ok=True)
+        self.index = index
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._lock = threading.Lock()
+
+    @property
+    def frame_bytes(self):
+        return SAMPLE_WIDTH * self.channels
+
+    def cache_file(self, path, start, end):
+        digest = self.index.lookup(path)["hash"]
+        nombre = f"{digest}_{int(start * 1000)}_{int(end * 1000)}_{self.sample_rate}_{self.channels}.pcm"
+        return os.path.join(self.dir, nombre)
+
+    @timed("pcm: decodificacion")
+    def decode(self, path, start, end, destino):
+        """
+        Decodifica el tramo [start, end) a PCM crudo. Se escribe a un temporal
+        y se renombra para que un corte nunca deje un archivo a medias.
+        """
+        temporal = f"{destino}.{threading.get_ident()}.tmp"
+        cmd = [ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+               "-ss", str(start), "-to", str(end), "-i", path, "-vn",
+               "-f", "s16le", "-acodec", "pcm_s16le",
+               "-ar", str(self.sample_rate), "-ac", str(self.channels), temporal]
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(temporal, destino)
+
+    def get(self, path, start, end):
+        """
+        Ruta del PCM del tramo, decodificándolo solo si no está en caché.
+        """
+        destino = self.cache_file(path, start, end)
+        if os.path.exists(destino):
+            os.utime(destino)  # marca de uso para el LRU
+        else:
+            self.decode(path, start, end, destino)
+            self.index.set_pcm_cache(path, destino)
+            self.evict(keep=destino)
+        return destino
+
+    def open(self, path, start, end):
+        """
+        Mapa de memoria de solo lectura del tramo decodificado.
+        """
+        return PcmBuffer(self.get(path, start, end), self.sample_rate, self.channels)
+
+    def samples(self, path):
+        """
+        Archivo corto completo (alertas) como arreglo int16 (muestras, canales).
+        """
+        from src.func.functions import file_duration
+        buf = self.open(path, 0, file_duration(path))
+        datos = np.frombuffer(buf.view, dtype=np.int16).reshape(-1, self.channels).copy()
+        buf.close()
+        return datos
+
+    @timed("pcm: preparacion")
+    def prepare(self, tramos, workers=2):
+        """
+        Decodifica en paralelo los tramos [(archivo, inicio, fin), ...] que falten.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda t: self.get(*t), tramos))
+
+    def _entries(self):
+        entradas = []
+        for nombre in os.listdir(self.dir):
+            if nombre.endswith(".pcm"):
+                ruta = os.path.join(self.dir, nombre)
+                st = os.stat(ruta)
+                entradas.append((st.st_mtime, st.st_size, ruta))
+        return entradas
+
+    def size(self):
+        return sum(e[1] for e in self._entries())
+
+    def evict(self, keep=None):
+        """
+        Borra los PCM menos usados hasta quedar bajo max_bytes.
+        """
+        with self._lock:
+            entradas = sorted(self._entries())
+            total = sum(e[1] for e in entradas)
+            for _, tamano, ruta in entradas:
+                if total <= self.max_bytes:
+                    break
+                if ruta == keep:
+                    continue
+                os.remove(ruta)
+                total -= tamano
+
+    def purge_stale(self):
+        """
+        Borra los PCM cuyo hash ya no corresponde a ningún archivo del índice.
+        """
+        vigentes = self.index.hashes()
+        borrados = 0
+        for _, _, ruta in self._entries():
+            if os.path.basename(ruta).split("_", 1)[0] not in vigentes:
+                os.remove(ruta)
+                borrados += 1
+        return borrados
+
+
+class PcmBuffer:
+    """
+    PCM crudo mapeado en memoria. Las lecturas devuelven memoryviews sobre el
+    mapa, sin copiar; el sistema operativo carga solo las páginas usadas.
+    """
+    def __init__(self, path, sample_rate, channels):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_bytes = SAMPLE_WIDTH * channels
+        self._file = open(path, "rb")
+        tamano = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if tamano else None
+        self.view = memoryview(self._map) if self._map else memoryview(b"")
+
+    def __len__(self):
+        return len(self.view)
+
+    @property
+    def duration(self):
+        return len(self.view) / (self.sample_rate * self.frame_bytes)
+
+    def byte_offset(self, seconds):
+        frames = int(max(seconds, 0) * self.sample_rate)
+        return min(frames * self.frame_bytes, len(self.view))
+
+    def slice(self, start_s, length_s):
+        inicio = self.byte_offset(start_s)
+        fin = min(inicio + self.byte_offset(length_s), len(self.view))
+        return self.view[inicio:fin]
+
+    def close(self):
+        self.view.release()
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+
+class PcmMusic:
+    """
+    Reproduce un PcmBuffer por un canal reservado de pygame, alimentado en
+    bloques desde el mapa de memoria. Imita la API de pygame.mixer.music que
+    usa cor.py (play, pause, unpause, stop, set_pos, get_busy); las posiciones
+    son absolutas dentro del archivo original (base = inicio del tramo). Con
+    'mixer', las alertas de 'overlays' [(posición, datos int16)] se mezclan
+    en cada bloque antes de encolarlo (ver mixer.py).
+    """
+    CHANNEL = 0
+
+    def __init__(self, buffer, base=0.0, volume=1.0, chunk=1.0, mixer=None, overlays=()):
+        import pygame
+        self._pygame = pygame
+        # El canal 0 queda reservado: Sound.play() de las alertas no lo toma
+        pygame.mixer.set_reserved(self.CHANNEL + 1)
+        self._channel = pygame.mixer.Channel(self.CHANNEL)
+        self._channel.set_volume(volume)
+        self.buffer = buffer
+        self.base = base
+        self.chunk = chunk
+        self.mixer = mixer
+        # Alertas en muestras desde el inicio del tramo
+        self.overlays = [(int(round((p - base) * buffer.sample_rate)), d) for p, d in overlays]
+        self._next = 0.0          # próximo segundo (relativo) a encolar
+        self._pos = 0.0           # posición relativa al arrancar el reloj
+        self._t0 = None           # time.monotonic() del último arranque
+        self._state = "stopped"   # stopped | playing | paused
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    def _sound(self, start):
+        datos = self.buffer.slice(start, self.chunk)
+        if not len(datos):
+            return None
+        if self.mixer is not None and self.overlays:
+            # El mezclador lee del programa completo (vista sobre el mapa, sin copiar)
+            fb = self.buffer.frame_bytes
+            programa = np.frombuffer(self.buffer.view, dtype=np.int16).reshape(-1, self.buffer.channels)
+            mezcla = self.mixer.mix(programa, self.buffer.byte_offset(start) // fb, len(datos) // fb, self.overlays)
+            if not np.may_share_memory(mezcla, programa):
+                return self._pygame.mixer.Sound(buffer=mezcla.tobytes())
+        return self._pygame.mixer.Sound(buffer=datos)
+
+    def _feed(self):
+        while not self._stop.wait(0.1):
+            with self._lock:
+                if self._state != "playing" or self._next >= self.buffer.duration:
+                    continue
+                if self._channel.get_queue() is None:
+                    sonido = self._sound(self._next)
+                    if sonido is not None:
+                        self._channel.queue(sonido)
+                        self._next += self.chunk
+
+    def drop_overlays(self, position):
+        """
+        Descarta las alertas que empiezan antes de 'position' (absoluta): tras
+        una pausa del plan, el retroceso no debe repetir su alerta.
+        """
+        limite = int(round((position - self.base) * self.buffer.sample_rate))
+        with self._lock:
+            self.overlays = [(o, d) for o, d in self.overlays if o >= limite]
+
+    def _start(self, relativo):
+        self._channel.stop()
+        self._pos, self._next = relativo, relativo
+        sonido = self._sound(relativo)
+        if sonido is None:
+            self._state = "stopped"
+            return
+        self._channel.play(sonido)
+        self._next += self.chunk
+        self._t0 = time.monotonic()
+        self._state = "playing"
+
+    def _relative(self, position):
+        return 0.0 if position is None else max(position - self.base, 0.0)
+
+    def play(self, start=None):
+        with self._lock:
+            self._start(self._relative(start))
+
+    def set_pos(self, position):
+        with self._lock:
+            if self._state == "paused":
+                # Se reanuda desde la nueva posición en unpause()
+                self._channel.stop()
+                self._pos = self._next = self._relative(position)
+            else:
+                self._start(self._relative(position))
+
+    def pause(self):
+        with self._lock:
+            if self._state == "playing":
+                self._channel.pause()
+                self._pos += time.monotonic() - self._t0
+                self._state = "paused"
+
+    def unpause(self):
+        with self._lock:
+            if self._state != "paused":
+                return
+            if self._channel.get_busy():
+                self._t0 = time.monotonic()
+                self._state = "playing"
+                self._channel.unpause()
+            else:
+                self._channel.unpause()
+                self._start(self._pos)
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            self._channel.stop()
+            self._state = "stopped"
+        self._feeder.join(timeout=1)
+        self.buffer.close()
+
+    def get_pos(self):
+        """
+        Posición absoluta actual en segundos.
+        """
+        with self._lock:
+            relativo = self._pos
+            if self._state == "playing":
+                relativo += time.monotonic() - self._t0
+        return self.base + min(relativo, self.buffer.duration)
+
+    def get_busy(self):
+        with self._lock:
+            if self._state == "paused":
+                return True
+            if self._state == "stopped":
+                return False
+            return self._channel.get_busy() or self._next < self.buffer.duration
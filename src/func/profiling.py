@@ -0,0 +1,138 @@
+import atexit
+import contextlib
+import functools
+import os
+import threading
+import time
+
+# Medición por fases (TTS, conversión, índice de medios, inicio de pygame,
+# caché de PCM...). Desactivada cuesta una comparación por llamada; se activa
+# con HAMNA_PROFILE=1 o con cor.py --perfil. Opcionalmente captura todo con
+# cProfile (archivo .prof para snakeviz/pstats) o con pyinstrument si está
+# instalado. El informe se imprime al salir.
+#
+#   with phase("tts"):            @timed("conversion")
+#       ...                       def convert_to_valid_mp3(...): ...
+
+_enabled = os.environ.get("HAMNA_PROFILE", "") not in ("", "0")
+_lock = threading.Lock()
+_stats = {}        # nombre -> [llamadas, total, máximo]
+_profiler = None   # cProfile.Profile o pyinstrument.Profiler
+_output = None
+_NULL = contextlib.nullcontext()
+_registered = False
+
+
+class _Phase:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.nombre, time.perf_counter() - self.inicio)
+        return False
+
+
+def record(nombre, segundos):
+    with _lock:
+        s = _stats.setdefault(nombre, [0, 0.0, 0.0])
+        s[0] += 1
+        s[1] += segundos
+        s[2] = max(s[2], segundos)
+
+
+def phase(nombre):
+    """
+    Context manager que mide el bloque (no hace nada si está desactivado).
+    """
+    return _Phase(nombre) if _enabled else _NULL
+
+
+def timed(nombre=None):
+    """
+    Decorador: mide cada llamada a la función como la fase 'nombre'.
+    """
+    def decorador(fn):
+        etiqueta = nombre or fn.__qualname__
+
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Phase(etiqueta):
+                return fn(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def enable(captura=None, salida="hamna.prof"):
+    """
+    Activa la medición. 'captura' puede ser "cprofile" o "pyinstrument".
+    """
+    global _enabled, _profiler, _output
+    _enabled = True
+    _output = salida
+    if captura == "cprofile":
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    elif captura == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument no está instalado (pip install pyinstrument); solo se medirán fases.")
+        else:
+            _profiler = Profiler()
+            _profiler.start()
+    _register()
+
+
+def _register():
+    global _registered
+    if not _registered:
+        atexit.register(report)
+        _registered = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def stats():
+    with _lock:
+        return {k: {"llamadas": v[0], "total": v[1], "max": v[2]} for k, v in _stats.items()}
+
+
+def report():
+    """
+    Imprime las fases por tiempo total y guarda la captura si la hay.
+    """
+    global _profiler
+    if _profiler is not None:
+        if hasattr(_profiler, "dump_stats"):
+            _profiler.disable()
+            _profiler.dump_stats(_output)
+            print(f"Perfil de cProfile guardado en {_output} (python -m pstats {_output})")
+        else:
+            _profiler.stop()
+            ruta = os.path.splitext(_output)[0] + ".html"
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(_profiler.output_html())
+            print(f"Perfil de pyinstrument guardado en {ruta}")
+        _profiler = None
+    datos = stats()
+    if not datos:
+        return
+    print(f"\n{'Fase':<32}{'Llamadas':>9}{'Total s':>10}{'Prom. ms':>10}{'Máx. ms':>10}")
+    for nombre, s in sorted(datos.items(), key=lambda kv: kv[1]["total"], reverse=True):
+        print(f"{nombre[:31]:<32}{s['llamadas']:>9}{s['total']:>10.2f}"
+              f"{s['total'] / s['llamadas'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}")
+
+
+if _enabled:
+    _register()
@@ -0,0 +1,217 @@
+import threading
+import time
+import requests
+from src.func.cat import CatSession
+from src.func.journal import journal
+
+# Controladores de PTT. Todos exponen la misma interfaz:
+#   driver.on() / driver.off()  -> activa o suelta el PTT
+#   driver.latency              -> estadísticas de actuación (segundos)
+# El tipo se elige en cfg.yml, sección 'ptt' (ver create_ptt_driver).
+
+
+class LatencyStats:
+    """
+    Acumula la latencia medida de cada actuación del PTT.
+    """
+    def __init__(self):
+        self.count = 0
+        self.last = None
+        self.min = None
+        self.max = None
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    @property
+    def avg(self):
+        return self.total / self.count if self.count else None
+
+    def as_dict(self):
+        return {"count": self.count, "last": self.last, "min": self.min, "avg": self.avg, "max": self.max}
+
+    def __str__(self):
+        if not self.count:
+            return "sin mediciones"
+        return (f"última {self.last * 1000:.2f} ms, mín {self.min * 1000:.2f} ms, "
+                f"prom {self.avg * 1000:.2f} ms, máx {self.max * 1000:.2f} ms ({self.count} muestras)")
+
+
+class PTTDriver:
+    """
+    Base de los controladores: mide cada actuación y delega en _key(bool).
+    """
+    name = "base"
+
+    def __init__(self):
+        self.latency = LatencyStats()
+        self.state = False
+
+    def _key(self, on):
+        raise NotImplementedError
+
+    def _actuate(self, on):
+        inicio = time.perf_counter()
+        respuesta = self._key(on)
+        self.latency.add(time.perf_counter() - inicio)
+        self.state = on
+        return respuesta
+
+    def on(self):
+        return self._actuate(True)
+
+    def off(self):
+        return self._actuate(False)
+
+    def close(self):
+        pass
+
+
+class HttpPTT(PTTDriver):
+    """
+    PTT vía la API HTTP de src/app.py (GPIO de la Raspberry Pi).
+    Mantiene la concesión del servidor con heartbeats mientras el PTT esté activo.
+    Si el servidor suelta el PTT por su cuenta (concesión vencida o tiempo
+    máximo de transmisión) se llama a 'on_released' (lo asigna el reproductor).
+    """
+    name = "http"
+
+    def __init__(self, base_url, ttl=5, heartbeat=1):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        # Sesión persistente (keep-alive) para no abrir un socket por petición
+        self.session = requests.Session()
+        self._heartbeat_stop = None
+        self.on_released = None
+
+    def _heartbeat_loop(self, stop):
+        """
+        Renueva la concesión cada 'heartbeat' segundos. Si el proceso muere,
+        el hilo muere con él y el servidor suelta el PTT al vencer la concesión.
+        """
+        session = requests.Session()
+        url = f"{self.base_url}/ptt_heartbeat"
+        while not stop.wait(self.heartbeat):
+            try:
+                activo = session.get(url, timeout=self.heartbeat).json().get("ptt", True)
+            except (requests.RequestException, ValueError) as e:
+                print(f"[ptt] Heartbeat fallido: {e}")
+                continue
+            if not activo and not stop.is_set():
+                # El servidor ya soltó el PTT: sin heartbeats hasta el próximo on()
+                stop.set()
+                self.state = False
+                print("[ptt] El servidor soltó el PTT (concesión vencida o tiempo máximo de transmisión)")
+                journal().log("ptt_liberado_servidor", driver=self.name)
+                if self.on_released is not None:
+                    self.on_released()
+        session.close()
+
+    def _key(self, on):
+        if on:
+            response = self.session.get(f"{self.base_url}/ptt_on", params={"ttl": self.ttl}, timeout=self.ttl)
+            if self._heartbeat_stop is None or self._heartbeat_stop.is_set():
+                self._heartbeat_stop = threading.Event()
+                threading.Thread(target=self._heartbeat_loop, args=(self._heartbeat_stop,), daemon=True).start()
+        else:
+            if self._heartbeat_stop is not None:
+                self._heartbeat_stop.set()
+                self._heartbeat_stop = None
+            response = self.session.get(f"{self.base_url}/ptt_off", timeout=self.ttl)
+        if response.status_code == 200:
+            return response.json()
+        return f"Error: {response.status_code}"
+
+    def close(self):
+        if self._heartbeat_stop is not None:
+            self._heartbeat_stop.set()
+        self.session.close()
+
+
+def open_serial(port, baudrate=9600):
+    """
+    Abre el puerto serie con las mismas opciones que ts-2000.py:
+    sin control de flujo y con RTS/DTR inicialmente bajos.
+    """
+    import serial
+    ser = serial.Serial(
+        port=port,
+        baudrate=baudrate,
+        timeout=1,
+        rtscts=False,
+        dsrdtr=False,
+        write_timeout=1
+    )
+    ser.dtr = False
+    ser.rts = False
+    return ser
+
+
+class CatPTT(PTTDriver):
+    """
+    PTT por comandos CAT (TX; / RX;) del Kenwood TS-2000.
+    La latencia medida es la escritura del comando hasta vaciar el buffer.
+    """
+    name = "cat"
+
+    def __init__(self, port, baudrate=9600, ser=None):
+        super().__init__()
+        self.ser = ser or open_serial(port, baudrate)
+        self.cat = CatSession(self.ser)
+
+    def _key(self, on):
+        self.cat.send("TX;" if on else "RX;")
+        return "TX" if on else "RX"
+
+    def close(self):
+        self.ser.close()
+
+
+class SerialPTT(PTTDriver):
+    """
+    PTT por las líneas RTS o DTR del puerto serie (interfaces tipo SignaLink,
+    cable con transistor, etc.). Es la opción de menor latencia.
+    """
+    name = "serial"
+
+    def __init__(self, port, line="rts", invert=False, baudrate=9600, ser=None):
+        super().__init__()
+        if line not in ("rts", "dtr"):
+            raise ValueError("La línea de PTT debe ser 'rts' o 'dtr'.")
+        self.line = line
+        self.invert = invert
+        self.ser = ser or open_serial(port, baudrate)
+
+    def _key(self, on):
+        setattr(self.ser, self.line, on != self.invert)
+        return f"{self.line.upper()} {'ON' if on else 'OFF'}"
+
+    def close(self):
+        setattr(self.ser, self.line, self.invert)
+        self.ser.close()
+
+
+def create_ptt_driver(cfg, default_url=None):
+    """
+    Crea el controlador de PTT a partir de la sección 'ptt' de cfg.yml:
+        tipo: http | cat | serial
+        url, ttl, heartbeat      (http)
+        puerto, baudrate         (cat, serial)
+        linea, invertir          (serial)
+    """
+    cfg = cfg or {}
+    tipo = cfg.get("tipo", "http")
+    if tipo == "http":
+        return HttpPTT(cfg.get("url", default_url), cfg.get("ttl", 5), cfg.get("heartbeat", 1))
+    if tipo == "cat":
+        return CatPTT(cfg["puerto"], cfg.get("baudrate", 9600))
+    if tipo == "serial":
+        return SerialPTT(cfg["puerto"], cfg.get("linea", "rts"), cfg.get("invertir", False), cfg.get("baudrate", 9600))
+    raise ValueError(f"Tipo de PTT desconocido: {tipo}")
@@ -0,0 +1,198 @@
+import os
+import subprocess
+import time
+import numpy as np
+from src.func.ingest import ffmpeg_exe
+from src.func.formats import ffmpeg_args, muxer
+from src.func.mixer import Mixer
+from src.func.profiling import timed
+
+# Exportación del boletín a un solo archivo. Los eventos del plan
+# (timeline.py) se convierten en bloques de PCM que se escriben a la entrada
+# estándar de un FFmpeg codificador, así la memoria usada es de un bloque y
+# no la hora completa. Las alertas se mezclan sobre el programa en el bloque
+# que les toca, atenuándolo alrededor de ellas (mixer.py). Los cambios de
+# PTT se anotan en una hoja de cues.
+
+# Códec por extensión del archivo de salida
+ENCODERS = {
+    ".wav": ["-c:a", "pcm_s16le"],
+    ".mp3": ["-c:a", "libmp3lame", "-b:a", "192k"],
+    ".opus": ["-c:a", "libopus", "-b:a", "32k", "-application", "voip"],
+    ".ogg": ["-c:a", "libopus", "-b:a", "32k", "-application", "voip"],
+    ".ul": ["-c:a", "pcm_mulaw", "-f", "mulaw"],
+}
+
+# Tipo de FILE de la hoja .cue según el contenedor que escribe FFmpeg; los
+# crudos (ulaw, s16le) van como BINARY
+CUE_TYPES = {"wav": "WAVE", "mp3": "MP3", "ogg": "OGG", "opus": "OGG"}
+
+
+def encoder_cmd(output, sample_rate, channels, fmt=None):
+    """
+    Codificador para 'output'. Si la extensión coincide con 'fmt' (ver
+    formats.py) se usa ese formato; si no, el códec por extensión.
+    """
+    ext = os.path.splitext(output)[1].lower()
+    if fmt is not None and ext == "." + fmt["ext"]:
+        codec = ffmpeg_args(fmt)
+    elif ext in ENCODERS:
+        codec = ENCODERS[ext]
+    else:
+        raise ValueError(f"Formato de exportación no soportado: {ext} (usa {', '.join(ENCODERS)})")
+    return [ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "-",
+            *codec, output]
+
+
+class Renderer:
+    """
+    Escribe bloques de PCM int16 al codificador y lleva la cuenta de la
+    posición de salida en muestras (sin deriva por redondeos).
+    """
+    def __init__(self, output, cache, block=1.0, fmt=None, mixer=None):
+        self.cache = cache
+        self.mixer = mixer or Mixer(cache.sample_rate)
+        self.sample_rate = cache.sample_rate
+        self.channels = cache.channels
+        self.block_frames = int(block * self.sample_rate)
+        self.frames = 0
+        self._clips = {}
+        self._proc = subprocess.Popen(encoder_cmd(output, self.sample_rate, self.channels, fmt),
+                                      stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    @property
+    def position(self):
+        return self.frames / self.sample_rate
+
+    def write(self, data):
+        self._proc.stdin.write(data)
+        self.frames += len(data) // (2 * self.channels)
+
+    def silence(self, seconds):
+        restantes = int(round(seconds * self.sample_rate))
+        bloque = bytes(self.block_frames * 2 * self.channels)
+        while restantes > 0:
+            n = min(restantes, self.block_frames)
+            self.write(bloque[:n * 2 * self.channels])
+            restantes -= n
+
+    def load_clip(self, archivo):
+        """
+        Clip corto completo (alertas) como arreglo (muestras, canales).
+        """
+        if archivo not in self._clips:
+            self._clips[archivo] = self.cache.samples(archivo)
+        return self._clips[archivo]
+
+    def _write_samples(self, buf, overlays):
+        # En función aparte: al volver se liberan las vistas sobre el mmap
+        muestras = np.frombuffer(buf.view, dtype=np.int16).reshape(-1, self.channels)
+        for inicio in range(0, len(muestras), self.block_frames):
+            if overlays:
+                bloque = self.mixer.mix(muestras, inicio, self.block_frames, overlays)
+            else:
+                bloque = muestras[inicio:inicio + self.block_frames]
+            self.write(bloque.tobytes())
+
+    def clip(self, evento):
+        buf = self.cache.open(evento["archivo"], evento["inicio"], evento["fin"])
+        overlays = [(int(o * self.sample_rate), self.load_clip(a)) for o, a in evento.get("alertas", [])]
+        self._write_samples(buf, overlays)
+        buf.close()
+
+    def close(self):
+        self._proc.stdin.close()
+        error = self._proc.stderr.read().decode(errors="ignore")
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"FFmpeg falló al codificar: {error.strip()}")
+
+    def abort(self):
+        """
+        Detiene el codificador tras un error, sin lanzar otro que lo tape.
+        """
+        self._proc.kill()
+        for tubo in (self._proc.stdin, self._proc.stderr):
+            try:
+                tubo.close()
+            except OSError:
+                pass
+        self._proc.wait()
+
+
+@timed("render")
+def render_timeline(eventos, output, cache, pause_gap=None, fmt=None, mixer=None):
+    """
+    Renderiza el plan a 'output'. Con pause_gap, los silencios con PTT
+    apagado se acortan a ese valor (útil para podcast). Devuelve la lista de
+    cues [{"tiempo", "ptt", "nombre"}] y la duración total.
+    """
+    r = Renderer(output, cache, fmt=fmt, mixer=mixer)
+    cues = []
+    ptt_on = False
+    pendiente = None   # cue de PTT on que espera el nombre del siguiente clip
+    try:
+        for e in eventos:
+            if e["tipo"] == "ptt":
+                ptt_on = e["estado"] == "on"
+                cue = {"tiempo": r.position, "ptt": e["estado"], "nombre": None}
+                cues.append(cue)
+                pendiente = cue if ptt_on else None
+            elif e["tipo"] == "silencio":
+                duracion = e["duracion"]
+                if pause_gap is not None and not ptt_on:
+                    duracion = min(duracion, pause_gap)
+                r.silence(duracion)
+            elif e["tipo"] == "clip":
+                if pendiente is not None:
+                    pendiente["nombre"] = e["nombre"]
+                    pendiente = None
+                r.clip(e)
+    except BaseException:
+        r.abort()
+        raise
+    r.close()
+    return cues, r.position
+
+
+def cue_time(seconds):
+    """
+    mm:ss:ff (75 cuadros por segundo) para hojas .cue.
+    """
+    cuadros = int(round(seconds * 75))
+    return f"{cuadros // 4500:02d}:{cuadros // 75 % 60:02d}:{cuadros % 75:02d}"
+
+
+def write_cue_sheet(cues, output, titulo="Boletín HAMNA", fmt=None):
+    """
+    Hoja .cue junto al archivo: un TRACK por cada transmisión (PTT on) y las
+    caídas de PTT como líneas REM PTT_OFF. El tipo de archivo sale del
+    formato 'fmt' si coincide con la extensión (como en encoder_cmd).
+    """
+    ext = os.path.splitext(output)[1].lower().lstrip(".")
+    if fmt is None or fmt["ext"] != ext:
+        fmt = {"ext": ext}
+    tipo = CUE_TYPES.get(muxer(fmt), "BINARY")
+    lineas = ['REM GENERATOR "HAMNA"', f'TITLE "{titulo}"', f'FILE "{os.path.basename(output)}" {tipo}']
+    pista = 0
+    for cue in cues:
+        if cue["ptt"] == "on":
+            pista += 1
+            lineas += [f"  TRACK {pista:02d} AUDIO", f'    TITLE "{cue["nombre"] or "transmision"}"',
+                       f"    INDEX 01 {cue_time(cue['tiempo'])}"]
+        else:
+            lineas.append(f"    REM PTT_OFF {cue_time(cue['tiempo'])}")
+    ruta = os.path.splitext(output)[0] + ".cue"
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    return ruta
+
+
+def export_bulletin(eventos, output, cache, pause_gap=None, fmt=None, mixer=None):
+    inicio = time.monotonic()
+    cues, duracion = render_timeline(eventos, output, cache, pause_gap, fmt, mixer)
+    hoja = write_cue_sheet(cues, output, fmt=fmt)
+    transcurrido = time.monotonic() - inicio
+    print(f"Exportado {output} ({duracion / 60:.1f} min) y {hoja} en {transcurrido:.1f} s "
+          f"({duracion / max(transcurrido, 1e-9):.0f}x tiempo real)")
+    return cues
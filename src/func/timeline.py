@@ -0,0 +1,404 @@
+import os
+import time
+from src.func.formats import output_format
+from src.func.functions import convert_hhmmss_to_seconds, convert_seconds_to_hhmmss, file_duration
+from src.func.tones import CUE_DIR, cue_file
+
+# Plan de ejecución del boletín como una lista de eventos, con la misma
+# secuencia que reproduce cor.py en vivo:
+#   {"tipo": "ptt", "estado": "on" | "off"}
+#   {"tipo": "silencio", "duracion": s}
+#   {"tipo": "clip", "archivo": ruta, "inicio": s, "fin": s, "nombre": str,
+#    "alertas": [(segundos desde el inicio del clip, ruta), ...]}
+#   {"tipo": "marca", "punto": clave}   (solo al planear la identificación)
+# Lo usan la exportación (render.py) y el cálculo de tiempos de PTT.
+
+# Esperas fijas de cor.py (segundos)
+PTT_LEAD = 2          # PTT on -> inicio del audio
+MESSAGE_TAIL = 1.5    # margen tras cada mensaje antes de seguir
+PAUSE_LEAD = 1        # pausa del audio -> mensaje de pausa
+RESUME_LEAD = 1       # PTT on -> mensaje de continuamos
+AFTER_INTRO = 6       # PTT off tras la entrada
+SECTION_TAIL = 2      # fin de sección -> PTT off
+AFTER_SECTION = 8     # PTT off entre secciones
+
+# Nombres de los clips de aviso dentro de una sección
+ALERT_NAMES = ("pausa", "continuamos")
+
+# Tramo mínimo antes de la primera pausa de una sección a la que se llega con
+# el PTT encendido (s); más corto, conviene soltar el PTT entre secciones
+MIN_STRETCH = 30
+
+# Máximo al aire entre dos identificaciones de la estación (s)
+STATION_ID_INTERVAL = 600
+
+
+def alert_files(config):
+    """
+    Rutas de las alertas por nombre ('pause_alert', 'pause', 'continuamos').
+    Las que se definen con 'tono' se sintetizan (una sola vez) a WAV en
+    media_path/.tonos.
+    """
+    media_path = config["general"]["media_path"]
+    sample_rate = output_format(config, "reproduccion")["sample_rate"]
+    rutas = {}
+    for a in config.get("alertas", []):
+        if "tono" in a:
+            rutas[a["nombre"]] = cue_file(a["tono"], os.path.join(media_path, CUE_DIR), sample_rate)
+        else:
+            rutas[a["nombre"]] = os.path.join(media_path, a["archivo"])
+    return rutas
+
+
+def clip(archivo, inicio=0.0, fin=None, nombre=None, alertas=None):
+    fin = file_duration(archivo) if fin is None else fin
+    return {"tipo": "clip", "archivo": archivo, "inicio": inicio, "fin": fin,
+            "nombre": nombre or os.path.basename(archivo), "alertas": alertas or []}
+
+
+def silence(duracion):
+    return {"tipo": "silencio", "duracion": duracion}
+
+
+def ptt_event(estado):
+    return {"tipo": "ptt", "estado": estado}
+
+
+def section_cuts(inicio, fin, limite, retroceso, carga=0.0, encadenada=False):
+    """
+    Posiciones (s del archivo) donde pausar el tramo [inicio, fin] para que
+    ninguna transmisión pase de 'limite' s de audio, llegando con 'carga' s
+    ya al aire. Cada pausa se hace lo más tarde posible. Retorna
+    (cortes, carga al terminar), o None si la sección llega 'encadenada'
+    (sin soltar PTT) y su primer tramo quedaría más corto que MIN_STRETCH.
+    Lanza ValueError si la carga no deja ni un tramo más largo que el
+    retroceso antes de la primera pausa.
+    """
+    if limite <= retroceso:
+        raise ValueError("duraciones.reproduccion debe ser mayor que duraciones.retroceso")
+    minimo = min(MIN_STRETCH, limite - retroceso)
+    cortes, pos = [], inicio
+    while carga + (fin - pos) > limite:
+        tramo = limite - carga
+        if tramo < minimo and encadenada:
+            return None
+        # Tras un anuncio largo el primer tramo puede quedar corto, pero la
+        # transmisión nunca pasa del límite
+        if tramo <= retroceso:
+            if encadenada:
+                return None
+            raise ValueError(f"{carga:.1f} s de audio fijo no dejan tramo antes de pausar: "
+                             "aumente duraciones.reproduccion o acorte el anuncio")
+        cortes.append(pos + tramo)
+        pos = pos + tramo - retroceso
+        carga, encadenada = 0.0, False
+    return cortes, carga + fin - pos
+
+
+def mark(punto):
+    # Punto al aire donde el plan puede identificar la estación (no suena)
+    return {"tipo": "marca", "punto": punto}
+
+
+def section_events(section, duraciones, alertas, pausas=None, indice=None):
+    """
+    Eventos de una sección: tramos separados por pausas (mensaje, PTT off,
+    espera, PTT on, continuamos) con retroceso. 'pausas' son las posiciones
+    del plan; sin ellas se pausa cada 'reproduccion' segundos. Con 'indice'
+    se marca cada pausa como punto de identificación ("pausa:<indice>:<n>").
+    """
+    play_duration = duraciones["reproduccion"]
+    pause_duration = duraciones["pausa"]
+    alert_time = duraciones["alerta"]
+    rewind_time = duraciones["retroceso"]
+
+    archivo = section["archivo"]
+    start_time = convert_hhmmss_to_seconds(section["inicio"])
+    end_time = convert_hhmmss_to_seconds(section["fin"])
+    nombre = section["nombre"]
+
+    if pausas is None:
+        pausas = section_cuts(start_time, end_time, play_duration, rewind_time)[0]
+    if not pausas:
+        return [clip(archivo, start_time, end_time, nombre)]
+
+    eventos = []
+    pos = start_time
+    for n, corte in enumerate([*pausas, end_time]):
+        avisos = []
+        if corte < end_time and "pause_alert" in alertas and corte - pos > alert_time:
+            avisos.append((corte - pos - alert_time, alertas["pause_alert"]))
+        eventos.append(clip(archivo, pos, corte, nombre, avisos))
+        if corte >= end_time:
+            break
+        eventos.append(silence(PAUSE_LEAD))
+        if "pause" in alertas:
+            eventos.append(clip(alertas["pause"], nombre=ALERT_NAMES[0]))
+        eventos.append(silence(MESSAGE_TAIL))
+        if indice is not None:
+            eventos.append(mark(f"pausa:{indice}:{n}"))
+        eventos += [ptt_event("off"), silence(pause_duration), ptt_event("on"), silence(RESUME_LEAD)]
+        if "continuamos" in alertas:
+            eventos += [clip(alertas["continuamos"], nombre=ALERT_NAMES[1]), silence(MESSAGE_TAIL)]
+        pos = corte - rewind_time
+    return eventos
+
+
+def _pareto(opciones):
+    """
+    Descarta las opciones con más pausas, más caídas de PTT y más carga que otra.
+    """
+    vigentes = []
+    for o in sorted(opciones, key=lambda o: o[:3]):
+        if not any(v[0] <= o[0] and v[1] <= o[1] and v[2] <= o[2] for v in vigentes):
+            vigentes.append(o)
+    return vigentes
+
+
+def plan_pauses(config, entrada, salida, anuncios=None, modo=None, identificacion=None):
+    """
+    Plan de pausas del boletín. Con 'duraciones.planificacion: global' el
+    boletín es una sola línea de tiempo: entre cada par de bloques (entrada,
+    secciones con su anuncio, salida) se decide soltar el PTT (una pausa
+    gratis: no corta audio) o seguir al aire arrastrando lo transmitido, y
+    se elige lo que da menos pausas dentro de secciones y luego menos caídas
+    de PTT, sin que ninguna transmisión pase de 'reproduccion' s de audio
+    (mensajes de pausa y esperas fijas aparte). Con 'seccion' se pausa como
+    antes: cada 'reproduccion' s desde el inicio de cada sección. Con el
+    clip de 'identificacion' se agregan los puntos donde identificar la
+    estación (ver schedule_station_ids).
+    Retorna {"modo", "entrada_continua", "secciones": [{"nombre", "pausas",
+    "continua"}], "pausas", "transmisiones", "identificacion",
+    "identificaciones", "calculo_ms"}.
+    """
+    inicio_calculo = time.perf_counter()
+    anuncios = anuncios or {}
+    duraciones = config["duraciones"]
+    maximo, retroceso = duraciones["reproduccion"], duraciones["retroceso"]
+    modo = modo or duraciones.get("planificacion", "global")
+    id_cfg = config.get("identificacion") or {}
+    al_final = id_cfg.get("al_final", True)
+
+    # La identificación se inserta después, en puntos del plan: cada
+    # transmisión reserva lugar para una (y la última para otra si se
+    # identifica al final), así con ella no pasa de 'reproduccion'
+    reserva = file_duration(identificacion) if identificacion else 0.0
+    limite = maximo - reserva
+    if limite <= retroceso:
+        raise ValueError("La identificación no cabe en duraciones.reproduccion")
+
+    # Bloques: (audio fijo al inicio, inicio, fin) del tramo que se puede pausar
+    bloques = [(file_duration(entrada), 0, 0)]
+    for s in config["secciones"]:
+        anuncio = file_duration(anuncios[s["nombre"]]) if s["nombre"] in anuncios else 0.0
+        bloques.append((anuncio, convert_hhmmss_to_seconds(s["inicio"]), convert_hhmmss_to_seconds(s["fin"])))
+    bloques.append((file_duration(salida) + (reserva if al_final else 0.0), 0, 0))
+
+    if modo == "seccion":
+        decisiones = [(False, [])] + [(False, section_cuts(i, f, limite, retroceso)[0]) for _, i, f in bloques[1:-1]] \
+                     + [(False, [])]
+    elif modo == "global":
+        # Opciones tras cada bloque: (pausas, caídas de PTT, carga, decisiones)
+        opciones = [(0, 0, 0.0, [])]
+        for j, (fijo, inicio, fin) in enumerate(bloques):
+            nuevas = []
+            for pausas, caidas, carga, decisiones in opciones:
+                for seguir in ((False, True) if j else (False,)):
+                    previa = carga + fijo if seguir else fijo
+                    if inicio == fin:
+                        # Mensaje sin pausas posibles: solo se encadena si cabe
+                        if seguir and previa > limite:
+                            continue
+                        resultado = ([], previa)
+                    else:
+                        resultado = section_cuts(inicio, fin, limite, retroceso, previa, seguir)
+                        if resultado is None:
+                            continue
+                    cortes, carga_final = resultado
+                    nuevas.append((pausas + len(cortes), caidas + (j > 0 and not seguir), carga_final,
+                                   decisiones + [(seguir, cortes)]))
+            opciones = _pareto(nuevas)
+        decisiones = min(opciones, key=lambda o: o[:3])[3]
+    else:
+        raise ValueError(f"duraciones.planificacion desconocida: {modo} (global | seccion)")
+
+    secciones = [{"nombre": s["nombre"], "pausas": decisiones[k + 1][1], "continua": decisiones[k + 2][0]}
+                 for k, s in enumerate(config["secciones"])]
+    plan = {
+        "modo": modo,
+        "entrada_continua": decisiones[1][0],
+        "secciones": secciones,
+        "pausas": sum(len(s["pausas"]) for s in secciones),
+        "identificacion": identificacion,
+        "identificaciones": [],
+    }
+    # Las transmisiones se cuentan sobre la línea de tiempo que se va a
+    # reproducir (la identificación no suelta el PTT: no cambia la cuenta)
+    eventos = _timeline(config, entrada, salida, anuncios, plan)
+    plan["transmisiones"] = len(transmissions(eventos))
+    if identificacion:
+        plan["identificaciones"] = schedule_station_ids(
+            eventos, float(id_cfg.get("intervalo", STATION_ID_INTERVAL)), reserva, al_final)
+        # Solo con un intervalo muy corto caben dos identificaciones en una
+        # transmisión que no sea la última: no se sale al aire pasado del límite
+        carga = max(transmission_loads(eventos, plan["identificaciones"], reserva))
+        if carga > maximo + 1e-6:
+            raise ValueError(f"Con la identificación una transmisión llega a {carga:.1f} s "
+                             f"(más que duraciones.reproduccion): aumente identificacion.intervalo")
+    plan["calculo_ms"] = round((time.perf_counter() - inicio_calculo) * 1000, 2)
+    return plan
+
+
+def schedule_station_ids(eventos, intervalo, duracion, al_final=True):
+    """
+    Puntos donde identificar la estación para que entre dos
+    identificaciones no pasen más de 'intervalo' s al aire (contando solo
+    lo transmitido con PTT encendido). Recorre las marcas de la línea de
+    tiempo e identifica en la última antes de que venza el intervalo, y con
+    'al_final' también en la última del boletín. Retorna las claves en orden.
+    """
+    puntos, al_aire, transmitido = [], False, 0.0
+    for e in eventos:
+        if e["tipo"] == "ptt":
+            al_aire = e["estado"] == "on"
+        elif e["tipo"] == "marca":
+            puntos.append((e["punto"], transmitido))
+        elif al_aire:
+            transmitido += timeline_duration([e])
+
+    # Cada identificación agrega su clip y su margen a lo que sigue al aire
+    elegidos, ultima, agregado = [], 0.0, 0.0
+    for n, (punto, t) in enumerate(puntos):
+        final = n == len(puntos) - 1
+        if final:
+            elegir = al_final
+        else:
+            elegir = puntos[n + 1][1] + agregado + duracion - ultima > intervalo
+        if elegir:
+            elegidos.append(punto)
+            agregado += duracion + MESSAGE_TAIL
+            ultima = t + agregado
+    return elegidos
+
+
+def transmission_loads(eventos, identificaciones=(), duracion=0.0):
+    """
+    Audio de cada transmisión de la línea de tiempo con marcas, como lo
+    cuenta el plan: sin mensajes de pausa ni silencios, con 'duracion' s por
+    cada identificación en 'identificaciones'.
+    """
+    cargas, al_aire = [], False
+    for e in eventos:
+        if e["tipo"] == "ptt":
+            al_aire = e["estado"] == "on"
+            if al_aire:
+                cargas.append(0.0)
+        elif not al_aire:
+            continue
+        elif e["tipo"] == "marca" and e["punto"] in identificaciones:
+            cargas[-1] += duracion
+        elif e["tipo"] == "clip" and e.get("nombre") not in ALERT_NAMES:
+            cargas[-1] += e["fin"] - e["inicio"]
+    return cargas
+
+
+def print_plan(plan, referencia=None):
+    """
+    Muestra el plan antes de salir al aire (y la comparación con 'referencia').
+    """
+    print(f"\n           Plan de pausas ({plan['modo']}, calculado en {plan['calculo_ms']} ms):")
+    ids = set(plan.get("identificaciones", ()))
+    print(f"             Entrada{' [ID]' if 'entrada' in ids else ''}{'  -> sigue al aire' if plan['entrada_continua'] else ''}")
+    for n, s in enumerate(plan["secciones"]):
+        pausas = ", ".join(convert_seconds_to_hhmmss(p) + (" [ID]" if f"pausa:{n}:{k}" in ids else "")
+                           for k, p in enumerate(s["pausas"])) or "sin pausas"
+        print(f"             {n + 1}. {s['nombre']}: {pausas}{', ID al terminar' if f'seccion:{n}' in ids else ''}"
+              f"{'  -> sigue al aire' if s['continua'] else ''}")
+    if ids:
+        print(f"             Salida{' [ID]' if 'salida' in ids else ''}")
+    resumen = f"{plan['transmisiones']} transmisiones, {plan['pausas']} pausas dentro de secciones"
+    if ids:
+        resumen += f", {len(ids)} identificaciones"
+    if referencia is not None:
+        resumen += f" (por sección: {referencia['transmisiones']} y {referencia['pausas']})"
+    print(f"           {resumen}\n")
+
+
+def _timeline(config, entrada, salida, anuncios, plan):
+    # Línea de tiempo con una marca en cada punto de identificación posible:
+    # tras la entrada, cada pausa, cada sección y la salida (antes de soltar
+    # el PTT o de seguir con el bloque siguiente)
+    duraciones = config["duraciones"]
+    alertas = alert_files(config)
+
+    eventos = [ptt_event("on"), silence(PTT_LEAD), clip(entrada, nombre="entrada"), silence(MESSAGE_TAIL),
+               mark("entrada")]
+    al_aire = plan["entrada_continua"]
+    if not al_aire:
+        eventos += [ptt_event("off"), silence(AFTER_INTRO)]
+    for indice, (section, planeada) in enumerate(zip(config["secciones"], plan["secciones"])):
+        if not al_aire:
+            eventos += [ptt_event("on"), silence(PTT_LEAD)]
+        if section["nombre"] in anuncios:
+            eventos += [clip(anuncios[section["nombre"]], nombre=section["nombre"]), silence(MESSAGE_TAIL)]
+        eventos += section_events(section, duraciones, alertas, planeada["pausas"], indice)
+        eventos += [silence(SECTION_TAIL), mark(f"seccion:{indice}")]
+        al_aire = planeada["continua"]
+        if not al_aire:
+            eventos += [ptt_event("off"), silence(AFTER_SECTION)]
+    if not al_aire:
+        eventos += [ptt_event("on"), silence(PTT_LEAD)]
+    eventos += [clip(salida, nombre="salida"), silence(MESSAGE_TAIL), mark("salida"), ptt_event("off")]
+    return eventos
+
+
+def build_timeline(config, entrada, salida, anuncios=None, plan=None):
+    """
+    Plan completo: entrada, cada sección (precedida de su anuncio si hay uno
+    en 'anuncios' {nombre: ruta}) y salida, con sus eventos de PTT según el
+    plan de pausas ('plan' o el que dé plan_pauses) y la identificación de
+    la estación en los puntos que eligió el plan.
+    """
+    anuncios = anuncios or {}
+    plan = plan or plan_pauses(config, entrada, salida, anuncios)
+    identificaciones = set(plan.get("identificaciones", ()))
+    eventos = []
+    for e in _timeline(config, entrada, salida, anuncios, plan):
+        if e["tipo"] != "marca":
+            eventos.append(e)
+        elif e["punto"] in identificaciones:
+            eventos += [clip(plan["identificacion"], nombre="identificacion"), silence(MESSAGE_TAIL)]
+    return eventos
+
+
+def timeline_duration(eventos):
+    total = 0.0
+    for e in eventos:
+        if e["tipo"] == "clip":
+            total += e["fin"] - e["inicio"]
+        elif e["tipo"] == "silencio":
+            total += e["duracion"]
+    return total
+
+
+def transmissions(eventos):
+    """
+    Agrupa el plan en transmisiones (lo que va entre PTT on y PTT off).
+    Devuelve [{"nombre", "eventos", "espera"}], donde 'espera' es el
+    silencio con PTT apagado que sigue a cada una.
+    """
+    grupos, actual = [], None
+    for e in eventos:
+        if e["tipo"] == "ptt":
+            if e["estado"] == "on":
+                actual = {"nombre": None, "eventos": [], "espera": 0.0}
+                grupos.append(actual)
+            else:
+                actual = None
+        elif actual is not None:
+            if actual["nombre"] is None and e["tipo"] == "clip" and e["nombre"] not in ALERT_NAMES:
+                actual["nombre"] = e["nombre"]
+            actual["eventos"].append(e)
+        elif e["tipo"] == "silencio" and grupos:
+            grupos[-1]["espera"] += e["duracion"]
+    return grupos
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import wave
+import numpy as np
+
+# Síntesis de tonos con NumPy: la identificación en CW (Morse) y las alertas
+# del boletín (bips, tonos de cortesía, pips de cuenta regresiva) a partir de
+# parámetros de cfg.yml. Todo el clip se arma con operaciones sobre arreglos
+# completos: la secuencia de notas se expande a frecuencia por muestra con
+# np.repeat, la fase sale de una suma acumulada (sin saltos entre notas), y
+# los flancos se suavizan con una rampa de coseno alzado (sin clics). Cada
+# clip se genera una vez por juego de parámetros (caché por hash).
+
+MORSE = {
+    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".", "F": "..-.", "G": "--.", "H": "....",
+    "I": "..", "J": ".---", "K": "-.-", "L": ".-..", "M": "--", "N": "-.", "O": "---", "P": ".--.",
+    "Q": "--.-", "R": ".-.", "S": "...", "T": "-", "U": "..-", "V": "...-", "W": ".--", "X": "-..-",
+    "Y": "-.--", "Z": "--..",
+    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-", "5": ".....", "6": "-....",
+    "7": "--...", "8": "---..", "9": "----.",
+    "/": "-..-.", "?": "..--..", ".": ".-.-.-", ",": "--..--", "=": "-...-", "-": "-....-",
+}
+
+RAMP = 0.005    # subida y bajada de cada elemento (s)
+CUE_DIR = ".tonos"
+CUE_TYPES = ("bip", "cortesia", "pips", "cw")
+
+# PCM de las alertas ya sintetizadas, por hash de parámetros y frecuencia
+_cues = {}
+
+
+def morse_units(texto):
+    """
+    Secuencia de (manipulado, unidades) del texto: punto 1, raya 3, espacio
+    entre elementos 1, entre letras 3 y entre palabras 7. Los caracteres sin
+    código se omiten.
+    """
+    unidades = []
+    for palabra in texto.upper().split():
+        letras = [MORSE[c] for c in palabra if c in MORSE]
+        if not letras:
+            continue
+        if unidades:
+            unidades.append((0, 7))
+        for n, codigo in enumerate(letras):
+            if n:
+                unidades.append((0, 3))
+            for m, elemento in enumerate(codigo):
+                if m:
+                    unidades.append((0, 1))
+                unidades.append((1, 1 if elemento == "." else 3))
+    return unidades
+
+
+def morse_notes(texto, wpm=20, tono=700):
+    """
+    Notas del texto en Morse a 'wpm' palabras por minuto (PARIS: un punto
+    dura 1.2/wpm s).
+    """
+    punto = 1.2 / wpm
+    return [(tono if manipulado else 0, n * punto) for manipulado, n in morse_units(texto)]
+
+
+def tone_sequence(notas, sample_rate, amplitud=0.5, rampa=RAMP):
+    """
+    Audio de una secuencia de notas [(frecuencia, segundos), ...] como
+    float32 mono en escala int16; frecuencia 0 es silencio. Notas seguidas
+    sin silencio cambian de tono sin cortar la fase.
+    """
+    if not notas:
+        return np.zeros(0, dtype=np.float32)
+    frecuencias = np.array([f for f, _ in notas], dtype=np.float64)
+    largos = np.round(np.array([d for _, d in notas], dtype=np.float64) * sample_rate).astype(np.int64)
+    # Con margen para que la primera y la última nota no queden cortadas
+    n_rampa = max(int(rampa * sample_rate), 1)
+    f = np.pad(np.repeat(frecuencias, largos), n_rampa, mode="edge")
+    compuerta = np.pad(np.repeat((frecuencias > 0).astype(np.float32), largos), n_rampa)
+
+    # Flancos suaves: convolución con una ventana de Hann normalizada
+    ventana = np.hanning(n_rampa + 2)[1:-1].astype(np.float32)
+    envolvente = np.convolve(compuerta, ventana / ventana.sum(), mode="same")
+    fase = 2 * np.pi * np.cumsum(f) / sample_rate
+    return (np.sin(fase) * envolvente * (amplitud * 32767)).astype(np.float32)
+
+
+def cw(texto, sample_rate, wpm=20, tono=700, amplitud=0.5, rampa=RAMP):
+    """
+    Audio de CW del texto como float32 mono en escala int16.
+    """
+    return tone_sequence(morse_notes(texto, wpm, tono), sample_rate, amplitud, rampa)
+
+
+def cue_notes(spec):
+    """
+    Notas de una alerta según su 'tono' en cfg.yml:
+      {tipo: bip, frecuencia, duracion}
+      {tipo: cortesia, notas: [[frecuencia, segundos], ...]}
+      {tipo: pips, cantidad, frecuencia, duracion, separacion, final}
+      {tipo: cw, texto, wpm, frecuencia}
+    """
+    tipo = spec.get("tipo", "bip")
+    if tipo == "bip":
+        return [(spec.get("frecuencia", 1000), spec.get("duracion", 0.3))]
+    if tipo == "cortesia":
+        return [(float(f), float(d)) for f, d in spec["notas"]]
+    if tipo == "pips":
+        frecuencia, duracion = spec.get("frecuencia", 1000), spec.get("duracion", 0.1)
+        notas = []
+        for n in range(int(spec.get("cantidad", 3))):
+            if n:
+                notas.append((0, spec.get("separacion", 0.9)))
+            notas.append((frecuencia, duracion))
+        if "final" in spec:
+            # Último pip más largo y en otro tono, como la señal horaria
+            notas[-1] = (spec["final"], spec.get("duracion_final", 3 * duracion))
+        return notas
+    if tipo == "cw":
+        return morse_notes(spec["texto"], spec.get("wpm", 20), spec.get("frecuencia", 700))
+    raise ValueError(f"Tipo de tono desconocido: {tipo} ({' | '.join(CUE_TYPES)})")
+
+
+def cue_hash(spec, sample_rate):
+    clave = json.dumps({**spec, "sample_rate": sample_rate}, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(clave, digest_size=16).hexdigest()
+
+
+def cue_pcm(spec, sample_rate):
+    """
+    PCM de la alerta (float32 mono en escala int16), sintetizado una vez
+    por juego de parámetros.
+    """
+    clave = cue_hash(spec, sample_rate)
+    if clave not in _cues:
+        _cues[clave] = tone_sequence(cue_notes(spec), sample_rate, spec.get("volumen", 0.5),
+                                     spec.get("rampa", RAMP))
+    return _cues[clave]
+
+
+def cue_bytes(spec, sample_rate, channels):
+    """
+    La alerta como PCM s16le intercalado, listo para
+    pygame.mixer.Sound(buffer=...): sin archivo ni decodificación.
+    """
+    pcm = cue_pcm(spec, sample_rate)
+    return np.repeat(np.round(pcm).astype(np.int16)[:, None], channels, axis=1).tobytes()
+
+
+def cue_file(spec, directorio, sample_rate):
+    """
+    WAV de la alerta en 'directorio' con nombre por hash de sus parámetros,
+    para lo que trabaja con rutas (línea de tiempo, exportación, AllStar).
+    Solo se escribe si no existe. Retorna su ruta.
+    """
+    ruta = os.path.join(directorio, f"{cue_hash(spec, sample_rate)}.wav")
+    if not os.path.exists(ruta):
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f"{ruta}.tmp"
+        with wave.open(temporal, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sample_rate)
+            w.writeframes(np.round(cue_pcm(spec, sample_rate)).astype(np.int16).tobytes())
+        os.replace(temporal, ruta)
+    return ruta
@@ -1,26 +1,238 @@
-import pyttsx3
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from src.func.profiling import timed
+
+# Servicio de TTS con motores intercambiables (pyttsx3, espeak-ng, Piper).
+# Todos sintetizan a WAV con la misma API y comparten una caché en disco
+# indexada por hash de (motor, voz, velocidad, texto): un mensaje que no
+# cambió no se vuelve a sintetizar. Cada archivo se escribe a un temporal y
+# se renombra al terminar, así quien lo recibe sabe que está completo.
+
+CACHE_DIR = ".tts_cache"
+
+
+class TTSError(Exception):
+    pass
+
+
+class Pyttsx3Engine:
+    """
+    Motor del sistema (SAPI5/NSSpeech/espeak) vía pyttsx3. Se inicializa una
+    sola vez por proceso y la voz en español se busca una sola vez. No es
+    seguro entre hilos: el servicio lo usa en procesos.
+    """
+    name = "pyttsx3"
+    thread_safe = False
+
+    def __init__(self, velocidad=120, voz=None):
+        self.velocidad = velocidad
+        self.voz = voz
+        self._engine = None
+
+    def key(self):
+        # Con la voz configurada, no la que elige _init(): la clave no cambia
+        # si el motor de este proceso ya se inicializó o no
+        return f"{self.name}|{self.voz or 'auto'}|{self.velocidad}"
+
+    def _init(self):
+        import pyttsx3
+        # Inicializa el motor TTS
+        engine = pyttsx3.init()
+        # Configura la velocidad del habla
+        engine.setProperty('rate', self.velocidad)
+        activa = self.voz
+        if activa is None:
+            # Busca y selecciona una voz en español
+            for voz in engine.getProperty('voices'):
+                if "spanish" in voz.languages or "es" in voz.id.lower():
+                    activa = voz.id
+                    break
+            else:
+                print("Advertencia: No se encontró una voz en español. Usando la predeterminada.")
+        if activa:
+            engine.setProperty('voice', activa)
+        self._engine = engine
+
+    def synthesize(self, text, output_file):
+        if self._engine is None:
+            self._init()
+        self._engine.save_to_file(text, output_file)
+        # Ejecuta el motor y espera a que termine
+        self._engine.runAndWait()
+
+
+class EspeakEngine:
+    """
+    espeak-ng por línea de comandos; cada síntesis es un proceso aparte.
+    """
+    name = "espeak-ng"
+    thread_safe = True
+
+    def __init__(self, velocidad=120, voz="es-419"):
+        self.velocidad = velocidad
+        self.voz = voz or "es-419"
+        self.exe = shutil.which("espeak-ng") or shutil.which("espeak") or "espeak-ng"
+
+    def key(self):
+        return f"{self.name}|{self.voz}|{self.velocidad}"
+
+    def synthesize(self, text, output_file):
+        subprocess.run([self.exe, "-v", self.voz, "-s", str(self.velocidad), "-w", output_file, "--stdin"],
+                       input=text.encode("utf-8"), check=True, capture_output=True)
+
+
+class PiperEngine:
+    """
+    Voz neuronal local con Piper (modelo .onnx). La velocidad se traduce a
+    length_scale tomando 150 palabras por minuto como velocidad normal.
+    """
+    name = "piper"
+    thread_safe = True
+
+    def __init__(self, velocidad=120, voz=None, modelo=None):
+        if not modelo:
+            raise TTSError("El motor piper necesita 'modelo' (ruta al .onnx) en la sección tts de cfg.yml")
+        self.velocidad = velocidad
+        self.voz = voz
+        self.modelo = modelo
+        self.exe = shutil.which("piper") or "piper"
+
+    def key(self):
+        return f"{self.name}|{os.path.basename(self.modelo)}|{self.voz}|{self.velocidad}"
+
+    def synthesize(self, text, output_file):
+        cmd = [self.exe, "--model", self.modelo, "--output_file", output_file,
+               "--length_scale", f"{150 / self.velocidad:.2f}"]
+        if self.voz is not None:
+            cmd += ["--speaker", str(self.voz)]
+        subprocess.run(cmd, input=text.encode("utf-8"), check=True, capture_output=True)
+
+
+ENGINES = {e.name: e for e in (Pyttsx3Engine, EspeakEngine, PiperEngine)}
+
+
+def create_engine(motor="pyttsx3", **opciones):
+    if motor not in ENGINES:
+        raise TTSError(f"Motor de TTS desconocido: {motor} (usa {', '.join(ENGINES)})")
+    return ENGINES[motor](**opciones)
+
+
+def _write(engine, text, output_file):
+    """
+    Sintetiza a un temporal y lo renombra solo si quedó con datos.
+    """
+    temporal = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp.wav"
+    engine.synthesize(text, temporal)
+    if not os.path.exists(temporal) or os.path.getsize(temporal) == 0:
+        raise TTSError(f"El motor {engine.name} no generó audio para: {text[:40]}...")
+    os.replace(temporal, output_file)
+    return output_file
+
+
+# Motor de cada proceso trabajador (se crea una vez en el initializer)
+_worker_engine = None
+
+
+def _init_worker(motor, opciones):
+    global _worker_engine
+    _worker_engine = create_engine(motor, **opciones)
+
+
+def _worker_write(text, output_file):
+    return _write(_worker_engine, text, output_file)
+
+
+class TTSService:
+    """
+    Síntesis con caché y en paralelo. Los motores seguros entre hilos usan un
+    pool de hilos; los demás (pyttsx3) un pool de procesos, cada uno con su
+    motor inicializado una vez.
+    """
+    def __init__(self, cache_dir, motor="pyttsx3", workers=2, **opciones):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.motor = motor
+        self.opciones = opciones
+        self.workers = workers
+        self.engine = create_engine(motor, **opciones)
+        self._pool = None
+
+    def cache_file(self, text):
+        digest = hashlib.blake2b(f"{self.engine.key()}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def is_cached(self, text):
+        return os.path.exists(self.cache_file(text))
+
+    def _executor(self):
+        if self._pool is None:
+            if self.engine.thread_safe:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.motor, self.opciones))
+        return self._pool
+
+    def submit(self, text):
+        """
+        Future con la ruta del WAV del texto (ya resuelto si está en caché).
+        """
+        destino = self.cache_file(text)
+        if os.path.exists(destino):
+            listo = Future()
+            listo.set_result(destino)
+            return listo
+        if self.engine.thread_safe:
+            return self._executor().submit(_write, self.engine, text, destino)
+        return self._executor().submit(_worker_write, text, destino)
+
+    @timed("tts: sintesis")
+    def synthesize_many(self, texts):
+        """
+        Sintetiza los textos que falten en paralelo; devuelve sus rutas en orden.
+        """
+        futuros = [self.submit(t) for t in texts]
+        return [f.result() for f in futuros]
+
+    @timed("tts: sintesis")
+    def synthesize(self, text):
+        destino = self.cache_file(text)
+        if os.path.exists(destino):
+            return destino
+        # Un solo mensaje: en el proceso actual, sin levantar el pool
+        return _write(self.engine, text, destino)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def create_tts_service(config):
+    """
+    Servicio a partir de la sección 'tts' de cfg.yml (por defecto pyttsx3).
+    """
+    tts_cfg = dict(config.get("tts") or {})
+    cache_dir = os.path.join(config["general"]["media_path"], CACHE_DIR)
+    motor = tts_cfg.pop("motor", "pyttsx3")
+    workers = int(tts_cfg.pop("trabajadores", 2))
+    return TTSService(cache_dir, motor, workers, **tts_cfg)
+
+
+# Motor de tts() (compatibilidad): se inicializa en la primera llamada
+_default_engine = None
+
 
 def tts(text, output_file, velocidad):
-    # Inicializa el motor TTS
-    engine = pyttsx3.init()
-
-    # Configura la velocidad del habla
-    engine.setProperty('rate', velocidad)
-
-    # Busca y selecciona una voz en español
-    voces = engine.getProperty('voices')
-    for voz in voces:
-        if "spanish" in voz.languages or "es" in voz.id.lower():
-            engine.setProperty('voice', voz.id)
-            break
-    else:
-        print("Advertencia: No se encontró una voz en español. Usando la predeterminada.")
-
-    # Guarda el texto convertido a voz en un archivo MP3
-    engine.save_to_file(text, output_file)
-
-    # Ejecuta el motor y espera a que termine
-    engine.runAndWait()
+    global _default_engine
+    if _default_engine is None or _default_engine.velocidad != velocidad:
+        _default_engine = Pyttsx3Engine(velocidad)
+    # Guarda el texto convertido a voz y regresa cuando el archivo está completo
+    return _write(_default_engine, text, output_file)
 
 # Ejemplo de uso
 texto = "Bienvenidos al boletín dominical de la Federación Mexicana de Radio Experimentadores A.C."
@@ -0,0 +1,333 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from contextlib import redirect_stdout
+from datetime import datetime
+import numpy as np
+import yaml
+
+# Benchmarks de las rutas críticas de HAMNA, sin radio ni red: los audios se
+# generan con FFmpeg, el AMI es src/func/fake_ami.py y el TTS un motor
+# sintético. El resultado es un JSON para comparar entre versiones:
+#   python -m src.test.bench -o bench.json
+#   python -m src.test.bench --comparar bench_anterior.json --tolerancia 0.25
+#   python -m src.test.bench --solo ami_parse tts_cache
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.func.ingest import ffmpeg_exe
+from src.func.functions import load_config, progress_bar, convert_seconds_to_hhmmss, get_media_index
+from src.func.media_index import MediaIndex
+from src.func.allstar import parse_ami_events
+from src.func.fake_ami import FakeAmi
+from src.func.pcm_cache import PcmCache
+from src.func.timeline import build_timeline, plan_pauses, timeline_duration
+from src.func.render import render_timeline
+from src.func.mixer import Mixer
+from src.func import tts as tts_mod
+
+BENCHMARKS = {}
+
+# Métricas donde más es mejor (el resto: menos es mejor)
+HIGHER_IS_BETTER = ("por_s", "x_tiempo_real")
+
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+def percentiles(muestras):
+    muestras = sorted(muestras)
+    return {
+        "p50_ms": round(statistics.median(muestras) * 1000, 3),
+        "p95_ms": round(muestras[min(int(len(muestras) * 0.95), len(muestras) - 1)] * 1000, 3),
+        "max_ms": round(muestras[-1] * 1000, 3),
+    }
+
+
+def make_tone(ruta, segundos, freq=440):
+    subprocess.run([ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", f"sine=frequency={freq}:duration={segundos}",
+                    "-ar", "44100", "-ac", "2", "-b:a", "128k", ruta], check=True)
+    return ruta
+
+
+class SyntheticEngine:
+    """
+    Motor de TTS sintético: tono de duración proporcional al texto.
+    """
+    name = "sintetico"
+    thread_safe = True
+
+    def __init__(self, velocidad=120, voz=None):
+        self.velocidad = velocidad
+
+    def key(self):
+        return f"{self.name}|{self.velocidad}"
+
+    def synthesize(self, text, output_file):
+        sr = 16000
+        n = int(sr * len(text) / 15)
+        x = (8000 * np.sin(np.arange(n) * 0.2)).astype(np.int16)
+        with wave.open(output_file, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sr)
+            w.writeframes(x.tobytes())
+
+
+@benchmark
+def ami_parse(ctx, n=50000):
+    evento = "Event: RPT_RXKEYED\r\nPrivilege: reporting,all\r\nNode: 1999\r\nEventValue: {}\r\n\r\n"
+    buffer = "".join(evento.format(i % 2) for i in range(n))
+    # En bloques de 4 KiB, como llegan del socket
+    inicio = time.perf_counter()
+    resto, total = "", 0
+    for i in range(0, len(buffer), 4096):
+        eventos, resto = parse_ami_events(resto + buffer[i:i + 4096])
+        total += len(eventos)
+    segundos = time.perf_counter() - inicio
+    assert total == n
+    return {"eventos": n, "eventos_por_s": round(n / segundos)}
+
+
+@benchmark
+def cos_latency(ctx, n=20):
+    # Del evento RPT_RXKEYED en el AMI a shared_dict["COS"] en el proceso principal
+    import cor
+    ami = FakeAmi(username="bench", password="bench").start()
+    shared, proceso = cor.start_cos_monitor(ami.host, ami.port, "bench", "bench")
+    try:
+        limite = time.monotonic() + 5
+        while not ami.clients and time.monotonic() < limite:
+            time.sleep(0.01)
+        muestras = []
+        for i in range(n):
+            estado = i % 2 == 0
+            inicio = time.perf_counter()
+            ami.key_rx(estado)
+            while shared["COS"] != estado:
+                if time.perf_counter() - inicio > 2:
+                    raise TimeoutError("El monitor de COS no respondió")
+            muestras.append(time.perf_counter() - inicio)
+    finally:
+        proceso.terminate()
+        ami.stop()
+    return {"cambios": n, **percentiles(muestras)}
+
+
+@benchmark
+def config_load(ctx, n=200):
+    # El arranque real: leer cfg.yml, planear las pausas (valida las
+    # duraciones contra el índice de medios) y armar la línea de tiempo
+    entrada = salida = ctx["tonos"][0]
+    inicio = time.perf_counter()
+    for _ in range(n):
+        config = load_config(ctx["cfg"])
+        plan = plan_pauses(config, entrada, salida)
+        build_timeline(config, entrada, salida, plan=plan)
+    return {"cargas": n, "secciones": len(config["secciones"]),
+            "ms_por_carga": round((time.perf_counter() - inicio) / n * 1000, 3)}
+
+
+@benchmark
+def duration_probe(ctx):
+    archivos = ctx["tonos"]
+    directorio = tempfile.mkdtemp(dir=ctx["tmp"])
+    index = MediaIndex(directorio)
+    inicio = time.perf_counter()
+    for a in archivos:
+        index.duration(a)
+    frio = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for a in archivos:
+        index.duration(a)
+    caliente = time.perf_counter() - inicio
+    index.close()
+    return {"archivos": len(archivos), "frio_ms_por_archivo": round(frio / len(archivos) * 1000, 3),
+            "caliente_ms_por_archivo": round(caliente / len(archivos) * 1000, 3)}
+
+
+@benchmark
+def tts_cache(ctx, n=20):
+    tts_mod.ENGINES[SyntheticEngine.name] = SyntheticEngine
+    servicio = tts_mod.TTSService(os.path.join(ctx["tmp"], "tts"), SyntheticEngine.name, workers=4)
+    textos = [f"Frase de prueba número {i} para el boletín." for i in range(n)]
+    try:
+        inicio = time.perf_counter()
+        servicio.synthesize_many(textos)
+        fallo = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        servicio.synthesize_many(textos)
+        acierto = time.perf_counter() - inicio
+    finally:
+        servicio.close()
+    return {"textos": n, "fallo_ms_por_texto": round(fallo / n * 1000, 3),
+            "acierto_ms_por_texto": round(acierto / n * 1000, 4)}
+
+
+@benchmark
+def timeline_render(ctx):
+    tonos = ctx["tonos"]
+    config = {
+        "general": {"media_path": ctx["tmp"] + os.sep},
+        "duraciones": {"reproduccion": 20, "pausa": 3, "alerta": 5, "retroceso": 2},
+        "alertas": [],
+        "secciones": [{"nombre": f"S{i}", "archivo": t, "inicio": "00:00:00", "fin": "00:00:50"}
+                      for i, t in enumerate(tonos[:4])],
+    }
+    index = MediaIndex(os.path.join(ctx["tmp"], "render_index"))
+    cache = PcmCache(os.path.join(ctx["tmp"], "render"), index, sample_rate=16000, channels=1)
+    eventos = build_timeline(config, tonos[0], tonos[0])
+    salida = os.path.join(ctx["tmp"], "render.wav")
+    # Primera pasada decodifica a la caché; la segunda mide solo el render
+    render_timeline(eventos, salida, cache)
+    inicio = time.perf_counter()
+    _, duracion = render_timeline(eventos, salida, cache)
+    segundos = time.perf_counter() - inicio
+    index.close()
+    return {"audio_s": round(duracion, 1), "x_tiempo_real": round(duracion / segundos)}
+
+
+@benchmark
+def alert_mix(ctx, segundos=60):
+    # Peor caso: una alerta de 2 s cada 5 s, todos los bloques con atenuación
+    # y limitador, a 44.1 kHz estéreo con el programa a nivel completo
+    sr = 44100
+    mixer = Mixer(sr)
+    programa = (32000 * np.sin(np.arange(sr * segundos) * 0.05)).astype(np.int16)[:, None].repeat(2, axis=1)
+    alerta = (16000 * np.sin(np.arange(sr * 2) * 0.14)).astype(np.int16)[:, None].repeat(2, axis=1)
+    overlays = [(sr * t, alerta) for t in range(1, segundos, 5)]
+    inicio = time.perf_counter()
+    for i in range(0, len(programa), sr):
+        mixer.mix(programa, i, sr, overlays)
+    transcurrido = time.perf_counter() - inicio
+    return {"audio_s": segundos, "x_tiempo_real": round(segundos / transcurrido)}
+
+
+@benchmark
+def terminal_render(ctx, n=2000):
+    # La pantalla de progreso que cor.py redibuja cada segundo
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for i in range(n):
+            bar = progress_bar(i % 300, 300)
+            print(f"""
+                ################################### HAMNA - Amateur Radio Net Automation ###################################
+
+                   Sección 'Editorial': Tiempo de Reproducción: 573 s.
+                   La sección será reproducida con pausas cada 160 s.
+                   Tiempo restante de la sección: {convert_seconds_to_hhmmss(573 - i % 573)}
+                   {bar.strip()}
+                """)
+    dibujo = (time.perf_counter() - inicio) / n
+    # clear_screen() lanza un proceso (cls/clear) en cada redibujo
+    comando = "cls" if os.name == "nt" else "clear"
+    inicio = time.perf_counter()
+    for _ in range(20):
+        subprocess.run(comando, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limpieza = (time.perf_counter() - inicio) / 20
+    return {"dibujo_us": round(dibujo * 1e6, 2), "clear_screen_ms": round(limpieza * 1000, 3)}
+
+
+def setup(tmp, n_tonos):
+    tonos = [make_tone(os.path.join(tmp, f"tono_{i:02d}.mp3"), 60, 300 + 20 * i) for i in range(n_tonos)]
+    # Copia de cfg.yml con media_path en el directorio temporal: las alertas
+    # sintetizadas (.tonos) y el índice de medios no tocan los del proyecto
+    config = load_config("cfg.yml")
+    config["general"]["media_path"] = os.path.join(tmp, "media") + os.sep
+    # Las secciones y alertas del proyecto pueden no estar en este equipo: se
+    # usan los tonos y alertas sintetizadas, con el resto de cfg.yml tal cual
+    config["secciones"] = [{"nombre": f"Seccion {i + 1}", "archivo": t, "inicio": "00:00:00", "fin": "00:00:55"}
+                           for i, t in enumerate(tonos)]
+    config["alertas"] = [{"nombre": n, "tono": {"tipo": "bip", "frecuencia": 800 + 200 * i, "duracion": 0.5}}
+                         for i, n in enumerate(("pause_alert", "pause", "continuamos"))]
+    cfg = os.path.join(tmp, "cfg.yml")
+    with open(cfg, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    # El índice global (file_duration) se abre con la copia antes que con cfg.yml
+    get_media_index(cfg)
+    return {"tmp": tmp, "tonos": tonos, "cfg": cfg}
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(actual, previo, tolerancia):
+    """
+    Regresiones: métricas que empeoraron más de 'tolerancia' (fracción).
+    """
+    regresiones = []
+    for nombre, metricas in actual["resultados"].items():
+        anteriores = previo.get("resultados", {}).get(nombre, {})
+        for clave, valor in metricas.items():
+            antes = anteriores.get(clave)
+            if not isinstance(valor, (int, float)) or not isinstance(antes, (int, float)) or not antes:
+                continue
+            if clave in ("eventos", "cambios", "cargas", "secciones", "archivos", "textos", "audio_s"):
+                continue
+            mejor_alto = clave.endswith(HIGHER_IS_BETTER)
+            cambio = (antes - valor) / antes if mejor_alto else (valor - antes) / antes
+            if cambio > tolerancia:
+                regresiones.append(f"{nombre}.{clave}: {antes} -> {valor} ({cambio:+.0%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de HAMNA (sin radio ni red)")
+    parser.add_argument("-o", "--salida", help="Guarda los resultados en este JSON")
+    parser.add_argument("--solo", nargs="+", choices=sorted(BENCHMARKS), help="Corre solo estos benchmarks")
+    parser.add_argument("--archivos", type=int, default=8, help="Audios sintéticos para las pruebas")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento permitido (fracción)")
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="hamna_bench_") as tmp:
+        ctx = setup(tmp, args.archivos)
+        try:
+            for nombre in args.solo or BENCHMARKS:
+                print(f"{nombre}...", end=" ", flush=True)
+                resultados[nombre] = BENCHMARKS[nombre](ctx)
+                print(resultados[nombre])
+        finally:
+            get_media_index().close()
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": git_version(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Resultados en {args.salida}")
+    else:
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = compare(informe, json.load(f), args.tolerancia)
+        for r in regresiones:
+            print(f"REGRESIÓN {r}")
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from src.func.allstar import AllStarPlayer
+
+
+class FakeAmi:
+    def __init__(self):
+        self.comandos = []
+
+    def command(self, comando):
+        self.comandos.append(comando)
+        return ""
+
+
+def transmisiones(n, duracion=0.05, espera=0.05):
+    return [{"nombre": f"T{i}", "archivo": f"hamna_{i:03d}", "duracion": duracion, "espera": espera}
+            for i in range(1, n + 1)]
+
+
+def test_run_plays_in_order(tmp_path):
+    ami = FakeAmi()
+    player = AllStarPlayer(ami, 1999, str(tmp_path), directorio_nodo="/var/lib/hamna", margen=0)
+    assert player.run(transmisiones(2)) is True
+    assert ami.comandos == ["rpt localplay 1999 /var/lib/hamna/hamna_001",
+                            "rpt localplay 1999 /var/lib/hamna/hamna_002"]
+
+
+def test_detener_interrupts_without_ami(tmp_path):
+    ami = FakeAmi()
+    player = AllStarPlayer(ami, 1999, str(tmp_path), margen=0)
+    threading.Timer(0.1, player.detener).start()
+    inicio = time.monotonic()
+    assert player.run(transmisiones(3, duracion=5)) is False
+    assert time.monotonic() - inicio < 1
+    # detener() no manda nada por AMI; solo se llegó a la primera transmisión
+    assert len(ami.comandos) == 1
+
+
+def test_detener_while_waiting_for_cos(tmp_path):
+    ami = FakeAmi()
+    player = AllStarPlayer(ami, 1999, str(tmp_path))
+    threading.Timer(0.1, player.detener).start()
+    assert player.run(transmisiones(1), cos={"COS": True}, cos_poll=5) is False
+    assert ami.comandos == []
@@ -0,0 +1,102 @@
+import importlib
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Servidor de PTT con el GPIO falso y tiempos cortos (se leen al importar)
+TTL = 0.2
+MAX_TX = 0.8
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    monkeypatch.setenv("HAMNA_GPIO", "fake")
+    monkeypatch.setenv("HAMNA_PTT_TTL", str(TTL))
+    monkeypatch.setenv("HAMNA_PTT_MAX_TX", str(MAX_TX))
+    sys.modules.pop("src.app", None)
+    app = importlib.import_module("src.app")
+    with TestClient(app.app) as cliente:
+        yield app, cliente
+    sys.modules.pop("src.app", None)
+
+
+def test_plain_ptt_on_gets_default_lease(servidor):
+    app, cliente = servidor
+    assert cliente.get("/ptt_on").json()["ttl"] == TTL
+    assert app.GPIO.input(app.PTT_PIN) == app.GPIO.HIGH
+    # Sin heartbeats, el cliente que se cae no deja el transmisor encendido
+    time.sleep(TTL * 3)
+    estado = cliente.get("/status").json()
+    assert not estado["ptt"] and not estado["line"]
+    assert estado["watchdog_releases"]["ttl"] == 1
+
+
+@pytest.mark.parametrize("ttl", ["0", "-1", "nan", "inf"])
+def test_invalid_ttl_rejected(servidor, ttl):
+    app, cliente = servidor
+    assert cliente.get("/ptt_on", params={"ttl": ttl}).status_code == 422
+    assert not cliente.get("/status").json()["ptt"]
+
+
+def test_heartbeat_renews_lease(servidor):
+    app, cliente = servidor
+    cliente.get("/ptt_on", params={"ttl": TTL})
+    # Heartbeats más seguido que el ttl: sigue al aire más allá de varios ttl
+    for _ in range(5):
+        time.sleep(TTL / 2)
+        assert cliente.get("/ptt_heartbeat").json() == {"ptt": True}
+    assert cliente.get("/status").json()["ptt"]
+    cliente.get("/ptt_off")
+    assert cliente.get("/ptt_heartbeat").json() == {"ptt": False}
+
+
+def test_max_tx_releases_despite_heartbeats(servidor):
+    app, cliente = servidor
+    cliente.get("/ptt_on", params={"ttl": TTL})
+    limite = time.monotonic() + MAX_TX * 3
+    while cliente.get("/ptt_heartbeat").json()["ptt"]:
+        assert time.monotonic() < limite, "el time-out no soltó el PTT"
+        time.sleep(TTL / 4)
+    estado = cliente.get("/status").json()
+    assert estado["watchdog_releases"] == {"ttl": 0, "max_tx": 1}
+    assert estado["keydown_seconds_total"] == pytest.approx(MAX_TX, abs=0.2)
+
+
+def test_status_while_keyed(servidor):
+    app, cliente = servidor
+    cliente.get("/ptt_on", params={"ttl": 2})
+    estado = cliente.get("/status").json()
+    assert estado["ptt"] and estado["line"]
+    assert estado["backend"] == "fake"
+    assert estado["ttl"] == 2
+    assert 0 < estado["lease_remaining"] <= 2
+    assert estado["edges"] == {"up": 1, "down": 0}
+    assert estado["last_client"]["path"] == "/ptt_on"
+
+
+def metric(texto, nombre):
+    # Valor de una métrica sin etiquetas en la exposición de Prometheus
+    for linea in texto.splitlines():
+        if linea.startswith(nombre + " "):
+            return float(linea.split()[-1])
+    raise KeyError(nombre)
+
+
+def test_metrics_counters(servidor):
+    app, cliente = servidor
+    for _ in range(2):
+        cliente.get("/ptt_on", params={"ttl": 2})
+        time.sleep(0.1)
+        cliente.get("/ptt_off")
+    cliente.get("/ptt_on")
+    time.sleep(TTL * 3)
+    texto = cliente.get("/metrics").text
+    assert 'hamna_ptt_edges_total{edge="up"} 3' in texto
+    assert 'hamna_ptt_edges_total{edge="down"} 3' in texto
+    assert 'hamna_ptt_watchdog_releases_total{reason="ttl"} 1' in texto
+    assert 'hamna_ptt_watchdog_releases_total{reason="max_tx"} 0' in texto
+    assert 'hamna_ptt_state{pin="17",backend="fake"} 0' in texto
+    assert metric(texto, "hamna_ptt_keydown_seconds_total") == pytest.approx(0.2 + TTL, abs=0.15)
+    assert 'hamna_request_duration_seconds_count{path="/ptt_on"} 3' in texto
@@ -0,0 +1,58 @@
+import pytest
+
+from src.func.busy import CatBusyDetector
+
+
+@pytest.fixture
+def detector():
+    # Sin start(): las lecturas se aplican a mano con update()
+    return CatBusyDetector(cat=None, threshold_on=5, threshold_off=3, alpha=0.5, hold=1.0)
+
+
+def test_ema_smooths_single_spike(detector):
+    detector.update(8, False, 0.0)
+    assert detector.level == 4.0
+    assert not detector.is_busy()
+    detector.update(8, False, 0.2)
+    assert detector.level == 6.0
+    assert detector.is_busy()
+    # Latencia de la primera lectura cruda sobre el umbral hasta COS activo
+    assert detector.detect_latency.count == 1
+
+
+def test_by_goes_busy_immediately(detector):
+    detector.update(0, True, 0.0)
+    assert detector.is_busy()
+
+
+def test_hysteresis_and_hold(detector):
+    for t in (0.0, 0.2, 0.4):
+        detector.update(10, False, t)
+    assert detector.is_busy()
+    # Entre umbral_off y umbral_on sigue ocupado, sin importar cuánto dure
+    detector.level = 4.0
+    for t in (1.0, 3.0, 5.0):
+        detector.update(4, False, t)
+        assert detector.is_busy()
+    # Bajo umbral_off, libre solo tras 'hold' segundos seguidos
+    detector.update(0, False, 6.0)
+    detector.update(0, False, 6.5)
+    assert detector.is_busy()
+    # Una lectura alta reinicia la cuenta de silencio
+    detector.update(12, False, 6.6)
+    detector.update(0, False, 6.8)
+    detector.update(0, False, 7.0)
+    detector.update(0, False, 7.5)
+    assert detector.is_busy()
+    detector.update(0, False, 8.1)
+    assert not detector.is_busy()
+
+
+def test_by_holds_busy_below_threshold(detector):
+    detector.update(0, True, 0.0)
+    for t in (1.0, 2.0, 3.0):
+        detector.update(0, True, t)
+    assert detector.is_busy()
+    detector.update(0, False, 3.5)
+    detector.update(0, False, 4.6)
+    assert not detector.is_busy()
@@ -0,0 +1,85 @@
+import pytest
+
+from src.func.cat import CatError, CatSession, RadioPoller
+
+
+class FakeSerial:
+    """
+    Puerto serie en memoria: responde a cada escritura con lo que indique
+    'respuestas' y cuenta cuántas veces se cambia el timeout (tcsetattr).
+    """
+    def __init__(self, respuestas):
+        self.respuestas = respuestas
+        self.pendiente = b""
+        self.escrito = []
+        self.cambios_timeout = 0
+        self._timeout = None
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, valor):
+        self.cambios_timeout += 1
+        self._timeout = valor
+
+    def write(self, datos):
+        self.escrito.append(datos.decode())
+        for comando in datos.decode().split(";")[:-1]:
+            self.pendiente += self.respuestas.get(comando + ";", "").encode()
+
+    def flush(self):
+        pass
+
+    def read_until(self, terminador):
+        fin = self.pendiente.find(terminador)
+        if fin < 0:
+            datos, self.pendiente = self.pendiente, b""
+            return datos
+        datos, self.pendiente = self.pendiente[:fin + 1], self.pendiente[fin + 1:]
+        return datos
+
+
+def test_query_sets_timeout_once():
+    # Auto-información intercalada: varias lecturas en la misma transacción
+    ser = FakeSerial({"FA;": "FB00007100000;FA00014250000;", "MD;": "MD3;", "SM0;": "SM00012;"})
+    cat = CatSession(ser, timeout=0.05)
+    for _ in range(3):
+        assert cat.query("FA;", "MD;", "SM0;") == {"FA": 14250000, "MD": "CW", "SM": 12}
+    assert ser.cambios_timeout == 1
+    assert list(cat.unsolicited) == [("FB", 7100000)] * 3
+
+
+def test_transact_skips_unsolicited_and_times_out():
+    ser = FakeSerial({"FA;": "MD2;SM00005;FA00007100000;"})
+    cat = CatSession(ser, timeout=0.05)
+    assert cat.transact("FA;") == "FA00007100000;"
+    assert cat.transact("EX0610000;") == ""
+    assert cat.transact("IF;", timeout=0.02) == ""
+    # Un cambio para la espera por defecto y otro para la explícita
+    assert ser.cambios_timeout == 2
+
+
+RADIO_SIN_BY = {"FA;": "FA00014250000;", "MD;": "MD2;", "SM0;": "SM00007;", "BY;": "?;"}
+
+
+def test_query_reports_unsupported_and_reads_the_rest():
+    ser = FakeSerial(RADIO_SIN_BY)
+    cat = CatSession(ser, timeout=0.05)
+    with pytest.raises(CatError) as e:
+        cat.query("SM0;", "BY;", "FA;")
+    assert e.value.unsupported == ["BY;"]
+    # La respuesta a FA; posterior al '?;' no queda en el puerto
+    assert ser.pendiente == b""
+
+
+def test_poller_drops_unsupported_query():
+    ser = FakeSerial(RADIO_SIN_BY)
+    poller = RadioPoller(CatSession(ser, timeout=0.05), auto_info=False)
+    with pytest.raises(CatError):
+        poller._poll(None)
+    assert poller.unsupported == {"BY;"}
+    status = poller._poll(None)
+    assert (status.freq_hz, status.mode, status.smeter, status.busy) == (14250000, "USB", 7, None)
+    assert "BY;" not in ser.escrito[-1]
@@ -0,0 +1,39 @@
+from src.func.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint, sections_hash
+
+CONFIG = {
+    "secciones": [{"nombre": "Editorial", "archivo": "a.mp3", "inicio": "00:00:00", "fin": "00:09:33"}],
+    "duraciones": {"reproduccion": 160, "pausa": 12, "alerta": 8, "retroceso": 4},
+}
+
+
+def test_round_trip(tmp_path):
+    ruta = str(tmp_path / "punto.json")
+    estado = {"fase": "seccion", "indice": 0, "posicion": 312, "huella": sections_hash(CONFIG),
+              "entrada": "entrada.mp3", "salida": "salida.mp3", "identificacion": None}
+    save_checkpoint(estado, ruta)
+    leido = load_checkpoint(CONFIG, ruta)
+    assert {k: leido[k] for k in estado} == estado
+    assert "actualizado" in leido
+    assert not (tmp_path / "punto.json.tmp").exists()
+
+
+def test_changed_sections_invalidate(tmp_path):
+    ruta = str(tmp_path / "punto.json")
+    save_checkpoint({"fase": "salida", "huella": sections_hash(CONFIG)}, ruta)
+    otra = dict(CONFIG, duraciones=dict(CONFIG["duraciones"], pausa=20))
+    assert load_checkpoint(otra, ruta) is None
+
+
+def test_missing_or_corrupt(tmp_path):
+    ruta = tmp_path / "punto.json"
+    assert load_checkpoint(CONFIG, str(ruta)) is None
+    ruta.write_text("{ incompleto", encoding="utf-8")
+    assert load_checkpoint(CONFIG, str(ruta)) is None
+
+
+def test_clear(tmp_path):
+    ruta = str(tmp_path / "punto.json")
+    save_checkpoint({"huella": sections_hash(CONFIG)}, ruta)
+    clear_checkpoint(ruta)
+    assert load_checkpoint(CONFIG, ruta) is None
+    clear_checkpoint(ruta)
@@ -0,0 +1,80 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.func.control import Control, ControlServer
+
+
+def test_requests_and_take():
+    control = Control(["Editorial", "Colaboracion 1"])
+    control.request("pausa")
+    control.request("extender", 30)
+    control.request("extender", "15")
+    assert control.take("extender") == 45.0
+    assert control.take("pausa") is True
+    assert control.take("pausa") is False
+
+
+@pytest.mark.parametrize("valor, indice", [("2", 1), ("Editorial", 0)])
+def test_go_to_section(valor, indice):
+    control = Control(["Editorial", "Colaboracion 1"])
+    control.request("ir", valor)
+    assert control.take("ir") == indice
+
+
+@pytest.mark.parametrize("orden, valor", [("bailar", None), ("extender", None), ("extender", -5),
+                                          ("extender", "nan"), ("extender", "inf"), ("extender", "-inf"),
+                                          ("ir", "3"), ("ir", None)])
+def test_invalid_requests(orden, valor):
+    with pytest.raises(ValueError):
+        Control(["Editorial", "Colaboracion 1"]).request(orden, valor)
+
+
+def test_extension_capped():
+    control = Control(max_extension=120)
+    control.request("extender", 100)
+    control.request("extender", "1e308")
+    assert control.take("extender") == 120
+
+
+def test_http_rejects_non_finite_extension(servidor):
+    for valor in ("NaN", "Infinity"):
+        # json.loads acepta NaN e Infinity
+        assert post(servidor, "extender", f'{{"segundos": {valor}}}'.encode())[0] == 400
+    assert servidor.status()["pendientes"] == {}
+
+
+def test_sleep_wakes_on_command():
+    control = Control()
+    control.request("saltar")
+    assert control.sleep(5, ("saltar",)) == "saltar"
+
+
+@pytest.fixture
+def servidor():
+    control = ControlServer(["Editorial"], port=0)
+    yield control
+    control.close()
+
+
+def post(control, ruta, cuerpo):
+    peticion = urllib.request.Request(f"http://127.0.0.1:{control.port}/{ruta}", data=cuerpo, method="POST")
+    try:
+        with urllib.request.urlopen(peticion) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("cuerpo", [b"[1, 2]", b"30", b'"texto"', b"no es json"])
+def test_http_rejects_bad_bodies(servidor, cuerpo):
+    assert post(servidor, "extender", cuerpo)[0] == 400
+    assert servidor.status()["pendientes"] == {}
+
+
+def test_http_accepts_command(servidor):
+    codigo, datos = post(servidor, "extender", b'{"segundos": 30}')
+    assert codigo == 202
+    assert datos["pendientes"] == {"extender": 30.0}
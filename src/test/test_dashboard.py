@@ -0,0 +1,90 @@
+import http.client
+import json
+import time
+import types
+
+import pytest
+
+from src.func import dashboard
+from src.func.control import Control
+from src.func.dashboard import Dashboard, snapshot
+
+
+def test_snapshot():
+    control = Control(["Editorial"])
+    control.update(fase="seccion", seccion=1, nombre="Editorial", seccion_t0=time.time() - 5)
+    driver = types.SimpleNamespace(state=1)
+    estado = snapshot(control, {"COS": True, "nodos": {"1999": True, "2000": False}}, driver)
+    assert estado["transcurrido"] == 5
+    assert "seccion_t0" not in estado
+    assert estado["ptt"] is True and estado["cos"] is True
+    assert estado["nodos"] == {"1999": True, "2000": False}
+    # Sin PTT ni COS conocidos
+    control.update(fase="salida")
+    estado = snapshot(control)
+    assert estado["ptt"] is None and estado["transcurrido"] is None and "cos" not in estado
+
+
+class Fuente:
+    def __init__(self):
+        self.llamadas = 0
+        self.estado = {"fase": "entrada"}
+
+    def __call__(self):
+        self.llamadas += 1
+        return dict(self.estado)
+
+
+@pytest.fixture
+def panel():
+    fuente = Fuente()
+    panel = Dashboard(fuente, port=0, frecuencia=50)
+    yield panel
+    panel.close()
+
+
+def abrir(panel):
+    conexion = http.client.HTTPConnection(panel.host, panel.port, timeout=5)
+    conexion.request("GET", "/eventos")
+    return conexion, conexion.getresponse()
+
+
+def siguiente(respuesta):
+    # Próximo mensaje 'data:' del flujo SSE
+    while True:
+        linea = respuesta.fp.readline().decode()
+        if linea.startswith("data: "):
+            return json.loads(linea[6:])
+
+
+def test_default_host_is_local(panel):
+    assert panel.host == "127.0.0.1"
+
+
+def test_fan_out_same_frame_to_all_viewers(panel):
+    time.sleep(0.1)
+    # Sin espectadores no se arma ningún estado
+    assert panel.fuente.llamadas == 0
+    conexiones = [abrir(panel) for _ in range(3)]
+    assert [siguiente(r) for _, r in conexiones] == [{"fase": "entrada"}] * 3
+    panel.fuente.estado = {"fase": "seccion", "nombre": "Editorial"}
+    assert [siguiente(r) for _, r in conexiones] == [{"fase": "seccion", "nombre": "Editorial"}] * 3
+    assert panel.viewers == 3
+    for conexion, _ in conexiones:
+        conexion.close()
+
+
+def test_max_viewers(panel, monkeypatch):
+    monkeypatch.setattr(dashboard, "MAX_VIEWERS", 1)
+    conexion, respuesta = abrir(panel)
+    assert respuesta.status == 200
+    siguiente(respuesta)
+    otra, rechazada = abrir(panel)
+    assert rechazada.status == 503
+    otra.close()
+    conexion.close()
+
+
+def test_page_builds_node_names_as_text():
+    assert "innerHTML" not in dashboard.PAGE
+    assert "textContent" in dashboard.PAGE
@@ -0,0 +1,36 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.func import ingest
+
+
+class FakeIndex:
+    def lookup(self, path, analyze_audio=False):
+        return {"duration": 1.0, "loudness": -16.0}
+
+
+def test_same_slug_workers_use_distinct_partials(tmp_path, monkeypatch):
+    origen = tmp_path / "origen.mp3"
+    origen.write_bytes(b"audio")
+    parciales, barrera = [], threading.Barrier(2)
+
+    def transcode(entrada, salida, fmt, normalize, formato):
+        parciales.append(salida)
+        with open(salida, "wb") as f:
+            f.write(threading.current_thread().name.encode())
+        # Los dos trabajadores escriben su temporal a la vez
+        barrera.wait(timeout=5)
+        time.sleep(0.05)
+        assert os.path.exists(salida)
+
+    monkeypatch.setattr(ingest, "transcode", transcode)
+    media = str(tmp_path / "media")
+    os.makedirs(media)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        resultados = list(pool.map(lambda _: ingest.ingest_one(str(origen), media, name="Boletín", index=FakeIndex()),
+                                   range(2)))
+    assert len(set(parciales)) == 2
+    assert {r["archivo"] for r in resultados} == {"Boletin.mp3"}
+    assert sorted(os.listdir(media)) == ["Boletin.mp3"]
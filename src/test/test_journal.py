@@ -0,0 +1,63 @@
+import pytest
+
+from src.func.journal import Journal, read_journal, summarize
+
+
+def ev(t, evento, **campos):
+    return {"t": t, "ts": 1000.0 + t, "evento": evento, **campos}
+
+
+BOLETIN = [
+    ev(0.0, "ptt", estado="on"),
+    ev(2.0, "audio_inicio", clip="entrada", duracion=10.0),
+    ev(13.5, "audio_fin", clip="entrada"),
+    ev(14.0, "ptt", estado="off"),
+    ev(20.0, "cos_espera_inicio"),
+    ev(23.0, "cos_espera_fin"),
+    ev(23.0, "cos", ocupado=False),
+    ev(24.0, "ptt", estado="on"),
+    ev(25.0, "seccion_inicio", nombre="Editorial", planeado=100.0),
+    ev(26.0, "audio_inicio", clip="Editorial"),
+    ev(60.0, "pausa_inicio", retraso=0.25),
+    ev(126.0, "audio_fin", clip="Editorial"),
+    ev(127.0, "seccion_fin", nombre="Editorial"),
+    ev(128.0, "error", detalle="prueba"),
+]
+
+
+def test_summary_totals():
+    resumen = summarize(BOLETIN + [ev(130.0, "ptt", estado="off")])
+    assert resumen["duracion"] == 130.0
+    assert resumen["transmisiones"] == 2
+    assert resumen["al_aire"] == 14.0 + 106.0
+    # Entrada: 2 s antes y 2 s tras su duración; sección: 2 s antes y 4 s después
+    assert resumen["aire_muerto"] == pytest.approx(4.0 + 6.0)
+    assert (resumen["esperas_cos"], resumen["espera_cos_total"], resumen["cambios_cos"]) == (1, 3.0, 1)
+    assert resumen["errores"] == 1
+    assert resumen["secciones"] == [{"nombre": "Editorial", "real": 102.0, "planeado": 100.0, "error": 2.0,
+                                     "pausas": 1, "retraso_pausas_max": 0.25}]
+
+
+def test_summary_run_ending_keyed():
+    # Sin el PTT off final (corte o CTRL+C): 3 flancos, 2 transmisiones
+    resumen = summarize(BOLETIN)
+    assert resumen["cambios_ptt"] == 3
+    assert resumen["transmisiones"] == 2
+    assert resumen["al_aire"] == 14.0 + 104.0
+
+
+def test_summary_ignores_repeated_on():
+    eventos = [ev(0.0, "ptt", estado="on"), ev(1.0, "ptt", estado="on"), ev(5.0, "ptt", estado="off")]
+    assert summarize(eventos)["transmisiones"] == 1
+    assert summarize([])["transmisiones"] == 0
+
+
+def test_journal_round_trip(tmp_path):
+    ruta = str(tmp_path / "logs" / "boletin.jsonl")
+    bitacora = Journal(ruta, flush_interval=0.01)
+    bitacora.log("ptt", estado="on")
+    bitacora.log("audio_inicio", clip="entrada")
+    bitacora.close()
+    eventos = read_journal(ruta)
+    assert [e["evento"] for e in eventos] == ["ptt", "audio_inicio"]
+    assert eventos[0]["estado"] == "on" and eventos[0]["t"] <= eventos[1]["t"]
@@ -0,0 +1,74 @@
+import os
+import shutil
+import wave
+
+import pytest
+from mutagen import MutagenError
+
+from src.func import media_index
+from src.func.media_index import MediaIndex, probe
+
+SR = 8000
+
+
+def wav(ruta, segundos=1.0, canales=1):
+    with wave.open(str(ruta), "wb") as w:
+        w.setnchannels(canales)
+        w.setsampwidth(2)
+        w.setframerate(SR)
+        w.writeframes(bytes(int(SR * segundos) * 2 * canales))
+    return str(ruta)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MediaIndex(str(tmp_path))
+    yield index
+    index.close()
+
+
+def test_probe_reads_header(tmp_path):
+    datos = probe(wav(tmp_path / "a.wav", segundos=2, canales=2))
+    assert datos["duration"] == pytest.approx(2.0)
+    assert (datos["sample_rate"], datos["channels"]) == (SR, 2)
+
+
+def test_probe_rejects_unknown_format(tmp_path):
+    ruta = tmp_path / "notas.mp3"
+    ruta.write_bytes(b"esto no es audio")
+    with pytest.raises(MutagenError):
+        probe(str(ruta))
+
+
+def test_lookup_reads_audio_only_when_changed(index, tmp_path, monkeypatch):
+    ruta = wav(tmp_path / "a.wav")
+    llamadas = []
+    original = media_index.probe
+    monkeypatch.setattr(media_index, "probe", lambda p: llamadas.append(p) or original(p))
+    primera = index.lookup(ruta)
+    assert index.lookup(ruta)["indexed_at"] == primera["indexed_at"]
+    assert len(llamadas) == 1
+    # Misma ruta con otro contenido: se vuelve a leer
+    wav(ruta, segundos=3)
+    assert index.duration(ruta) == pytest.approx(3.0)
+    assert len(llamadas) == 2
+    # Una copia con el mismo contenido reutiliza el análisis por hash
+    copia = shutil.copy(ruta, tmp_path / "copia.wav")
+    assert index.lookup(copia)["hash"] == index.lookup(ruta)["hash"]
+    assert len(llamadas) == 2
+    assert index.hashes() == {index.lookup(ruta)["hash"]}
+
+
+def test_scan_counts_and_skips_unreadable(index, tmp_path, capsys):
+    buenos = [wav(tmp_path / f"{n}.wav") for n in "ab"]
+    malo = tmp_path / "roto.mp3"
+    malo.write_bytes(b"\x00" * 64)
+    conteo = index.scan([*buenos, str(malo)], analyze_audio=False)
+    assert conteo == {"sin_cambios": 0, "actualizados": 2, "errores": 1, "eliminados": 0}
+    assert "roto.mp3" in capsys.readouterr().out
+    # El archivo ilegible no queda en el índice con duración 0
+    assert index._row(index.key(str(malo))) is None
+
+    os.remove(buenos[1])
+    conteo = index.scan(buenos[:1], analyze_audio=False)
+    assert conteo == {"sin_cambios": 1, "actualizados": 0, "errores": 0, "eliminados": 1}
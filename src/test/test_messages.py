@@ -0,0 +1,23 @@
+from src.func.messages import SENTENCE_PAUSE, announcement_texts, fill_template, split_template
+
+
+def test_split_static_and_dynamic():
+    segmentos = split_template("Hoy es {fecha}. Bienvenidos al boletín.", {"fecha": "lunes"})
+    assert [(s["texto"], s["estatico"]) for s in segmentos] == [
+        ("Hoy es", True), ("lunes", False), ("Bienvenidos al boletín.", True)]
+    # El punto tras el campo cierra su frase
+    assert segmentos[1]["pausa"] == SENTENCE_PAUSE
+
+
+def test_unknown_fields_stay_literal():
+    segmentos = split_template("Escuche {fecha} en {frecuencia} MHz.", {"fecha": "hoy"})
+    assert [s["texto"] for s in segmentos] == ["Escuche", "hoy", "en {frecuencia} MHz."]
+    assert fill_template("QSL {x} y {fecha} {", {"fecha": "hoy"}) == "QSL {x} y hoy {"
+    assert split_template("Sin campos {0} ni {}.") == [{"texto": "Sin campos {0} ni {}.", "estatico": True,
+                                                         "pausa": SENTENCE_PAUSE}]
+
+
+def test_announcement_template_with_literal_braces():
+    config = {"anuncios": {"plantilla": "Sección {numero}: {nombre} {sic}"},
+              "secciones": [{"nombre": "Editorial", "inicio": "00:00:00", "fin": "00:05:00"}]}
+    assert announcement_texts(config) == {"Editorial": "Sección 1: Editorial {sic}"}
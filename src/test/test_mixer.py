@@ -0,0 +1,64 @@
+import numpy as np
+
+from src.func.mixer import Mixer, create_mixer, db_to_gain
+
+SR = 8000
+
+
+def programa(segundos=3, nivel=32000):
+    return (nivel * np.sin(np.arange(SR * segundos) * 0.05)).astype(np.int16)[:, None].repeat(2, axis=1)
+
+
+def alerta(segundos=0.5, nivel=20000):
+    return (nivel * np.sin(np.arange(int(SR * segundos)) * 0.2)).astype(np.int16)[:, None].repeat(2, axis=1)
+
+
+def test_limiter_keeps_peaks_under_ceiling():
+    mixer = Mixer(SR, techo=-1.0)
+    audio, datos = programa(), alerta()
+    salida = mixer.mix(audio, 0, len(audio), [(SR, datos)])
+    # Solo se toca el tramo de la alerta y sus rampas; fuera, el programa queda igual
+    a, b = mixer.span(SR, len(datos))
+    assert np.abs(salida[a:b].astype(np.int32)).max() <= db_to_gain(-1.0) * 32767 + 1
+    np.testing.assert_array_equal(salida[:a], audio[:a])
+    np.testing.assert_array_equal(salida[b:], audio[b:])
+
+
+def test_limiter_leaves_quiet_audio_alone():
+    mixer = Mixer(SR)
+    mezcla = programa(nivel=1000).astype(np.float32)
+    assert mixer.limit(mezcla) is mezcla
+
+
+def test_untouched_blocks_pass_through():
+    mixer = Mixer(SR)
+    audio = programa(1)
+    assert np.may_share_memory(mixer.mix(audio, 0, SR // 2, [(5 * SR, alerta())]), audio)
+
+
+def test_program_ducked_under_alert():
+    mixer = Mixer(SR, atenuacion=10.0)
+    silencio = np.zeros((int(SR * 0.5), 2), dtype=np.int16)
+    # Alerta muda: lo que queda es el programa atenuado
+    salida = mixer.mix(programa(), 0, 3 * SR, [(SR, silencio)])
+    medio = slice(SR + 1000, SR + 3000)
+    ganancia = np.abs(salida[medio].astype(np.float64)).max() / np.abs(programa()[medio].astype(np.float64)).max()
+    assert abs(ganancia - db_to_gain(-10.0)) < 0.01
+    # Lejos de la alerta el programa no cambia
+    np.testing.assert_array_equal(salida[:SR // 2], programa()[:SR // 2])
+
+
+def test_mix_independent_of_block_size():
+    mixer = Mixer(SR)
+    audio, overlays = programa(), [(SR, alerta()), (int(1.8 * SR), alerta())]
+    entero = mixer.mix(audio, 0, len(audio), overlays)
+    for bloque in (1000, 4096, 333):
+        partes = [mixer.mix(audio, i, bloque, overlays) for i in range(0, len(audio), bloque)]
+        np.testing.assert_array_equal(np.concatenate(partes), entero)
+
+
+def test_create_mixer_from_config():
+    mixer = create_mixer({"mezcla": {"atenuacion": 20, "nivel_alerta": 0.5}}, SR)
+    assert abs(mixer.fondo - db_to_gain(-20)) < 1e-9
+    assert mixer.nivel_alerta == 0.5
+    assert create_mixer({}, SR).nivel_alerta == 0.8
@@ -0,0 +1,102 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from src.func.media_index import MediaIndex
+from src.func.pcm_cache import CACHE_DIR, PcmBuffer, PcmCache
+
+SR = 8000
+
+
+def wav(ruta, segundos=1.0, frecuencia=440):
+    muestras = (8000 * np.sin(np.arange(int(SR * segundos)) * 2 * np.pi * frecuencia / SR)).astype(np.int16)
+    with wave.open(str(ruta), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SR)
+        w.writeframes(muestras.tobytes())
+    return str(ruta)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    index = MediaIndex(str(tmp_path))
+    cache = PcmCache(str(tmp_path), index, max_bytes=10_000, sample_rate=SR, channels=1)
+    decodificados = []
+
+    def decode(path, start, end, destino):
+        # Sin FFmpeg: un PCM de silencio del largo del tramo
+        decodificados.append((path, start, end))
+        with open(destino, "wb") as f:
+            f.write(bytes(int((end - start) * SR) * cache.frame_bytes))
+
+    cache.decode = decode
+    cache.decodificados = decodificados
+    yield cache
+    index.close()
+
+
+def test_get_decodes_once(cache, tmp_path):
+    audio = wav(tmp_path / "a.wav")
+    ruta = cache.get(audio, 0, 0.5)
+    assert os.path.dirname(ruta) == os.path.join(str(tmp_path), CACHE_DIR)
+    assert os.path.getsize(ruta) == SR // 2 * 2
+    assert cache.get(audio, 0, 0.5) == ruta
+    assert cache.get(audio, 0.5, 1.0) != ruta
+    assert len(cache.decodificados) == 2
+    assert cache.index.lookup(audio)["pcm_cache"] == cache.cache_file(audio, 0.5, 1.0)
+
+
+def test_evict_least_recently_used(cache, tmp_path):
+    audio = wav(tmp_path / "a.wav", segundos=2)
+    viejo = cache.get(audio, 0, 0.25)       # 4000 bytes cada tramo
+    os.utime(viejo, (1, 1))
+    usado = cache.get(audio, 0.25, 0.5)
+    os.utime(usado, (2, 2))
+    cache.get(audio, 0, 0.25)               # acierto: pasa a ser el más reciente
+    nuevo = cache.get(audio, 0.5, 0.75)     # 12000 bytes > max_bytes
+    assert not os.path.exists(usado)
+    assert os.path.exists(viejo) and os.path.exists(nuevo)
+    assert cache.size() <= cache.max_bytes
+
+
+def test_purge_stale_after_content_change(cache, tmp_path):
+    audio = wav(tmp_path / "a.wav")
+    otro = wav(tmp_path / "b.wav", frecuencia=880)
+    cache.max_bytes = 1 << 20
+    viejo = cache.get(audio, 0, 0.25)
+    vigente = cache.get(otro, 0, 0.25)
+    wav(tmp_path / "a.wav", frecuencia=1000)
+    os.utime(audio, ns=(0, os.stat(audio).st_mtime_ns + 10**9))
+    nuevo = cache.get(audio, 0, 0.25)
+    assert nuevo != viejo
+    assert cache.purge_stale() == 1
+    assert not os.path.exists(viejo)
+    assert os.path.exists(vigente) and os.path.exists(nuevo)
+
+
+def test_buffer_slice_and_offsets(tmp_path):
+    ruta = tmp_path / "tramo.pcm"
+    datos = np.arange(SR * 2 * 2, dtype=np.int16)   # 2 s estéreo
+    ruta.write_bytes(datos.tobytes())
+    buf = PcmBuffer(str(ruta), SR, 2)
+    assert buf.duration == pytest.approx(2.0)
+    assert buf.byte_offset(0.5) == SR // 2 * 4
+    assert buf.byte_offset(-1) == 0
+    assert buf.byte_offset(10) == len(buf)
+    tramo = np.frombuffer(buf.slice(0.5, 0.25), dtype=np.int16)
+    np.testing.assert_array_equal(tramo, datos[SR:SR + SR // 2])
+    # Al final se recorta al largo del archivo
+    assert len(buf.slice(1.5, 1.0)) == len(buf) - buf.byte_offset(1.5)
+    del tramo
+    buf.close()
+
+
+def test_empty_buffer(tmp_path):
+    ruta = tmp_path / "vacio.pcm"
+    ruta.write_bytes(b"")
+    buf = PcmBuffer(str(ruta), SR, 1)
+    assert len(buf) == 0 and len(buf.slice(0, 1)) == 0
+    buf.close()
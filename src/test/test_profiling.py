@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from src.func import profiling
+from src.func.profiling import phase, timed
+
+
+@pytest.fixture
+def medicion(monkeypatch):
+    monkeypatch.setattr(profiling, "_stats", {})
+    monkeypatch.setattr(profiling, "_enabled", True)
+
+
+@timed("prueba: suma")
+def suma(a, b):
+    return a + b
+
+
+@timed()
+def sin_nombre():
+    return None
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(profiling, "_stats", {})
+    monkeypatch.setattr(profiling, "_enabled", False)
+    assert suma(1, 2) == 3
+    with phase("nada"):
+        pass
+    assert profiling.stats() == {}
+
+
+def test_timed_aggregates_calls(medicion):
+    assert [suma(i, 1) for i in range(5)] == [1, 2, 3, 4, 5]
+    sin_nombre()
+    datos = profiling.stats()
+    assert datos["prueba: suma"]["llamadas"] == 5
+    assert 0 <= datos["prueba: suma"]["max"] <= datos["prueba: suma"]["total"]
+    # Sin nombre se usa el de la función
+    assert datos["sin_nombre"]["llamadas"] == 1
+    assert suma.__name__ == "suma"
+
+
+def test_record_max_and_exceptions(medicion):
+    profiling.record("fase", 0.5)
+    profiling.record("fase", 0.25)
+    with pytest.raises(ZeroDivisionError):
+        with phase("fase"):
+            1 / 0
+    datos = profiling.stats()["fase"]
+    assert datos["llamadas"] == 3
+    assert datos["max"] == 0.5
+    assert datos["total"] >= 0.75
+
+
+def test_concurrent_records(medicion):
+    hilos = [threading.Thread(target=lambda: [profiling.record("hilos", 0.001) for _ in range(1000)])
+             for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert profiling.stats()["hilos"]["llamadas"] == 4000
+
+
+def test_report_prints_by_total(medicion, capsys):
+    profiling.record("rapida", 0.1)
+    profiling.record("lenta", 2.0)
+    profiling.report()
+    salida = capsys.readouterr().out
+    assert salida.index("lenta") < salida.index("rapida")
@@ -0,0 +1,52 @@
+import sys
+
+import pytest
+
+from src.func import render
+from src.func.formats import PRESETS
+from src.func.render import render_timeline, write_cue_sheet
+
+
+class FakeCache:
+    sample_rate = 8000
+    channels = 1
+
+    def open(self, archivo, inicio, fin):
+        raise OSError(f"no se pudo decodificar {archivo}")
+
+
+@pytest.fixture
+def codificador(monkeypatch):
+    # Sin FFmpeg: el "codificador" copia la entrada estándar al archivo
+    copia = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb'))"
+    monkeypatch.setattr(render, "encoder_cmd", lambda output, *a, **k: [sys.executable, "-c", copia, output])
+
+
+EVENTOS = [{"tipo": "ptt", "estado": "on"}, {"tipo": "silencio", "duracion": 0.5},
+           {"tipo": "clip", "archivo": "seccion.mp3", "inicio": 0, "fin": 1, "nombre": "Editorial"},
+           {"tipo": "ptt", "estado": "off"}]
+
+
+def test_render_silence_and_cues(tmp_path, codificador):
+    salida = tmp_path / "boletin.wav"
+    cues, duracion = render_timeline(EVENTOS[:2] + EVENTOS[3:], str(salida), FakeCache())
+    assert duracion == 0.5
+    assert salida.stat().st_size == 8000 // 2 * 2
+    assert [c["ptt"] for c in cues] == ["on", "off"]
+
+
+def test_render_error_keeps_original_exception(tmp_path, codificador):
+    # El error del clip no se tapa con el de cerrar el codificador
+    with pytest.raises(OSError, match="seccion.mp3"):
+        render_timeline(EVENTOS, str(tmp_path / "boletin.wav"), FakeCache())
+
+
+@pytest.mark.parametrize("preset, tipo", [("mp3", "MP3"), ("pcm8k", "WAVE"), ("opus", "OGG"), ("ulaw", "BINARY")])
+def test_cue_sheet_file_type(tmp_path, preset, tipo):
+    fmt = PRESETS[preset]
+    salida = tmp_path / f"boletin.{fmt['ext']}"
+    cues = [{"tiempo": 2.0, "ptt": "on", "nombre": "entrada"}, {"tiempo": 61.4, "ptt": "off", "nombre": None}]
+    hoja = open(write_cue_sheet(cues, str(salida), fmt=fmt), encoding="utf-8").read().splitlines()
+    assert hoja[2] == f'FILE "{salida.name}" {tipo}'
+    assert "    INDEX 01 00:02:00" in hoja
+    assert "    REM PTT_OFF 01:01:30" in hoja
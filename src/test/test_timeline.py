@@ -0,0 +1,134 @@
+import pytest
+
+from src.func import timeline
+from src.func.timeline import (MIN_STRETCH, _timeline, build_timeline, plan_pauses, schedule_station_ids,
+                               section_cuts, transmission_loads, transmissions)
+
+# Duraciones de prueba: el plan solo necesita la de entrada, salida y anuncios
+DURACIONES = {"entrada": 20.0, "salida": 15.0, "anuncio": 45.0, "id": 12.0}
+
+
+@pytest.fixture(autouse=True)
+def duraciones(monkeypatch):
+    monkeypatch.setattr(timeline, "file_duration", lambda archivo: DURACIONES.get(archivo, 600.0))
+
+
+def config(tmp_path, fines, reproduccion=160, planificacion="global"):
+    return {
+        "general": {"media_path": str(tmp_path) + "/"},
+        "duraciones": {"reproduccion": reproduccion, "pausa": 12, "alerta": 8, "retroceso": 4,
+                       "planificacion": planificacion},
+        "alertas": [],
+        "secciones": [{"nombre": f"S{i}", "archivo": f"s{i}.mp3", "inicio": "00:00:00", "fin": fin}
+                      for i, fin in enumerate(fines)],
+    }
+
+
+def test_section_cuts_without_pauses():
+    assert section_cuts(0, 100, 160, 4) == ([], 100)
+
+
+def test_section_cuts_every_limit_with_rewind():
+    cortes, carga = section_cuts(0, 400, 160, 4)
+    assert cortes == [160, 316]
+    # Lo que queda tras el último corte, contando el retroceso
+    assert carga == 400 - (316 - 4)
+
+
+def test_section_cuts_with_load_pauses_earlier():
+    cortes, _ = section_cuts(0, 400, 160, 4, carga=100)
+    assert cortes[0] == 60
+
+
+def test_section_cuts_chained_short_stretch():
+    # Encadenada con casi todo el límite ya al aire: conviene soltar el PTT
+    assert section_cuts(0, 400, 160, 4, carga=160 - MIN_STRETCH + 1, encadenada=True) is None
+
+
+def test_section_cuts_never_past_the_end():
+    # Un anuncio largo no deja un tramo mínimo antes del fin: se corta antes
+    # con un tramo corto en lugar de pasar del límite
+    cortes, carga = section_cuts(0, 29, 60, 4, carga=45)
+    assert cortes == [15]
+    assert carga == 29 - (15 - 4)
+
+
+def test_section_cuts_load_leaves_no_stretch():
+    with pytest.raises(ValueError):
+        section_cuts(0, 29, 60, 4, carga=57)
+    assert section_cuts(0, 29, 60, 4, carga=57, encadenada=True) is None
+
+
+def test_section_cuts_invalid_durations():
+    with pytest.raises(ValueError):
+        section_cuts(0, 100, 4, 4)
+
+
+def test_plan_global_not_worse_than_per_section(tmp_path):
+    cfg = config(tmp_path, ["00:02:11", "00:09:33", "00:04:34", "00:02:06", "00:03:47"])
+    glob = plan_pauses(cfg, "entrada", "salida")
+    seccion = plan_pauses(cfg, "entrada", "salida", modo="seccion")
+    assert (glob["pausas"], glob["transmisiones"]) <= (seccion["pausas"], seccion["transmisiones"])
+    assert not any(s["continua"] for s in seccion["secciones"])
+
+
+def test_plan_unknown_mode(tmp_path):
+    with pytest.raises(ValueError):
+        plan_pauses(config(tmp_path, ["00:01:00"]), "entrada", "salida", modo="otro")
+
+
+@pytest.mark.parametrize("modo", ["global", "seccion"])
+def test_plan_matches_timeline(tmp_path, modo):
+    # Secciones cortas tras anuncios largos incluidas (el caso de los cortes fantasma)
+    cfg = config(tmp_path, ["00:06:10", "00:03:38", "00:00:29", "00:09:23", "00:00:17"], reproduccion=60)
+    anuncios = {s["nombre"]: "anuncio" for s in cfg["secciones"]}
+    plan = plan_pauses(cfg, "entrada", "salida", anuncios, modo=modo)
+    eventos = build_timeline(cfg, "entrada", "salida", anuncios, plan)
+    assert len(transmissions(eventos)) == plan["transmisiones"]
+    fin = {s["nombre"]: timeline.convert_hhmmss_to_seconds(s["fin"]) for s in cfg["secciones"]}
+    for s in plan["secciones"]:
+        assert all(p < fin[s["nombre"]] for p in s["pausas"])
+
+
+def test_station_ids_respect_interval():
+    eventos = [{"tipo": "ptt", "estado": "on"}]
+    for n in range(10):
+        eventos += [{"tipo": "silencio", "duracion": 100.0}, {"tipo": "marca", "punto": f"p{n}"}]
+    eventos.append({"tipo": "ptt", "estado": "off"})
+    # Se identifica en la última marca antes de pasar de 300 s al aire
+    assert schedule_station_ids(eventos, intervalo=300, duracion=5) == ["p1", "p3", "p5", "p7", "p9"]
+    assert schedule_station_ids(eventos, intervalo=300, duracion=5, al_final=False) == ["p1", "p3", "p5", "p7"]
+
+
+@pytest.mark.parametrize("modo", ["global", "seccion"])
+def test_plan_loads_never_exceed_limit(tmp_path, modo):
+    cfg = config(tmp_path, ["00:06:10", "00:03:38", "00:00:29", "00:09:23", "00:00:17"], reproduccion=60)
+    anuncios = {s["nombre"]: "anuncio" for s in cfg["secciones"]} if modo == "global" else {}
+    plan = plan_pauses(cfg, "entrada", "salida", anuncios, modo=modo)
+    assert max(transmission_loads(_timeline(cfg, "entrada", "salida", anuncios, plan))) <= 60
+
+
+@pytest.mark.parametrize("intervalo", [300, 600])
+def test_station_ids_fit_in_limit(tmp_path, intervalo):
+    # El tiempo de la identificación se reserva antes de fijar los cortes
+    cfg = config(tmp_path, ["00:06:10", "00:03:38", "00:02:06", "00:09:23", "00:01:17"])
+    cfg["identificacion"] = {"intervalo": intervalo}
+    anuncios = {s["nombre"]: "anuncio" for s in cfg["secciones"]}
+    plan = plan_pauses(cfg, "entrada", "salida", anuncios, identificacion="id")
+    assert plan["identificaciones"]
+    eventos = _timeline(cfg, "entrada", "salida", anuncios, plan)
+    assert max(transmission_loads(eventos, plan["identificaciones"], DURACIONES["id"])) <= 160
+
+
+def test_station_ids_interval_shorter_than_limit(tmp_path):
+    # Dos identificaciones en una transmisión la pasarían del límite
+    cfg = config(tmp_path, ["00:06:10", "00:03:38"])
+    cfg["identificacion"] = {"intervalo": 60}
+    with pytest.raises(ValueError):
+        plan_pauses(cfg, "entrada", "salida", identificacion="id")
+
+
+def test_station_id_longer_than_limit(tmp_path):
+    cfg = config(tmp_path, ["00:01:00"], reproduccion=15)
+    with pytest.raises(ValueError):
+        plan_pauses(cfg, "entrada", "salida", identificacion="id")
@@ -0,0 +1,57 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from src.func.tones import cue_bytes, cue_file, cue_notes, cw, morse_notes, morse_units
+
+SR = 8000
+
+
+def test_morse_units_spacing():
+    # E = ".", T = "-": 3 unidades entre letras y 7 entre palabras
+    assert morse_units("ET") == [(1, 1), (0, 3), (1, 3)]
+    assert morse_units("E T") == [(1, 1), (0, 7), (1, 3)]
+    assert morse_units("ñ") == []
+
+
+def test_paris_timing():
+    # PARIS son 50 unidades con el espacio de palabra: 1 minuto a N wpm son N palabras
+    total = sum(d for _, d in morse_notes("PARIS", wpm=20)) + 7 * 1.2 / 20
+    assert total == pytest.approx(60 / 20)
+
+
+def test_cw_envelope_has_no_clicks():
+    audio = cw("E", SR, wpm=20, amplitud=0.5)
+    assert np.abs(audio).max() <= 0.5 * 32767 + 1
+    # Empieza y termina en silencio (rampas completas)
+    assert abs(audio[0]) < 1 and abs(audio[-1]) < 1
+
+
+def test_pips_with_long_final():
+    notas = cue_notes({"tipo": "pips", "cantidad": 3, "frecuencia": 1000, "duracion": 0.1, "final": 1500})
+    assert [f for f, _ in notas] == [1000, 0, 1000, 0, 1500]
+    assert notas[-1][1] == pytest.approx(0.3)
+
+
+def test_unknown_cue_type():
+    with pytest.raises(ValueError):
+        cue_notes({"tipo": "sirena"})
+
+
+def test_cue_bytes_interleaved():
+    spec = {"tipo": "bip", "frecuencia": 1000, "duracion": 0.2}
+    datos = np.frombuffer(cue_bytes(spec, SR, 2), dtype=np.int16).reshape(-1, 2)
+    np.testing.assert_array_equal(datos[:, 0], datos[:, 1])
+
+
+def test_cue_file_written_once(tmp_path):
+    spec = {"tipo": "bip", "frecuencia": 800, "duracion": 0.25}
+    ruta = cue_file(spec, str(tmp_path), SR)
+    with wave.open(ruta) as w:
+        assert (w.getframerate(), w.getnchannels(), w.getsampwidth()) == (SR, 1, 2)
+    mtime = os.path.getmtime(ruta)
+    assert cue_file(spec, str(tmp_path), SR) == ruta
+    assert os.path.getmtime(ruta) == mtime
+    assert cue_file(dict(spec, frecuencia=900), str(tmp_path), SR) != ruta
@@ -0,0 +1,58 @@
+import sys
+import types
+
+import pytest
+
+from src.func.tts import Pyttsx3Engine, TTSError, TTSService, create_engine
+
+
+class FakeVoice:
+    def __init__(self, id, languages=()):
+        self.id = id
+        self.languages = list(languages)
+
+
+@pytest.fixture
+def pyttsx3_falso(monkeypatch):
+    # pyttsx3 en memoria: ofrece una voz en inglés y una en español
+    propiedades = {}
+
+    class Motor:
+        def setProperty(self, nombre, valor):
+            propiedades[nombre] = valor
+
+        def getProperty(self, nombre):
+            return [FakeVoice("english"), FakeVoice("spanish-latin-am", ["spanish"])]
+
+    modulo = types.SimpleNamespace(init=lambda: Motor())
+    monkeypatch.setitem(sys.modules, "pyttsx3", modulo)
+    return propiedades
+
+
+def test_pyttsx3_key_stable_across_init(pyttsx3_falso, tmp_path):
+    servicio = TTSService(str(tmp_path), "pyttsx3", velocidad=120)
+    antes = servicio.cache_file("Buenas noches")
+    servicio.engine._init()
+    # Se eligió la voz en español, pero la clave de caché no cambia
+    assert pyttsx3_falso["voice"] == "spanish-latin-am"
+    assert servicio.cache_file("Buenas noches") == antes
+    assert servicio.engine.key() == "pyttsx3|auto|120"
+
+
+def test_configured_voice_in_key(pyttsx3_falso):
+    motor = Pyttsx3Engine(voz="english")
+    motor._init()
+    assert pyttsx3_falso["voice"] == "english"
+    assert motor.key() != Pyttsx3Engine().key()
+
+
+def test_cache_file_depends_on_text_and_speed(tmp_path):
+    servicio = TTSService(str(tmp_path), "espeak-ng", velocidad=120)
+    otro = TTSService(str(tmp_path), "espeak-ng", velocidad=150)
+    assert servicio.cache_file("hola") != servicio.cache_file("adiós")
+    assert servicio.cache_file("hola") != otro.cache_file("hola")
+
+
+def test_unknown_engine():
+    with pytest.raises(TTSError):
+        create_engine("festival")
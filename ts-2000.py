@@ -1,20 +1,12 @@
 import serial
-import time
 import streamlit as st
+from src.func.cat import CatSession, RadioPoller, MODES, smeter_display
 
 SERIAL_PORT = 'COM13'
 BAUDRATE = 9600
-
-MODES = {
-    '1': 'LSB',
-    '2': 'USB',
-    '3': 'CW',
-    '4': 'FM',
-    '5': 'AM',
-    '6': 'FSK',
-    '7': 'CW-R',
-    '8': 'FSK-R'
-}
+POLL_INTERVAL = 0.5     # Segundos entre lecturas de FA/MD/SM/BY
+HISTORY_SIZE = 600      # Lecturas guardadas en el historial
+COMMAND_TIMEOUT = 2     # Espera máxima por la respuesta de un comando encolado
 
 @st.cache_resource
 def init_serial():
@@ -34,89 +26,92 @@ def init_serial():
         st.error(f"No se pudo abrir el puerto {SERIAL_PORT}: {e}")
         return None
 
-def send_command(ser, command):
-    if not command.endswith(';'):
-        command += ';'
-    ser.write(command.encode())
-    time.sleep(0.3)
-    response = ser.read_all().decode().strip()
-    return response or "[Sin respuesta]"
-
-def get_freq_mode_rs(ser):
-    raw = send_command(ser, 'FA;')
-    freq = "Desconocida"
-    for part in raw.split(';'):
-        if part.startswith("FA"):
-            try:
-                freq_hz = int(part[2:])
-                freq = f"{freq_hz / 1_000_000:.5f} MHz"
-                break
-            except ValueError:
-                pass
-
-    mode_raw = send_command(ser, 'MD;')
-    mode_code = mode_raw.replace("MD", "").replace(";", "")
-    mode = MODES.get(mode_code, "Desconocido")
-
-    rm_raw = send_command(ser, 'RM;')
-    rs_val = 0
-    for part in rm_raw.split(';'):
-        if part.startswith("RM"):
-            try:
-                rs_val = int(part[2:])
-            except ValueError:
-                pass
-            break
-
-    s_units = min(rs_val // 28, 9)
-    sm_str = "S9+" if s_units >= 9 else f"S{s_units}"
-    bar = f"[{'#' * s_units}{'-' * (9 - s_units)}]"
-    sm_display = f"{sm_str}  {bar} (RM={rs_val})"
-
-    return freq, mode, sm_display
-
-def set_frequency(ser, freq_khz):
+@st.cache_resource
+def init_poller():
+    """
+    Un solo hilo dueño del puerto para todas las sesiones y reruns de Streamlit.
+    """
+    ser = init_serial()
+    if not ser:
+        return None
+    return RadioPoller(CatSession(ser), interval=POLL_INTERVAL, history=HISTORY_SIZE).start()
+
+def send_command(poller, command):
+    try:
+        return poller.submit(command, response=True).result(timeout=COMMAND_TIMEOUT) or "[Sin respuesta]"
+    except Exception as e:
+        return f"[Error: {e}]"
+
+def get_freq_mode_rs(poller):
+    status = poller.snapshot()
+    if status is None:
+        return "Desconocida", "Desconocido", "[Sin lectura]"
+    freq = f"{status.freq_mhz:.5f} MHz"
+    return freq, status.mode, smeter_display(status.smeter)
+
+def set_frequency(poller, freq_khz):
     try:
         freq_hz = int(float(freq_khz) * 1000)
-        freq_str = str(freq_hz).zfill(11)
-        return send_command(ser, f'FA{freq_str};')
     except ValueError:
         return "Frecuencia inválida"
-
-def set_mode(ser, mode_code):
-    return send_command(ser, f'MD{mode_code};')
-
-def ptt_on(ser):
-    return send_command(ser, 'TX;')
-
-def ptt_off(ser):
-    return send_command(ser, 'RX;')
-
-def read_menu_61A(ser):
-    return send_command(ser, 'EX06101000;')
-
-def write_menu_61A(ser, value):
-    return send_command(ser, f'EX06101001{value};')
+    poller.submit(f"FA{freq_hz:011d};")
+    # Los comandos de ajuste no responden; se verifica con una consulta
+    return send_command(poller, 'FA;')
+
+def set_mode(poller, mode_code):
+    poller.submit(f"MD{mode_code};")
+    return send_command(poller, 'MD;')
+
+def ptt_on(poller):
+    poller.submit('TX;').result(timeout=COMMAND_TIMEOUT)
+    return "TX"
+
+def ptt_off(poller):
+    poller.submit('RX;').result(timeout=COMMAND_TIMEOUT)
+    return "RX"
+
+def read_menu_61A(poller):
+    return send_command(poller, 'EX06101000;')
+
+def write_menu_61A(poller, value):
+    # Como FA/MD: el ajuste no responde; se verifica leyendo el menú
+    poller.submit(f'EX06101001{value};')
+    return read_menu_61A(poller)
+
+def radio_panel(poller):
+    freq, mode, sm = get_freq_mode_rs(poller)
+    st.success(f"Frecuencia: {freq}")
+    st.info(f"Modo: {mode}")
+    st.warning(f"RS: {sm}")
+    status = poller.snapshot()
+    if status is not None and status.busy is not None:
+        st.write("📶 Canal ocupado" if status.busy else "🔇 Canal libre")
+    history = poller.get_history()
+    if history:
+        st.line_chart([h.smeter for h in history])
+    if poller.last_error:
+        st.caption(f"Errores de lectura: {poller.errors} (último: {poller.last_error})")
 
 def main():
     st.title("Control Kenwood TS-2000 vía CAT")
-    ser = init_serial()
-    if not ser:
+    poller = init_poller()
+    if not poller:
         return
 
     st.subheader("Lectura del radio")
-    if st.button("📡 Leer frecuencia, modo y señal"):
-        freq, mode, sm = get_freq_mode_rs(ser)
-        st.success(f"Frecuencia: {freq}")
-        st.info(f"Modo: {mode}")
-        st.warning(f"RS: {sm}")
+    # El panel solo lee la instantánea del hilo; nunca toca el puerto
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=POLL_INTERVAL * 2)(radio_panel)(poller)
+    else:
+        st.button("📡 Actualizar lectura")
+        radio_panel(poller)
 
     st.subheader("Control de frecuencia y modo")
     col1, col2 = st.columns(2)
     with col1:
         freq_input = st.text_input("Nueva frecuencia (kHz)", "146520")
         if st.button("Establecer frecuencia"):
-            result = set_frequency(ser, freq_input)
+            result = set_frequency(poller, freq_input)
             if '?' in result:
                 st.error(f"Error: {result}")
             else:
@@ -124,7 +119,7 @@ def main():
     with col2:
         mode_select = st.selectbox("Modo", list(MODES.items()), format_func=lambda x: f"{x[0]} - {x[1]}")
         if st.button("Cambiar modo"):
-            result = set_mode(ser, mode_select[0])
+            result = set_mode(poller, mode_select[0])
             if '?' in result:
                 st.error(f"Error: {result}")
             else:
@@ -134,14 +129,14 @@ def main():
     col3, col4 = st.columns(2)
     with col3:
         if st.button("🔴 Activar PTT (TX)"):
-            result = ptt_on(ser)
+            result = ptt_on(poller)
             if '?' in result:
                 st.error(result)
             else:
                 st.success("✅ Transmitiendo")
     with col4:
         if st.button("⚪ Desactivar PTT (RX)"):
-            result = ptt_off(ser)
+            result = ptt_off(poller)
             if '?' in result:
                 st.error(result)
             else:
@@ -149,14 +144,14 @@ def main():
 
     st.subheader("Menú 61A (Modo Repetidor)")
     if st.button("Leer menú 61A"):
-        result = read_menu_61A(ser)
+        result = read_menu_61A(poller)
         if '?' in result:
             st.error(f"❌ {result}")
         else:
             st.success(f"📖 Respuesta: {result}")
     menu_val = st.selectbox("Establecer valor menú 61A", [("0", "OFF"), ("1", "LOCK-ED"), ("2", "CROSS")], format_func=lambda x: f"{x[0]} - {x[1]}")
     if st.button("Guardar valor menú 61A"):
-        result = write_menu_61A(ser, menu_val[0])
+        result = write_menu_61A(poller, menu_val[0])
         if '?' in result:
             st.error(f"❌ {result}")
         else:
@@ -165,7 +160,7 @@ def main():
     st.subheader("Enviar comando CAT manual")
     cmd = st.text_input("Comando CAT", "FA;")
     if st.button("Enviar comando"):
-        result = send_command(ser, cmd)
+        result = send_command(poller, cmd)
         if '?' in result or result.strip() == '' or not result.endswith(';'):
             st.error(f"⚠️ Respuesta del radio: {result}")
         else: